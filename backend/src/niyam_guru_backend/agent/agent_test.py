@@ -16,12 +16,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Annotated, Literal, TypedDict, Optional, Sequence
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from niyam_guru_backend.config import LLM_MODEL, SIMULATION_DIR
+from niyam_guru_backend.llm import LLMDeadlineExceeded, llm_clients, llm_hedger
+from niyam_guru_backend.simulation.evidence_store import evidence_fact_store, evidence_facts_text
 
 
 # ============================================================================
@@ -389,6 +390,7 @@ Available:
 
 Potentially Missing:
 {chr(10).join('  • ' + e for e in cs.get('Evidence_Missing', []))}
+{format_evidence_facts(data)}
 
 ─────────────────────────────────────────────────────────────────────────────
 APPLICABLE LAW:
@@ -416,6 +418,15 @@ Proposed Relief:
 """
 
 
+def format_evidence_facts(data: dict) -> str:
+    """Facts extracted from the complainant's uploaded documents, if any were cached."""
+    hashes = [e.get("sha256") for e in data.get("_evidence") or [] if isinstance(e, dict)]
+    facts = evidence_fact_store.get_many(hashes) if hashes else {}
+    if not facts:
+        return ""
+    return "\nDocuments Filed (extracted facts):\n" + evidence_facts_text(facts.values())
+
+
 def format_defense_brief(data: dict) -> str:
     """Format defense brief for defense counsel prompt."""
     cs = data.get("Case_Summary", {})
@@ -543,7 +554,7 @@ def create_message(speaker: str, content: str, phase: str) -> Message:
 
 def judge_node(state: CourtroomState) -> dict:
     """Judge agent node - presides over proceedings."""
-    llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.3)
+    llm = llm_clients.get(LLM_MODEL, temperature=0.3)
     
     # Build conversation context
     conversation = "\n\n".join([
@@ -577,7 +588,7 @@ Remember to:
         HumanMessage(content=user_prompt)
     ]
     
-    response = llm.invoke(messages)
+    response = llm_hedger.invoke("simulation_judge", lambda: llm.invoke(messages))
     parsed = parse_agent_response(response.content)
     
     # Process judgment updates
@@ -625,7 +636,7 @@ Remember to:
 
 def defense_node(state: CourtroomState) -> dict:
     """Defense counsel agent node."""
-    llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.4)
+    llm = llm_clients.get(LLM_MODEL, temperature=0.4)
     
     # Get last statement for context
     last_msg = state["messages"][-1] if state["messages"] else {"content": "", "speaker": ""}
@@ -700,7 +711,7 @@ Remember to:
         HumanMessage(content=user_prompt)
     ]
     
-    response = llm.invoke(messages)
+    response = llm_hedger.invoke("simulation_defense", lambda: llm.invoke(messages))
     parsed = parse_agent_response(response.content)
     
     new_message = create_message("DEFENSE", parsed["clean_content"], state["phase"])
@@ -726,7 +737,7 @@ def consumer_input_node(state: CourtroomState) -> dict:
 
 def router_node(state: CourtroomState) -> dict:
     """Router node to determine next speaker based on context."""
-    llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.1)
+    llm = llm_clients.get(LLM_MODEL, temperature=0.1)
     
     last_msg = state["messages"][-1] if state["messages"] else {"speaker": "SYSTEM", "content": ""}
     
@@ -739,19 +750,18 @@ def router_node(state: CourtroomState) -> dict:
         recent_messages=format_recent_messages(state["messages"], 5)
     )
     
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content="Determine the next speaker and any phase changes.")
-    ])
-    
     try:
+        response = llm_hedger.invoke("simulation_router", lambda: llm.invoke([
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Determine the next speaker and any phase changes.")
+        ]))
         # Try to parse JSON response
         result = json.loads(response.content)
         next_speaker = result.get("next_speaker", "CONSUMER")
         phase_change = result.get("suggest_phase_change")
         should_conclude = result.get("should_conclude", False)
-    except json.JSONDecodeError:
-        # Fallback to simple alternation
+    except (json.JSONDecodeError, LLMDeadlineExceeded):
+        # Fallback to simple alternation (also when the router call times out)
         if last_msg["speaker"] == "CONSUMER":
             next_speaker = "DEFENSE"
         elif last_msg["speaker"] == "DEFENSE":
@@ -779,7 +789,7 @@ def router_node(state: CourtroomState) -> dict:
 
 def verdict_node(state: CourtroomState) -> dict:
     """Final verdict generation node."""
-    llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.2)
+    llm = llm_clients.get(LLM_MODEL, temperature=0.2)
     
     # Compile all proceedings
     all_messages = "\n\n".join([
@@ -849,10 +859,10 @@ Deliver a formal judgment including:
 Use formal judicial language appropriate for an Indian Consumer Court judgment.
 """
 
-    response = llm.invoke([
+    response = llm_hedger.invoke("simulation_verdict", lambda: llm.invoke([
         SystemMessage(content="You are an experienced Judge delivering a formal judgment."),
         HumanMessage(content=verdict_prompt)
-    ])
+    ]))
     
     verdict_message = create_message("JUDGE", response.content, "verdict")
     
@@ -1113,6 +1123,7 @@ def run_courtroom_simulation(judgment_file_path: str):
     # Main simulation loop - explicit turn-based
     simulation_running = True
     judge_intervention_counter = 0  # Track turns since last judge intervention
+    deadline_retries = 0  # Consecutive turns whose LLM call hit its deadline
     
     while simulation_running and not current_state["concluded"]:
         try:
@@ -1257,10 +1268,19 @@ def run_courtroom_simulation(judgment_file_path: str):
             if current_state.get("turn_count", 0) >= 30:
                 print("\n⚠️  Maximum turns reached. Proceeding to verdict...")
                 current_state["next_speaker"] = "VERDICT"
+            deadline_retries = 0
         
         except KeyboardInterrupt:
             print("\n\n⚠️  Simulation interrupted by user.")
             simulation_running = False
+        except LLMDeadlineExceeded as e:
+            # The node failed before changing any state, so the same turn can be retried
+            deadline_retries += 1
+            if deadline_retries > 2:
+                print(f"\n❌ Error during simulation: {e}")
+                simulation_running = False
+            else:
+                print(f"\n⚠️  {e}; retrying the turn...")
         except Exception as e:
             print(f"\n❌ Error during simulation: {e}")
             import traceback
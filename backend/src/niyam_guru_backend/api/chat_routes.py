@@ -3,6 +3,7 @@ Chat API Routes
 
 Endpoints for the AI-powered chat agent:
   POST  /api/chat/send                — send a message
+  POST  /api/chat/send/stream         — send a message, stream the reply (SSE)
   GET   /api/chat/history/{id}        — load conversation history for a case
   POST  /api/chat/voice-transcript    — save a voice transcript for a case
   GET   /api/chat/cases/{uid}         — list all cases for a user
@@ -11,12 +12,20 @@ Endpoints for the AI-powered chat agent:
   GET   /api/chat/health              — health check
 """
 
+import time
 from typing import Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from niyam_guru_backend.api.sse import Emit, sse_response
+
 from niyam_guru_backend.chat_agent import chat_service
+from niyam_guru_backend.chat_agent.case_facts import case_facts
+from niyam_guru_backend.chat_agent.faq import faq_bank
+from niyam_guru_backend.chat_agent.history import chat_history
+from niyam_guru_backend.chat_agent.turns import case_turns
 from niyam_guru_backend.chat_agent.email_service import email_service
+from niyam_guru_backend.core import metrics
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -65,10 +74,10 @@ async def send_message(req: SendMessageRequest):
     """Send a user message and get an AI response.
 
     Requires a case_id — cases are created via the MyCases page.
-    The full conversation history is sent to the LLM on every call.
+    The LLM sees the recent turns plus a running summary of older ones.
     """
     # Verify case exists
-    case = chat_service.get_case(req.case_id)
+    case = await chat_service.aget_case(req.case_id)
     if not case:
         return SendMessageResponse(
             success=False, error=f"Case {req.case_id} not found"
@@ -89,10 +98,66 @@ async def send_message(req: SendMessageRequest):
     )
 
 
+@router.post("/send/stream")
+async def send_message_stream(req: SendMessageRequest, http_request: Request):
+    """Send a user message and stream the AI response as server-sent events.
+
+    Events:
+    - `stage`        {stage, tools} the intake stage this reply is written in
+    - `token`        {text} reply text as the model generates it (tool-call
+                     rounds usually produce none)
+    - `tool_call`    {name, status} when a tool starts / completes
+    - `email_draft`  the draft record, as soon as it has been saved
+    - `documents`    {document_names} once the filing PDFs are generated
+    - `result`       same shape as /send (includes the full document_pack)
+    - `error`        {error} if the turn failed
+
+    The reply is persisted when the stream ends. If the client disconnects,
+    the generation is cancelled and only the user message is saved.
+    """
+    case = await chat_service.aget_case(req.case_id)
+    if not case:
+        return SendMessageResponse(
+            success=False, error=f"Case {req.case_id} not found"
+        )
+
+    started = time.perf_counter()
+
+    async def run_turn(emit: Emit) -> None:
+        first_token = {"seen": False}
+
+        def on_event(event: str, data: dict) -> None:
+            if event == "token" and not first_token["seen"]:
+                first_token["seen"] = True
+                metrics.observe("chat.stream.first_token_seconds", time.perf_counter() - started)
+            emit(event, data)
+
+        try:
+            reply, email_draft, document_pack, error = await chat_service.chat(
+                case_id=req.case_id,
+                user_message=req.message,
+                metadata=req.metadata,
+                on_event=on_event,
+                stream_tokens=True,
+            )
+            if error:
+                emit("error", {"error": error})
+            else:
+                emit("result", SendMessageResponse(
+                    success=True, case_id=req.case_id, reply=reply,
+                    email_draft=email_draft, document_pack=document_pack,
+                ).model_dump())
+        except Exception as e:
+            print(f"❌ [Chat] Error in streamed chat turn: {e}")
+            emit("error", {"error": str(e)})
+
+    return sse_response(http_request, run_turn, "⚠️ [Chat] Client disconnected, cancelling streamed reply")
+
+
 @router.get("/history/{case_id}")
 async def get_history(case_id: str):
     """Load all messages for a case."""
-    messages = chat_service.get_messages(case_id)
+    messages = await chat_service.aget_messages(case_id)
     return {"success": True, "case_id": case_id, "messages": messages}
 
 
@@ -100,13 +165,13 @@ async def get_history(case_id: str):
 async def save_voice_transcript(req: VoiceTranscriptRequest):
     """Save a voice transcript to a case. Requires case_id."""
     # Verify case exists
-    case = chat_service.get_case(req.case_id)
+    case = await chat_service.aget_case(req.case_id)
     if not case:
         return VoiceTranscriptResponse(
             success=False, error=f"Case {req.case_id} not found"
         )
 
-    transcript_id = chat_service.save_voice_transcript(
+    transcript_id = await chat_service.asave_voice_transcript(
         case_id=req.case_id,
         original_transcript=req.original_transcript,
         english_translation=req.english_translation,
@@ -126,7 +191,7 @@ async def save_voice_transcript(req: VoiceTranscriptRequest):
 @router.get("/cases/{user_id}")
 async def list_cases(user_id: str):
     """List all cases for a user."""
-    cases = chat_service.list_user_cases(user_id)
+    cases = await chat_service.alist_user_cases(user_id)
     return {"success": True, "cases": cases}
 
 
@@ -137,14 +202,14 @@ async def list_cases(user_id: str):
 @router.post("/approve-email/{email_id}")
 async def approve_and_send_email(email_id: str):
     """Approve a drafted email and send it via Gmail."""
-    success, message = email_service.approve_and_send(email_id)
+    success, message = await email_service.aapprove_and_send(email_id)
     return {"success": success, "message": message}
 
 
 @router.get("/emails/{case_id}")
 async def list_emails(case_id: str):
     """List all emails for a case."""
-    emails = email_service.get_case_emails(case_id)
+    emails = await email_service.aget_case_emails(case_id)
     return {"success": True, "emails": emails}
 
 
@@ -155,4 +220,8 @@ async def chat_health():
         "service": "chat-agent",
         "llm_configured": chat_service.llm is not None,
         "supabase_configured": chat_service.supabase is not None,
+        "history": chat_history.stats(),
+        "turns": case_turns.stats(),
+        "case_facts": case_facts.stats(),
+        "faq": faq_bank.stats(),
     }
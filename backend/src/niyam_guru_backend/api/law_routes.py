@@ -0,0 +1,146 @@
+"""
+Statute Lookup API Routes
+
+Read-only endpoints over the Consumer Protection Act, 2019 sections in
+consumer_laws.csv, served from the in-memory StatuteIndex:
+  GET  /api/laws/sections/{identifier}  — a section or sub-section ("35", "Section 2 (7)")
+  GET  /api/laws/search?q=              — ranked full-text search
+  GET  /api/laws/chapters               — chapter → section tree
+  GET  /api/laws/health                 — health check
+
+Responses carry an ETag derived from the CSV contents, so clients can
+revalidate with If-None-Match and receive 304 Not Modified.
+"""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from niyam_guru_backend.retrieval.statute_index import get_statute_index
+
+router = APIRouter(prefix="/api/laws", tags=["Laws"])
+
+CACHE_CONTROL = "public, max-age=3600"
+
+
+# ========== Pydantic Models ==========
+
+class SectionModel(BaseModel):
+    key: str
+    identifier: str
+    section_number: str
+    sub_section: Optional[str] = None
+    chapter_number: str
+    chapter_title: str
+    title: str
+    text: str
+
+
+class SectionLookupResponse(BaseModel):
+    success: bool
+    identifier: str
+    sections: List[SectionModel]
+
+
+class SearchHit(BaseModel):
+    score: float
+    section: SectionModel
+
+
+class SearchResponse(BaseModel):
+    success: bool
+    query: str
+    results: List[SearchHit]
+
+
+# ========== Helpers ==========
+
+def _etag() -> str:
+    return f'"laws-{get_statute_index().version}"'
+
+
+def _not_modified(request: Request) -> Optional[Response]:
+    """Return a 304 response when the client already holds the current version."""
+    etag = _etag()
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def _cached_json(payload: BaseModel) -> JSONResponse:
+    return JSONResponse(
+        content=payload.model_dump(),
+        headers={"ETag": _etag(), "Cache-Control": CACHE_CONTROL},
+    )
+
+
+# ========== Endpoints ==========
+
+@router.get("/health")
+async def health_check():
+    """Health check endpoint."""
+    index = get_statute_index()
+    return {
+        "status": "healthy",
+        "service": "statute-lookup",
+        "sections_indexed": len(index),
+        "version": index.version,
+    }
+
+
+@router.get("/sections/{identifier}", response_model=SectionLookupResponse)
+async def get_section(identifier: str, request: Request):
+    """
+    Look up a section of the Consumer Protection Act, 2019.
+
+    Accepts "35", "Section 35", "2(7)", "Section 2 (7)", "s. 2-7".
+    A bare section number returns all of its sub-sections in order.
+    """
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+
+    sections = get_statute_index().get_group(identifier)
+    if not sections:
+        raise HTTPException(status_code=404, detail=f"Section '{identifier}' not found")
+
+    return _cached_json(SectionLookupResponse(
+        success=True,
+        identifier=identifier,
+        sections=[SectionModel(**s.to_dict()) for s in sections],
+    ))
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_sections(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Free-text query"),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    """Full-text search over section titles and text, ranked by BM25."""
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+
+    hits = get_statute_index().search(q, limit=limit)
+    return _cached_json(SearchResponse(
+        success=True,
+        query=q,
+        results=[SearchHit(score=score, section=SectionModel(**s.to_dict())) for s, score in hits],
+    ))
+
+
+@router.get("/chapters")
+async def list_chapters(request: Request):
+    """The chapter tree: chapters with their sections and sub-section keys."""
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+
+    return JSONResponse(
+        content={"success": True, "chapters": get_statute_index().chapters()},
+        headers={"ETag": _etag(), "Cache-Control": CACHE_CONTROL},
+    )
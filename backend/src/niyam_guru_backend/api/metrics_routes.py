@@ -0,0 +1,69 @@
+"""
+Metrics API Routes
+
+  GET  /api/metrics              — snapshot of in-process counters, gauges and histograms
+  GET  /api/metrics/prefix-cache — static prompt-prefix cache entries and hit/miss counts
+  GET  /api/metrics/llm-hedging  — per-endpoint LLM deadlines, hedge rate and hedge win rate
+  GET  /api/metrics/llm-clients  — shared LLM clients with usage and connection-pool state
+  GET  /api/metrics/supabase     — shared Supabase client and its connection pool
+  GET  /api/metrics/case-cache   — case/conversation/email cache hit rates
+  GET  /api/metrics/write-behind — queued inserts waiting to be written
+  GET  /api/metrics/faq          — FAQ bank version, hit rate and hits per entry
+"""
+
+from fastapi import APIRouter
+
+from niyam_guru_backend.chat_agent.case_cache import case_cache
+from niyam_guru_backend.chat_agent.faq import faq_bank
+from niyam_guru_backend.core import metrics, run_blocking, supabase_provider, write_behind
+from niyam_guru_backend.llm import llm_clients, llm_gateway, llm_hedger
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"])
+
+
+@router.get("")
+async def get_metrics():
+    """Return the current in-process metrics snapshot."""
+    return {"success": True, "metrics": metrics.snapshot()}
+
+
+@router.get("/prefix-cache")
+async def get_prefix_cache_stats():
+    """Return the LLM gateway's prefix-cache state."""
+    return {"success": True, "prefix_cache": llm_gateway.stats()}
+
+
+@router.get("/llm-hedging")
+async def get_llm_hedging_stats():
+    """Return deadline and hedged-request statistics per LLM endpoint."""
+    return {"success": True, "llm_hedging": llm_hedger.stats()}
+
+
+@router.get("/llm-clients")
+async def get_llm_client_stats():
+    """Return the shared LLM client registry and its connection pools."""
+    return {"success": True, "llm_clients": llm_clients.stats()}
+
+
+@router.get("/supabase")
+async def get_supabase_pool_stats():
+    """Return the shared Supabase client's connection-pool state."""
+    return {"success": True, "supabase": supabase_provider.stats()}
+
+
+@router.get("/case-cache")
+async def get_case_cache_stats():
+    """Return the chat case cache's backend, size and hit rates."""
+    return {"success": True, "case_cache": await run_blocking(case_cache.stats)}
+
+
+@router.get("/write-behind")
+async def get_write_behind_stats():
+    """Return the write-behind queue's depth per table and its limits."""
+    return {"success": True, "write_behind": write_behind.stats()}
+
+
+@router.get("/faq")
+async def get_faq_stats():
+    """Return the FAQ bank's version, match threshold and hit counts."""
+    return {"success": True, "faq": faq_bank.stats()}
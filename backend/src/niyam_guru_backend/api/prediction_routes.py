@@ -5,18 +5,30 @@ This module provides FastAPI endpoints that receive consumer complaint data
 from the frontend and pass it to the judgment prediction module.
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Header, Request, Response
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List
-import base64
+from typing import Callable, Optional, List
 import json
+import time
 
 from niyam_guru_backend.simulation.judgement_prediction import (
-    run_judgment_prediction_from_api,
+    arun_judgment_prediction_from_api,
     ConsumerComplaintData,
     UploadedDocument,
 )
+from niyam_guru_backend.simulation.prediction_jobs import JOB_FAILED, JobQueueFullError, prediction_jobs
+from niyam_guru_backend.simulation.idempotency import (
+    COMPUTED,
+    IdempotencyConflictError,
+    idempotency_key,
+    prediction_idempotency,
+    prediction_job_idempotency,
+    request_fingerprint,
+)
+from niyam_guru_backend.api.sse import Emit, sse_response
+from niyam_guru_backend.api.uploads import MalformedUploadError, UploadTooLargeError, spool_multipart
+from niyam_guru_backend.core import metrics, run_blocking
 
 router = APIRouter(prefix="/api/prediction", tags=["Prediction"])
 
@@ -105,10 +117,82 @@ class PredictionResponse(BaseModel):
     error: Optional[str] = None
 
 
+class JobSubmitResponse(BaseModel):
+    """Response when a prediction is queued as a background job."""
+    success: bool
+    jobId: str
+    status: str
+    statusUrl: str
+
+
+# ========== Helpers ==========
+
+def _request_file_data(request: PredictionRequest) -> Optional[List[dict]]:
+    """Convert uploaded file models to the dicts the prediction module expects."""
+    if not request.files:
+        return None
+    return [
+        {
+            "name": f.name,
+            "category": f.category,
+            "file_type": f.file_type,
+            "content": f.content,
+        }
+        for f in request.files
+    ]
+
+
+async def _deduplicated_prediction(
+    form_dict: dict,
+    file_data: Optional[List[dict]],
+    user_id: Optional[str],
+    save_to_db: bool,
+    header_key: Optional[str],
+    cleanup: Optional[Callable[[], None]] = None,
+) -> tuple[dict, Optional[str], str]:
+    """
+    Run a prediction through the idempotency layer.
+
+    Identical concurrent requests share one pipeline run and recent successful
+    results are replayed, so retries never insert a second judgment_predictions
+    row. Returns (result, prediction id, outcome).
+
+    cleanup runs when the pipeline run using this request's files finishes,
+    even if the client has disconnected by then.
+    """
+    async def compute():
+        try:
+            return await arun_judgment_prediction_from_api(
+                form_data=form_dict,
+                file_data=file_data,
+                user_id=user_id,
+                save_to_db=save_to_db,
+            )
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    # Hashing decodes every base64 file, so keep it off the event loop
+    fingerprint = await run_blocking(request_fingerprint, form_dict, file_data, user_id, save_to_db)
+    (result, supabase_id), outcome = await prediction_idempotency.run(
+        idempotency_key(fingerprint, header_key, user_id),
+        fingerprint,
+        compute,
+        cacheable=lambda value: "error" not in value[0],
+    )
+    if outcome != COMPUTED:
+        print(f"♻️ Served {outcome} prediction for a duplicate request")
+    return result, supabase_id, outcome
+
+
 # ========== API Endpoints ==========
 
 @router.post("/analyze", response_model=PredictionResponse)
-async def analyze_complaint(request: PredictionRequest):
+async def analyze_complaint(
+    request: PredictionRequest,
+    response: Response,
+    idempotency_key_header: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
     """
     Analyze a consumer complaint and predict the judgment.
     
@@ -116,9 +200,15 @@ async def analyze_complaint(request: PredictionRequest):
     - Form data from ConsumerComplaintTemplate
     - Uploaded files (PDFs, images) as base64
     - Optional user ID for database association
+    - Optional Idempotency-Key header
     
     Files are passed directly to Google Gemini for multimodal analysis
-    without any local storage.
+    without any local storage. The pipeline runs asynchronously, so other
+    requests are served while the prediction is in flight.
+    
+    Duplicate requests (same form data and file contents, or the same
+    Idempotency-Key) share one run; the Idempotency-Status response header
+    says whether this response was computed, joined or replayed.
     """
     try:
         print("\n" + "=" * 70)
@@ -129,17 +219,8 @@ async def analyze_complaint(request: PredictionRequest):
         form_dict = request.formData.model_dump()
         
         # Convert file data to the expected format
-        file_data = None
-        if request.files:
-            file_data = [
-                {
-                    "name": f.name,
-                    "category": f.category,
-                    "file_type": f.file_type,
-                    "content": f.content,
-                }
-                for f in request.files
-            ]
+        file_data = _request_file_data(request)
+        if file_data:
             print(f"📎 Received {len(file_data)} files for analysis")
         
         # Log key form data
@@ -149,12 +230,10 @@ async def analyze_complaint(request: PredictionRequest):
         print(f"💰 Claim Amount: Rs. {form_dict.get('claimConsideration', 'N/A')}")
         
         # Run the prediction
-        result, supabase_id = run_judgment_prediction_from_api(
-            form_data=form_dict,
-            file_data=file_data,
-            user_id=request.userId,
-            save_to_db=request.saveToDb,
+        result, supabase_id, outcome = await _deduplicated_prediction(
+            form_dict, file_data, request.userId, request.saveToDb, idempotency_key_header
         )
+        response.headers["Idempotency-Status"] = outcome
         
         # Check for errors in the result
         if "error" in result:
@@ -173,6 +252,8 @@ async def analyze_complaint(request: PredictionRequest):
             predictionId=supabase_id,
         )
         
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         print(f"❌ Error processing prediction request: {str(e)}")
         import traceback
@@ -184,48 +265,120 @@ async def analyze_complaint(request: PredictionRequest):
         )
 
 
+@router.post("/analyze/stream")
+async def analyze_complaint_stream(request: PredictionRequest, http_request: Request):
+    """
+    Analyze a consumer complaint, streaming progress as server-sent events.
+
+    Events, in order:
+    - `stage`          {stage, status} for validation, retrieval, llm, persistence
+    - `validation`     the pre-LLM validation report
+    - `similar_cases`  the past cases shown to the model
+    - `token`          {text} raw LLM output as it is generated
+    - `section`        {name, value} each top-level JSON section (Case_Summary,
+                       Legal_Grounds, ...) as soon as it has been fully received;
+                       confidence caps are applied but values are provisional
+    - `result`         the final prediction, same shape as /analyze
+    - `error`          {error} if the pipeline failed
+
+    The pipeline is cancelled if the client disconnects.
+    """
+    form_dict = request.formData.model_dump()
+    file_data = _request_file_data(request)
+    started = time.perf_counter()
+
+    async def run_pipeline(emit: Emit) -> None:
+        first_section = {"seen": False}
+
+        def on_progress(stage: str, status: str, data: dict) -> None:
+            if status == "token":
+                emit("token", data)
+                return
+            if status == "section":
+                if not first_section["seen"]:
+                    first_section["seen"] = True
+                    metrics.observe("prediction.stream.first_section_seconds", time.perf_counter() - started)
+                emit("section", data)
+                return
+            emit("stage", {"stage": stage, "status": status})
+            if stage == "validation" and status == "completed" and data.get("report"):
+                emit("validation", data["report"])
+            elif stage == "retrieval" and status == "completed":
+                emit("similar_cases", {"cases": data.get("cases", [])})
+
+        try:
+            result, supabase_id = await arun_judgment_prediction_from_api(
+                form_data=form_dict,
+                file_data=file_data,
+                user_id=request.userId,
+                save_to_db=request.saveToDb,
+                progress=on_progress,
+                stream_tokens=True,
+            )
+            emit("result", PredictionResponse(
+                success="error" not in result,
+                prediction=result,
+                predictionId=supabase_id,
+                error=result.get("error"),
+            ).model_dump())
+        except Exception as e:
+            print(f"❌ Error in streamed prediction: {str(e)}")
+            emit("error", {"error": str(e)})
+
+    print("\n📩 Received streaming prediction request")
+    return sse_response(http_request, run_pipeline, "⚠️ Client disconnected, cancelling streamed prediction")
+
+
 @router.post("/analyze-multipart")
 async def analyze_complaint_multipart(
-    formData: str = Form(..., description="JSON string of form data"),
-    files: List[UploadFile] = File(default=[], description="Uploaded files"),
-    userId: Optional[str] = Form(default=None),
-    saveToDb: bool = Form(default=True),
+    request: Request,
+    response: Response,
+    idempotency_key_header: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
     """
     Alternative endpoint that accepts multipart/form-data.
     
-    Useful when sending actual file uploads instead of base64.
-    Files are read and converted to base64 for processing.
+    Useful when sending actual file uploads instead of base64. Fields:
+    formData (JSON string), files (repeated), userId, saveToDb.
+    
+    The body is streamed: files are spooled to temporary files as they
+    arrive (see api/uploads.py) and handed to the pipeline without being
+    read into memory or base64-encoded until the Gemini request is built.
+    Oversized uploads are rejected with 413 as soon as a limit is crossed.
+    Duplicate requests are deduplicated exactly as for /analyze.
     """
+    try:
+        form = await spool_multipart(request)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MalformedUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         print("\n" + "=" * 70)
         print("📩 Received multipart prediction request")
         print("=" * 70)
         
         # Parse form data JSON
-        form_dict = json.loads(formData)
+        form_dict = json.loads(form.fields.get("formData", ""))
+        user_id = form.fields.get("userId") or None
+        save_to_db = form.fields.get("saveToDb", "true").strip().lower() not in ("false", "0", "no", "off")
         
-        # Process uploaded files
+        # Spooled uploads are passed through as file handles
         file_data = []
-        for upload_file in files:
-            content = await upload_file.read()
-            b64_content = base64.b64encode(content).decode("utf-8")
-            
-            file_data.append({
-                "name": upload_file.filename,
-                "category": "Uploaded Document",  # Category would need to be passed separately
-                "file_type": upload_file.content_type or "application/octet-stream",
-                "content": b64_content,
-            })
-            print(f"📎 Processed file: {upload_file.filename} ({upload_file.content_type})")
+        for upload in form.files:
+            file_data.append(upload.to_file_data())
+            print(f"📎 Spooled file: {upload.filename} ({upload.content_type}, {upload.size} bytes)")
         
         # Run the prediction
-        result, supabase_id = run_judgment_prediction_from_api(
-            form_data=form_dict,
-            file_data=file_data if file_data else None,
-            user_id=userId,
-            save_to_db=saveToDb,
+        result, supabase_id, outcome = await _deduplicated_prediction(
+            form_dict, file_data if file_data else None, user_id, save_to_db, idempotency_key_header,
+            cleanup=form.close,
         )
+        response.headers["Idempotency-Status"] = outcome
+        if outcome != COMPUTED:
+            # Another run served this request; its own files were never read
+            form.close()
         
         return {
             "success": "error" not in result,
@@ -235,13 +388,73 @@ async def analyze_complaint_multipart(
         }
         
     except json.JSONDecodeError as e:
+        form.close()
         raise HTTPException(status_code=400, detail=f"Invalid form data JSON: {str(e)}")
+    except IdempotencyConflictError as e:
+        form.close()
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        form.close()
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing prediction: {str(e)}")
 
 
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_prediction_job(
+    request: PredictionRequest,
+    response: Response,
+    idempotency_key_header: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
+    """
+    Queue a prediction and return immediately with a job ID.
+
+    Poll GET /api/prediction/jobs/{jobId} for stage progress and the result.
+    A duplicate submission returns the existing job unless that job failed.
+    """
+    form_dict = request.formData.model_dump()
+    file_data = _request_file_data(request)
+    fingerprint = await run_blocking(request_fingerprint, form_dict, file_data, request.userId, request.saveToDb)
+    key = idempotency_key(fingerprint, idempotency_key_header, request.userId)
+
+    def submit():
+        return prediction_jobs.submit(
+            form_data=form_dict,
+            file_data=file_data,
+            user_id=request.userId,
+            save_to_db=request.saveToDb,
+        )
+
+    try:
+        job, outcome = await prediction_job_idempotency.run(key, fingerprint, submit)
+        if job.status == JOB_FAILED:
+            # Let a retry after a failure start over
+            prediction_job_idempotency.forget(key)
+            job, outcome = await prediction_job_idempotency.run(key, fingerprint, submit)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response.headers["Idempotency-Status"] = outcome
+
+    print(f"📥 Queued prediction job {job.id}")
+    return JobSubmitResponse(
+        success=True,
+        jobId=job.id,
+        status=job.status,
+        statusUrl=f"/api/prediction/jobs/{job.id}",
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_prediction_job(job_id: str):
+    """Return a prediction job's status, per-stage progress and (when done) its result."""
+    job = await prediction_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return {"success": True, **job.to_dict()}
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
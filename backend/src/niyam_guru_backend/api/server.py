@@ -19,6 +19,12 @@ from niyam_guru_backend.api.question_routes import router as question_router
 from niyam_guru_backend.api.voice_routes import voice_router
 from niyam_guru_backend.api.chat_routes import router as chat_router
 from niyam_guru_backend.api.document_routes import router as document_router
+from niyam_guru_backend.api.law_routes import router as law_router
+from niyam_guru_backend.api.metrics_routes import router as metrics_router
+from niyam_guru_backend.chat_agent.faq import faq_bank
+from niyam_guru_backend.retrieval.statute_index import get_statute_index
+from niyam_guru_backend.core import shutdown_executors, supabase_provider, write_behind
+from niyam_guru_backend.simulation.prediction_jobs import prediction_jobs
 
 
 @asynccontextmanager
@@ -43,6 +49,19 @@ async def lifespan(app: FastAPI):
     else:
         print("⚠️ Warning: SUPABASE_URL not set")
     
+    # Build the statute lookup index and FAQ bank up front so the first request is fast
+    try:
+        get_statute_index()
+    except Exception as e:
+        print(f"⚠️ Warning: Statute index not available: {e}")
+    if faq_bank.enabled:
+        try:
+            faq_bank.load()
+        except Exception as e:
+            print(f"⚠️ Warning: FAQ answer bank not available: {e}")
+    
+    await prediction_jobs.start()
+    
     print("=" * 70)
     print("📡 Server ready to accept requests")
     print("=" * 70 + "\n")
@@ -51,6 +70,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("\n🛑 Niyam Guru Backend API Server Shutting Down...")
+    await prediction_jobs.stop()
+    write_behind.close()
+    shutdown_executors(wait=False)
+    supabase_provider.close()
 
 
 # Create FastAPI application
@@ -67,8 +90,12 @@ app = FastAPI(
     
     ## Endpoints
     - `/api/prediction/analyze` - Main prediction endpoint (JSON with base64 files)
+    - `/api/prediction/analyze/stream` - Prediction with server-sent progress events
     - `/api/prediction/analyze-multipart` - Multipart form data endpoint
+    - `/api/prediction/jobs` - Queue a prediction as a background job (poll `/api/prediction/jobs/{id}`)
     - `/api/prediction/health` - Health check
+    - `/api/laws/sections/{identifier}` - Consumer Protection Act section lookup
+    - `/api/laws/search?q=` - Full-text search over the Act
     """,
     version="1.0.0",
     lifespan=lifespan,
@@ -95,6 +122,8 @@ app.include_router(question_router)
 app.include_router(voice_router)
 app.include_router(chat_router)
 app.include_router(document_router)
+app.include_router(law_router)
+app.include_router(metrics_router)
 
 
 # Root endpoint
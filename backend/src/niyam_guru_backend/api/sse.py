@@ -0,0 +1,80 @@
+"""
+Server-sent event streaming shared by the chat and prediction routes.
+
+A route hands sse_response() a producer coroutine; the producer runs as a
+task and emits events through the callback it is given, which queues them
+for the response body:
+
+- keep-alive  a comment line is sent after KEEP_ALIVE_SECONDS without an
+              event, so proxies don't drop an idle connection
+- disconnect  when the client goes away the producer task is cancelled
+- end         the stream closes once the producer returns (or raises)
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+
+KEEP_ALIVE_SECONDS = 15
+
+# emit(event, data) queues one event for the client
+Emit = Callable[[str, dict], None]
+
+
+def sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(
+    http_request: Request,
+    produce: Callable[[Emit], Awaitable[None]],
+    cancel_message: str,
+) -> StreamingResponse:
+    """
+    Stream the events produce(emit) emits; cancel it if the client disconnects.
+
+    Args:
+        http_request: The incoming request, polled for disconnects
+        produce: Coroutine function doing the work; handles its own errors
+        cancel_message: Logged when the client leaves before produce finishes
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: dict) -> None:
+        events.put_nowait(sse(event, data))
+
+    async def run() -> None:
+        try:
+            await produce(emit)
+        finally:
+            events.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            if not task.done():
+                print(cancel_message)
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,219 @@
+"""
+Streaming multipart parsing for evidence uploads.
+
+The request body is fed chunk by chunk to python-multipart; every file part
+is written straight into a SpooledTemporaryFile (in memory up to
+UPLOAD_SPOOL_MEMORY_BYTES, then on disk) while its size and SHA-256 are
+tracked. Limits are enforced as bytes arrive, so an oversized upload is
+rejected without ever being held in full:
+
+- UPLOAD_MAX_FILE_BYTES      per file part
+- UPLOAD_MAX_REQUEST_BYTES   whole body (also checked against Content-Length)
+- UPLOAD_MAX_FILES           number of file parts
+
+Files are never base64-encoded here; UploadedDocument encodes them once,
+when the provider request is built.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Dict, List, Optional
+
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from niyam_guru_backend.config import (
+    UPLOAD_MAX_FILE_BYTES,
+    UPLOAD_MAX_REQUEST_BYTES,
+    UPLOAD_MAX_FILES,
+    UPLOAD_SPOOL_MEMORY_BYTES,
+)
+from niyam_guru_backend.core import metrics, run_blocking
+
+
+class UploadTooLargeError(Exception):
+    """An upload exceeded a per-file, per-request or file-count limit (HTTP 413)."""
+
+
+class MalformedUploadError(Exception):
+    """The body is not a parseable multipart/form-data request (HTTP 400)."""
+
+
+@dataclass
+class SpooledUpload:
+    """One uploaded file, spooled and hashed while it streamed in."""
+    field_name: str
+    filename: str
+    content_type: str
+    handle: BinaryIO
+    size: int = 0
+    sha256: str = ""
+
+    def to_file_data(self, category: str = "Uploaded Document") -> dict:
+        """The file dict accepted by build_complaint_from_api()."""
+        return {
+            "name": self.filename,
+            "category": category,
+            "file_type": self.content_type,
+            "handle": self.handle,
+            "size": self.size,
+            "sha256": self.sha256,
+        }
+
+
+@dataclass
+class SpooledForm:
+    """Parsed multipart body: text fields plus spooled files."""
+    fields: Dict[str, str] = field(default_factory=dict)
+    files: List[SpooledUpload] = field(default_factory=list)
+
+    def close(self) -> None:
+        close_uploads(self.files)
+
+
+def close_uploads(files: List[SpooledUpload]) -> None:
+    """Close spooled files (safe to call more than once)."""
+    for upload in files:
+        upload.handle.close()
+
+
+class _PartCollector:
+    """python-multipart callbacks that route file bytes into spooled files."""
+
+    def __init__(self, max_file_bytes: int, max_files: int, spool_bytes: int):
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.spool_bytes = spool_bytes
+        self.form = SpooledForm()
+        self.pending: List[tuple] = []         # (upload, bytes) awaiting an off-loop write
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._field_name = ""
+        self._field_data = bytearray()
+        self._upload: Optional[SpooledUpload] = None
+        self._digest = None
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._field_data = bytearray()
+        self._upload = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MalformedUploadError('Content-Disposition must include a "name"')
+        self._field_name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" not in options:
+            return
+        if len(self.form.files) >= self.max_files:
+            raise UploadTooLargeError(f"Too many files; at most {self.max_files} are accepted")
+        self._upload = SpooledUpload(
+            field_name=self._field_name,
+            filename=options[b"filename"].decode("utf-8", "replace"),
+            content_type=self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1"),
+            handle=SpooledTemporaryFile(max_size=self.spool_bytes),
+        )
+        self._digest = hashlib.sha256()
+        self.form.files.append(self._upload)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if self._upload is None:
+            self._field_data.extend(chunk)
+            return
+        self._upload.size += len(chunk)
+        if self._upload.size > self.max_file_bytes:
+            raise UploadTooLargeError(
+                f"File '{self._upload.filename}' exceeds the {self.max_file_bytes // (1024 * 1024)} MB limit"
+            )
+        self._digest.update(chunk)
+        self.pending.append((self._upload, chunk))
+
+    def on_part_end(self) -> None:
+        if self._upload is None:
+            self.form.fields[self._field_name] = self._field_data.decode("utf-8", "replace")
+        else:
+            self._upload.sha256 = self._digest.hexdigest()
+
+
+def _write_pending(pending: List[tuple]) -> None:
+    for upload, chunk in pending:
+        upload.handle.write(chunk)
+
+
+async def spool_multipart(
+    request: Request,
+    max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+    max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES,
+    max_files: int = UPLOAD_MAX_FILES,
+    spool_bytes: int = UPLOAD_SPOOL_MEMORY_BYTES,
+) -> SpooledForm:
+    """
+    Stream a multipart/form-data body into spooled files.
+
+    Raises UploadTooLargeError as soon as a limit is crossed and
+    MalformedUploadError for a body that is not multipart; spooled files
+    are closed on either error. The caller owns (and closes) the files of
+    the returned form.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_request_bytes:
+        metrics.incr("upload.rejected", reason="request_size")
+        raise UploadTooLargeError(f"Request exceeds the {max_request_bytes // (1024 * 1024)} MB limit")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MalformedUploadError("Expected a multipart/form-data body")
+
+    collector = _PartCollector(max_file_bytes, max_files, spool_bytes)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_request_bytes:
+                raise UploadTooLargeError(f"Request exceeds the {max_request_bytes // (1024 * 1024)} MB limit")
+            parser.write(chunk)
+            if collector.pending:
+                # Spooled files roll over to disk, so write off the event loop
+                await run_blocking(_write_pending, collector.pending)
+                collector.pending = []
+        parser.finalize()
+    except UploadTooLargeError:
+        metrics.incr("upload.rejected", reason="size")
+        collector.form.close()
+        raise
+    except Exception as e:
+        collector.form.close()
+        if isinstance(e, MalformedUploadError):
+            raise
+        raise MalformedUploadError(f"Invalid multipart body: {e}") from e
+
+    for upload in collector.form.files:
+        upload.handle.seek(0)
+    metrics.observe("upload.request_bytes", received)
+    return collector.form
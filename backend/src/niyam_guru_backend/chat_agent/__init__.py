@@ -2,12 +2,20 @@
 Chat Agent Module — Gemini-powered conversational assistant for case intake.
 
 Manages multi-turn conversations, persists messages to Supabase,
-drafts/sends complaint emails via Gmail, and provides full conversation
-context to the LLM on every turn.
+keeps structured facts per case for filing documents and emails,
+drafts/sends complaint emails via Gmail, and gives the LLM the recent
+turns plus a rolling summary of the rest of the conversation, with
+only the current intake stage's prompt and tools. Turns of one case run
+one at a time; generic legal questions are answered from a curated FAQ bank.
 """
 
 from .chat_service import ChatService, chat_service
 from .email_service import EmailService, email_service
+from .case_cache import CaseCache, case_cache
+from .case_facts import CaseFactsStore, case_facts
+from .faq import FAQBank, faq_bank
+from .history import ChatHistoryManager, chat_history
+from .turns import CaseTurnQueue, case_turns
 from .voice_service import VoiceProcessor, voice_processor, SUPPORTED_LANGUAGES
 
 __all__ = [
@@ -15,6 +23,16 @@ __all__ = [
     "chat_service",
     "EmailService",
     "email_service",
+    "CaseCache",
+    "case_cache",
+    "CaseFactsStore",
+    "case_facts",
+    "FAQBank",
+    "faq_bank",
+    "ChatHistoryManager",
+    "chat_history",
+    "CaseTurnQueue",
+    "case_turns",
     "VoiceProcessor",
     "voice_processor",
     "SUPPORTED_LANGUAGES",
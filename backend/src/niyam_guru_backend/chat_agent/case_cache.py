@@ -0,0 +1,292 @@
+"""
+Read-through cache of case rows, conversations and case emails.
+
+Every chat turn used to read the case row and re-select the whole
+conversation; email history was re-queried whenever the model asked for
+it. ChatService and EmailService now read through this cache and update it
+in place on their own writes:
+
+- case:<id>       the user_cases row
+- messages:<id>   the ordered case_messages rows (as get_messages returns them)
+- emails:<id>     the ordered case_emails rows
+
+A write only touches a conversation or email list that is already cached;
+an uncached one is simply loaded in full on the next read. Entries expire
+after CASE_CACHE_TTL_SECONDS because case rows are also edited by the
+frontend directly.
+
+Backends (CASE_CACHE_BACKEND):
+- memory   process-local LRU of CASE_CACHE_MAX_ENTRIES entries (default)
+- sqlite   a file shared by every worker process on the host
+"""
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from ..config import (
+    CASE_CACHE_ENABLED,
+    CASE_CACHE_BACKEND,
+    CASE_CACHE_TTL_SECONDS,
+    CASE_CACHE_MAX_ENTRIES,
+    CASE_CACHE_DB_PATH,
+)
+from ..core import metrics
+
+
+# ========== Backends ==========
+
+class CaseCacheBackend:
+    """Interface for cache storage; values are JSON-serialisable."""
+
+    name = "none"
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        return 0
+
+
+class InMemoryCaseCache(CaseCacheBackend):
+    """Process-local LRU with per-entry expiry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CASE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Callers may mutate what they get back
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCaseCache(CaseCacheBackend):
+    """Single-file cache shared by the worker processes of one host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = CASE_CACHE_DB_PATH):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS case_cache ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+            conn.execute("DELETE FROM case_cache WHERE expires_at < ?", (time.time(),))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM case_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO case_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, json.dumps(value, default=str)),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM case_cache WHERE key = ?", (key,))
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM case_cache WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+
+
+def create_case_cache_backend(backend: str = CASE_CACHE_BACKEND) -> CaseCacheBackend:
+    """Build the configured backend, falling back to memory if SQLite is unusable."""
+    if backend == "sqlite":
+        try:
+            return SQLiteCaseCache()
+        except Exception as e:
+            print(f"⚠️ Could not open case cache database, caching in memory: {e}")
+    return InMemoryCaseCache()
+
+
+# ========== Case Cache ==========
+
+class CaseCache:
+    """Case-scoped view over a backend; see the module docstring."""
+
+    def __init__(
+        self,
+        backend: Optional[CaseCacheBackend] = None,
+        ttl_seconds: float = CASE_CACHE_TTL_SECONDS,
+        enabled: bool = CASE_CACHE_ENABLED,
+    ):
+        self.backend = backend or create_case_cache_backend()
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+    def _get(self, kind: str, case_id: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(f"{kind}:{case_id}")
+        except Exception as e:
+            print(f"⚠️ [CaseCache] read failed for {kind}:{case_id}: {e}")
+            value = None
+        metrics.incr("chat.cache", kind=kind, outcome="hit" if value is not None else "miss")
+        return value
+
+    def _set(self, kind: str, case_id: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(f"{kind}:{case_id}", value, self.ttl_seconds)
+        except Exception as e:
+            print(f"⚠️ [CaseCache] write failed for {kind}:{case_id}: {e}")
+            self.invalidate(case_id)
+
+    def _peek(self, kind: str, case_id: str) -> Optional[Any]:
+        """Read without counting a hit/miss (for in-place updates)."""
+        try:
+            return self.backend.get(f"{kind}:{case_id}")
+        except Exception:
+            return None
+
+    # ------------------------------------------------------------------
+    # Case rows
+    # ------------------------------------------------------------------
+
+    def get_case(self, case_id: str) -> Optional[dict]:
+        return self._get("case", case_id)
+
+    def put_case(self, row: dict) -> None:
+        if row and row.get("id"):
+            self._set("case", row["id"], row)
+
+    def update_case(self, case_id: str, fields: dict) -> None:
+        """Apply a partial update to a cached case row (no-op if not cached)."""
+        if not self.enabled:
+            return
+        row = self._peek("case", case_id)
+        if row is not None:
+            row.update(fields)
+            self._set("case", case_id, row)
+
+    # ------------------------------------------------------------------
+    # Conversation
+    # ------------------------------------------------------------------
+
+    def get_messages(self, case_id: str) -> Optional[List[dict]]:
+        return self._get("messages", case_id)
+
+    def set_messages(self, case_id: str, rows: List[dict]) -> None:
+        self._set("messages", case_id, rows)
+
+    def append_messages(self, case_id: str, rows: List[dict]) -> None:
+        if not self.enabled or not rows:
+            return
+        cached = self._peek("messages", case_id)
+        if cached is not None:
+            self._set("messages", case_id, cached + list(rows))
+
+    # ------------------------------------------------------------------
+    # Emails
+    # ------------------------------------------------------------------
+
+    def get_emails(self, case_id: str) -> Optional[List[dict]]:
+        return self._get("emails", case_id)
+
+    def set_emails(self, case_id: str, rows: List[dict]) -> None:
+        self._set("emails", case_id, rows)
+
+    def upsert_email(self, row: dict) -> None:
+        """Add or replace one email row in its case's cached list."""
+        if not self.enabled or not row or not row.get("case_id"):
+            return
+        cached = self._peek("emails", row["case_id"])
+        if cached is None:
+            return
+        for i, existing in enumerate(cached):
+            if existing.get("id") == row.get("id"):
+                cached[i] = row
+                break
+        else:
+            cached.append(row)
+        self._set("emails", row["case_id"], cached)
+
+    # ------------------------------------------------------------------
+
+    def invalidate(self, case_id: str) -> None:
+        for kind in ("case", "messages", "emails"):
+            try:
+                self.backend.delete(f"{kind}:{case_id}")
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        def count(kind: str, outcome: str) -> int:
+            return metrics.counter("chat.cache", kind=kind, outcome=outcome)
+
+        kinds = {}
+        for kind in ("case", "messages", "emails"):
+            hits, misses = count(kind, "hit"), count(kind, "miss")
+            kinds[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": self.backend.size(),
+            "kinds": kinds,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+case_cache = CaseCache()
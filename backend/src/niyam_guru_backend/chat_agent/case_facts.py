@@ -0,0 +1,289 @@
+"""
+Incremental case-facts store.
+
+generate_filing_documents used to depend on the model re-reading the whole
+conversation and re-emitting all 24 form fields as tool arguments on every
+(re)generation — a long, slow generation on the reply's critical path. Each
+case now carries its facts as one JSON object on its row
+(user_cases.case_facts), keyed by the tool's field names:
+
+- update   after every reply, a cheap extraction call (CASE_FACTS_MODEL,
+           temperature 0) reads only that turn's messages plus the current
+           facts and returns the fields the user stated or corrected; they
+           are merged in a background task, one extraction per case at a
+           time. The assistant's reply is context only: its example
+           addresses are not facts, and an email address is kept only if it
+           appears in the user's own messages
+- read     chat turns show the model the facts on file and what is still
+           missing; the document tool renders from the facts, and tool
+           arguments only carry fields the user just gave or corrected
+           (they are merged into the facts too); email drafts default their
+           recipient to the opposite party's address the user gave
+
+Facts are kept in process like chat summaries; the (cached) case row is
+read after a restart. A turn waits up to CASE_FACTS_WAIT_SECONDS for the
+previous turn's extraction before reading them.
+"""
+
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from langchain_core.messages import HumanMessage
+
+from ..config import CASE_FACTS_ENABLED, CASE_FACTS_MODEL, CASE_FACTS_WAIT_SECONDS
+from ..core import get_supabase, metrics, run_blocking
+from ..llm import llm_clients, llm_hedger
+from .case_cache import case_cache
+
+
+# Fact name → (filing-form key, what it is). Names match generate_filing_documents.
+FACT_FIELDS: Dict[str, tuple] = {
+    "complainant_name": ("complainantName", "full name of the complainant"),
+    "complainant_father_husband_name": ("complainantFatherHusbandName", "S/o, D/o or W/o name"),
+    "complainant_age": ("complainantAge", "age in years"),
+    "complainant_occupation": ("complainantOccupation", "occupation"),
+    "complainant_address": ("complainantAddress", "full residential address"),
+    "complainant_phone": ("complainantPhone", "phone number"),
+    "complainant_email": ("complainantEmail", "email address"),
+    "op_name": ("opName", "opposite party (company) name"),
+    "op_address": ("opAddress", "opposite party address"),
+    "op_phone": ("opPhone", "opposite party phone"),
+    "op_email": (None, "opposite party grievance / customer care email"),
+    "case_category": ("caseCategory", 'e.g. "E-COMMERCE", "BANKING"'),
+    "sub_category": ("subCategory", 'e.g. "Online Shopping"'),
+    "product_service_description": ("productServiceDescription", "the product or service"),
+    "purchase_date": ("purchaseDate", "date of purchase, DD/MM/YYYY"),
+    "purchase_amount": ("purchaseAmount", "amount paid in rupees"),
+    "payment_mode": ("paymentMode", 'e.g. "UPI", "Credit Card"'),
+    "invoice_number": ("invoiceNumber", "invoice / order number"),
+    "deficiency_type": ("deficiencyType", 'e.g. "Defective Product", "Deficient Service"'),
+    "date_of_deficiency": ("dateOfDeficiency", "when the problem was discovered, DD/MM/YYYY"),
+    "grievance_description": ("grievanceDescription", "what went wrong, in a few sentences"),
+    "relief_sought": ("reliefSought", "refund / replacement / compensation wanted"),
+    "forum_name": ("forumName", "consumer forum to file at"),
+    "state": ("stateOfCauseOfAction", "state where the cause of action arose"),
+    "district": ("districtOfCauseOfAction", "district where the cause of action arose"),
+}
+
+DEFAULT_FORUM = "District Consumer Disputes Redressal Forum"
+
+EXTRACTION_PROMPT = """You keep the case file for an Indian consumer complaint. Read the user's latest messages and
+report the case facts the USER states or corrects.
+
+Fields:
+{fields}
+
+Facts on file:
+{facts}
+
+Assistant's reply to them (context only — never take facts, names or addresses from it):
+{context}
+
+User's latest messages:
+{messages}
+
+Respond with ONLY a JSON object (no markdown) holding the fields the user's messages state or correct,
+as strings, in English. Omit fields they do not mention. Do not guess. Respond with {{}} if there is nothing new."""
+
+# Fields kept only when their value appears verbatim in the user's messages
+VERBATIM_FIELDS = ("complainant_email", "op_email")
+
+
+def _clean(updates: dict) -> Dict[str, str]:
+    """Known, non-empty fields as stripped strings."""
+    return {
+        k: str(v).strip() for k, v in (updates or {}).items()
+        if k in FACT_FIELDS and v is not None and str(v).strip()
+    }
+
+
+def form_data(facts: dict) -> dict:
+    """The filing-form dict the PDF generators take."""
+    form = {key: facts.get(name, "") for name, (key, _) in FACT_FIELDS.items() if key}
+    form["forumName"] = form["forumName"] or DEFAULT_FORUM
+    form["paidAsConsideration"] = form["purchaseAmount"]
+    form["complaintYear"] = str(datetime.now().year)
+    return form
+
+
+def missing_fields(facts: dict) -> List[str]:
+    return [name for name, (key, _) in FACT_FIELDS.items() if key and name != "forum_name" and not facts.get(name)]
+
+
+def facts_note(facts: dict) -> str:
+    """Context note listing the facts on file and the form fields still missing."""
+    known = "\n".join(f"- {name}: {value}" for name, value in facts.items())
+    return (
+        "[Case facts on file — recorded automatically from this conversation]\n"
+        f"{known or '(none yet)'}\n"
+        f"Still missing for the filing documents: {', '.join(missing_fields(facts)) or 'nothing'}"
+    )
+
+
+def _parse_updates(text: str, user_text: str) -> Dict[str, str]:
+    if "```" in text:
+        text = text.split("```json")[-1] if "```json" in text else text.split("```")[1]
+        text = text.split("```")[0]
+    data = json.loads(text.strip() or "{}")
+    updates = _clean(data) if isinstance(data, dict) else {}
+    user_text = user_text.lower()
+    return {
+        k: v for k, v in updates.items()
+        if k not in VERBATIM_FIELDS or v.lower() in user_text
+    }
+
+
+class CaseFactsStore:
+    """Per-case facts, merged from each turn; see the module docstring."""
+
+    def __init__(
+        self,
+        model: str = CASE_FACTS_MODEL,
+        enabled: bool = CASE_FACTS_ENABLED,
+        wait_seconds: float = CASE_FACTS_WAIT_SECONDS,
+        max_cached: int = 1024,
+    ):
+        self.model = model
+        self.enabled = enabled
+        self.wait_seconds = wait_seconds
+        self.max_cached = max_cached
+        self._facts: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}           # latest extraction per case
+        self._all_tasks: Set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _remember(self, case_id: str, facts: dict) -> None:
+        with self._lock:
+            self._facts[case_id] = dict(facts)
+            self._facts.move_to_end(case_id)
+            while len(self._facts) > self.max_cached:
+                self._facts.popitem(last=False)
+
+    def _read(self, case_id: str) -> dict:
+        case = case_cache.get_case(case_id)
+        if case is not None and "case_facts" in case:
+            return dict(case.get("case_facts") or {})
+        supabase = get_supabase()
+        if supabase is None:
+            return {}
+        try:
+            result = supabase.table("user_cases").select("case_facts").eq("id", case_id).single().execute()
+            return dict((result.data or {}).get("case_facts") or {})
+        except Exception as e:
+            print(f"⚠️ [CaseFacts] Could not read facts for case {case_id}: {e}")
+            return {}
+
+    def _write(self, case_id: str, facts: dict) -> None:
+        case_cache.update_case(case_id, {"case_facts": facts})
+        supabase = get_supabase()
+        if supabase is None:
+            return
+        try:
+            supabase.table("user_cases").update({"case_facts": facts}).eq("id", case_id).execute()
+        except Exception as e:
+            print(f"⚠️ [CaseFacts] Could not store facts for case {case_id} (kept in memory): {e}")
+
+    async def _load(self, case_id: str) -> dict:
+        with self._lock:
+            facts = self._facts.get(case_id)
+        if facts is not None:
+            return dict(facts)
+        facts = await run_blocking(self._read, case_id)
+        self._remember(case_id, facts)
+        return facts
+
+    # ------------------------------------------------------------------
+    # Reading and merging
+    # ------------------------------------------------------------------
+
+    async def aget(self, case_id: str) -> dict:
+        """The case's facts, after the previous turn's extraction (bounded wait)."""
+        if not self.enabled:
+            return {}
+        task = self._tasks.get(case_id)
+        if task is not None and not task.done():
+            await asyncio.wait({task}, timeout=self.wait_seconds)
+        return await self._load(case_id)
+
+    async def amerge(self, case_id: str, updates: dict) -> dict:
+        """Merge non-empty fields into the case's facts and store them; returns the facts."""
+        facts = await self._load(case_id) if self.enabled else {}
+        changes = {k: v for k, v in _clean(updates).items() if facts.get(k) != v}
+        if not changes:
+            return facts
+        facts.update(changes)
+        if self.enabled:
+            self._remember(case_id, facts)
+            await run_blocking(self._write, case_id, facts)
+            metrics.incr("chat.case_facts_updated", len(changes))
+        return facts
+
+    # ------------------------------------------------------------------
+    # Per-turn extraction
+    # ------------------------------------------------------------------
+
+    async def _extract(self, case_id: str, rows: List[dict], previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait({previous})
+        facts = await self._load(case_id)
+        user_text = "\n".join(r.get("content") or "" for r in rows if r.get("role", "user") == "user")
+        context = "\n".join(r.get("content") or "" for r in rows if r.get("role") == "assistant")
+        prompt = EXTRACTION_PROMPT.format(
+            fields="\n".join(f"- {name}: {desc}" for name, (_, desc) in FACT_FIELDS.items()),
+            facts=json.dumps(facts, ensure_ascii=False) if facts else "{}",
+            context=context or "(none)",
+            messages=user_text,
+        )
+        try:
+            llm = llm_clients.get(self.model, temperature=0, max_output_tokens=1024)
+            response = await llm_hedger.ainvoke("case_facts", lambda: llm.ainvoke([HumanMessage(content=prompt)]))
+            text = response.content if isinstance(response.content, str) else str(response.content)
+            updates = _parse_updates(text, user_text)
+        except Exception as e:
+            metrics.incr("chat.case_facts_extractions", outcome="error")
+            print(f"⚠️ [CaseFacts] Extraction failed for case {case_id}: {e}")
+            return
+        metrics.incr("chat.case_facts_extractions", outcome="ok")
+        if updates:
+            await self.amerge(case_id, updates)
+            print(f"♻️ [CaseFacts] Case {case_id}: updated {', '.join(sorted(updates))}")
+
+    def update(self, case_id: str, rows: List[dict]) -> Optional[asyncio.Task]:
+        """Extract facts from one turn's messages in the background."""
+        if not self.enabled or not rows:
+            return None
+        previous = self._tasks.get(case_id)
+        task = asyncio.ensure_future(self._extract(case_id, list(rows), previous))
+        self._tasks[case_id] = task
+        self._all_tasks.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            self._all_tasks.discard(t)
+            if self._tasks.get(case_id) is t:
+                del self._tasks[case_id]
+
+        task.add_done_callback(_done)
+        return task
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "model": self.model,
+            "cached_cases": len(self._facts),
+            "extracting": len(self._all_tasks),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+case_facts = CaseFactsStore()
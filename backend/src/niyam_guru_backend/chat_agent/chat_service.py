@@ -4,22 +4,43 @@ Chat Service — handles conversation persistence and LLM interaction.
 - Creates user_cases as the "project" entity
 - Stores every message in case_messages
 - Stores voice transcripts in case_voice_transcripts
-- Loads full conversation history before each LLM call
+- Sends recent turns plus a rolling summary of older ones (see history.py)
+- Reads cases and conversations through case_cache and updates it on writes
+- Runs one turn at a time per case (see turns.py)
+- Keeps structured case facts for documents and emails (see case_facts.py)
+- Sends only the current stage's prompt sections and tools (see stages.py)
+- Answers generic consumer-law questions from a curated bank (see faq.py)
 - Uses Google Gemini (gemini-2.5-flash) for responses
+
+The Supabase client is synchronous. Every persistence method has an async
+twin (asave_message, aget_messages, aget_case, ...) with the same arguments
+that runs it on the bounded "io" pool; async routes and chat() use those so
+no network round trip runs on the event loop.
 """
 
+import asyncio
 import json
+import time
 import traceback
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 
-from supabase import Client, create_client
-from langchain_google_genai import ChatGoogleGenerativeAI
+from supabase import Client
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_core.tools import tool
 
-from ..config import SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY, LLM_MODEL
+from ..config import CHAT_STAGE_AWARE, CHAT_TOOL_TIMEOUT_SECONDS, CHAT_TOOL_TIMEOUTS, GOOGLE_API_KEY, LLM_MODEL
+from ..core import get_supabase, metrics, run_blocking, write_behind
+from ..llm import estimate_tokens, llm_clients, llm_gateway, llm_hedger
 from .email_service import email_service, EmailService
+from .case_cache import case_cache
+from .case_facts import case_facts, facts_note, form_data as facts_form_data, missing_fields
+from .faq import faq_bank, faq_eligible
+from .history import chat_history
+from .stages import detect_stage, stage_prompt, stage_tools
+from .turns import TurnRequest, case_turns
 from ..api.document_routes import (
     generate_index,
     generate_proforma,
@@ -57,21 +78,48 @@ def _extract_text(content) -> str:
 # ---------------------------------------------------------------------------
 
 def _get_supabase() -> Optional[Client]:
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("❌ [ChatService] Supabase credentials not configured")
-        return None
-    try:
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        print(f"❌ [ChatService] Supabase client error: {e}")
-        return None
+    client = get_supabase()
+    if client is None:
+        print("❌ [ChatService] Supabase not available (credentials missing or client error)")
+    return client
+
+
+# Columns get_messages() selects; cached conversations hold rows of this shape
+MESSAGE_FIELDS = ("id", "role", "content", "metadata", "created_at")
+
+
+def _message_row(row: dict) -> dict:
+    return {k: row.get(k) for k in MESSAGE_FIELDS}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class ToolOutcome:
+    """Result of one tool call: the message for the model plus any artefacts."""
+    message: ToolMessage
+    email_draft: Optional[dict] = None
+    document_pack: Optional[dict] = None
+
+
+def _render_filing_documents(form_data: dict) -> Dict[str, str]:
+    """Render the 5 filing PDFs (base64) for one form; blocking."""
+    return {
+        "index":           generate_index(form_data),
+        "proforma":        generate_proforma(form_data),
+        "affidavit":       generate_affidavit(form_data),
+        "memo_of_parties": generate_memo_of_parties(form_data),
+        "list_of_dates":   generate_list_of_dates(form_data),
+    }
 
 
 # ---------------------------------------------------------------------------
 # System prompt — guides the assistant through the case-intake flow
 # ---------------------------------------------------------------------------
 
-SYSTEM_PROMPT = """You are **Niyam Guru**, an AI legal assistant specialising in Indian consumer protection law (Consumer Protection Act, 2019).
+PROMPT_CORE = """You are **Niyam Guru**, an AI legal assistant specialising in Indian consumer protection law (Consumer Protection Act, 2019).
 
 Your job is to **guide the user step-by-step** through the entire consumer complaint process — from understanding their issue, to generating filing documents, to sending legal notices via email. Think of yourself as a friendly but knowledgeable paralegal walking them through each stage.
 
@@ -106,14 +154,21 @@ You should proactively move the conversation forward through these stages. After
 - Never fabricate legal citations. If unsure, say so.
 - **Language rule**: ALWAYS reply in the SAME language the user writes in. If the user writes in Hindi, reply entirely in Hindi. If in Malayalam, reply entirely in Malayalam. If in English, reply in English. NEVER mix languages or provide duplicate responses in multiple languages. Match the user's language exactly.
 
----
-
-### Document Generation Capabilities
+"""
 
-You have a tool to automatically generate 5 mandatory consumer complaint filing documents:
-- `generate_filing_documents`: Generates **Index, Proforma, Affidavit, Memo of Parties, and List of Dates & Events** as PDF files, auto-filled with the case details.
+# How the document tool gets its fields: from the case facts store, or (with
+# CASE_FACTS_ENABLED=false) from tool arguments the model fills in itself.
+if case_facts.enabled:
+    DOCUMENT_FIELDS = """The case details you collect are recorded automatically as **case facts**. Each turn you are shown the facts on file and the fields still missing, under "[Case facts on file]". The filing form needs:
+complainant name, father's/husband's name, age, occupation, address, phone and email; opposite party name, address and phone; case category and sub-category; product/service description; purchase date, amount, payment mode and invoice number; deficiency type and date; grievance description; relief sought; forum; state and district.
 
-The tool accepts these fields:
+Call `generate_filing_documents` **without arguments** — it reads the case facts. Pass a field only if the user has just given or corrected it in their latest message.
+"""
+    DOCUMENT_BLANKS = "generate the documents with whatever is on file"
+    DOCUMENT_REGENERATE = "do so immediately (pass just the updated fields)"
+    EMAIL_TO = "list of recipient email addresses (may be omitted when the user has given the opposite party's email)"
+else:
+    DOCUMENT_FIELDS = """The tool accepts these fields:
   - **complainant_name** — full name of the complainant
   - **complainant_father_husband_name** — S/o, D/o, W/o
   - **complainant_age** — age in years
@@ -139,6 +194,18 @@ The tool accepts these fields:
   - **state** — state where the cause of action arose
   - **district** — district where the cause of action arose
 
+Pass **every field** you have collected from the conversation on each call.
+"""
+    DOCUMENT_BLANKS = "generate the documents with whatever you have. Use empty string for missing fields"
+    DOCUMENT_REGENERATE = "do so immediately, passing every field again"
+    EMAIL_TO = "list of recipient email addresses"
+
+PROMPT_DOCUMENTS = f"""### Document Generation Capabilities
+
+You have a tool to automatically generate 5 mandatory consumer complaint filing documents:
+- `generate_filing_documents`: Generates **Index, Proforma, Affidavit, Memo of Parties, and List of Dates & Events** as PDF files, auto-filled with the case details.
+
+{DOCUMENT_FIELDS}
 **Document generation — HOW TO GUIDE THE USER:**
 
 Before generating documents, review what details you already have from the conversation and identify what's missing. Then:
@@ -155,7 +222,7 @@ Before generating documents, review what details you already have from the conve
 
 2. **Ask the user to provide the missing details.** Be specific about WHY each detail is needed (e.g., "Your full address is required for the complaint proforma and will appear on all documents.").
 
-3. **If the user says they don't have certain details or wants to proceed anyway**, that's perfectly fine — generate the documents with whatever you have. Use empty string for missing fields. Tell the user which fields were left blank so they can fill them in by hand later.
+3. **If the user says they don't have certain details or wants to proceed anyway**, that's perfectly fine — {DOCUMENT_BLANKS}. The tool reports which fields were left blank; tell the user so they can fill them in by hand later.
 
 4. **After generating**, tell the user:
    - Their 5 documents are ready for download
@@ -163,29 +230,17 @@ Before generating documents, review what details you already have from the conve
    - That the affidavit MUST be printed, signed, and **notarized** before filing
    - Briefly explain the **next steps**: file at the appropriate Consumer Forum (District / State / National based on claim amount), pay the prescribed fee, and attach supporting evidence
 
-5. **If the user asks to regenerate** with updated details, do so immediately.
+5. **If the user asks to regenerate** with updated details, {DOCUMENT_REGENERATE}.
 
----
+"""
 
-### Email Capabilities
+PROMPT_EMAIL = f"""### Email Capabilities
 
 You have the following tools for email:
 - `create_gmail_draft`: Creates a draft complaint email in Gmail for user review before sending.
   - **message** — full body of the formal email
-  - **to** — list of recipient email addresses
+  - **to** — {EMAIL_TO}
   - **subject** — email subject line
-- `search_gmail`: Search the user's Gmail inbox. Returns matching emails with full body text.
-  - **query** — A Gmail search query string. Use Gmail search operators:
-    - `from:amazon` — emails from a sender
-    - `to:user@example.com` — emails to a recipient
-    - `subject:refund` — by subject
-    - `newer_than:1d` — within last N days (d=day, m=month, y=year)
-    - `older_than:7d` — older than N days
-    - `after:2025/01/15` — after a date
-    - Combine filters: `from:amazon newer_than:7d`
-  - **max_results** — number of results (default 10)
-- `get_gmail_message`: Read the full content of a specific email by its message ID (from a previous search result).
-  - **message_id** — the email ID returned by `search_gmail`
 - `get_case_emails_history`: Check all emails (drafts, sent, failed) for this case from our records.
 
 **Email — HOW TO GUIDE THE USER:**
@@ -196,7 +251,7 @@ After the user has understood their complaint (or after documents are generated)
 
 2. **Ask for the opposite party's email address**: "Do you have the company's customer care or grievance email address? For example, for Amazon India it's typically grievance-officer@amazon.in." NEVER guess email addresses — always ask.
 
-3. **Draft the email**: Once you have the email address, call `create_gmail_draft` with a formal legal notice that:
+3. **Draft the email**: Once you have the email address, call `create_gmail_draft` with a formal legal notice — built from the case facts on file — that:
    - Is addressed to the company by name
    - States the complainant's details
    - Describes the issue clearly
@@ -209,6 +264,24 @@ After the user has understood their complaint (or after documents are generated)
 
 5. **Offer to check for replies later**: "After sending, you can come back and ask me to check if they've replied. I can search your inbox for their response."
 
+"""
+
+PROMPT_INBOX = """### Inbox Capabilities
+
+You have the following tools for reading the user's Gmail:
+- `search_gmail`: Search the user's Gmail inbox. Returns matching emails with full body text.
+  - **query** — A Gmail search query string. Use Gmail search operators:
+    - `from:amazon` — emails from a sender
+    - `to:user@example.com` — emails to a recipient
+    - `subject:refund` — by subject
+    - `newer_than:1d` — within last N days (d=day, m=month, y=year)
+    - `older_than:7d` — older than N days
+    - `after:2025/01/15` — after a date
+    - Combine filters: `from:amazon newer_than:7d`
+  - **max_results** — number of results (default 10)
+- `get_gmail_message`: Read the full content of a specific email by its message ID (from a previous search result).
+  - **message_id** — the email ID returned by `search_gmail`
+
 **Email reading rules:**
 - When the user asks to check their email for replies / updates, **immediately call `search_gmail`** — do NOT ask for clarification if the request is clear.
 - Construct a targeted Gmail query using the filters above.
@@ -216,9 +289,9 @@ After the user has understood their complaint (or after documents are generated)
 - If you need to read a specific email in full, use `get_gmail_message` with the message ID.
 - If no results are found, tell the user clearly and suggest broadening the search window or waiting a few more days.
 
----
+"""
 
-### After Everything — Next Steps Guidance
+PROMPT_NEXT_STEPS = """### After Everything — Next Steps Guidance
 
 Once documents are generated and legal notice is sent, proactively advise the user on how to proceed:
 1. **Wait 15-30 days** for the company to respond to the legal notice
@@ -231,6 +304,18 @@ Once documents are generated and legal notice is sent, proactively advise the us
 5. Offer to help with anything else — checking email replies, regenerating documents, etc.
 """
 
+# Each stage sends only some sections (see stages.py); the full prompt is
+# used when stage-aware prompting is off
+PROMPT_SECTIONS = {
+    "core": PROMPT_CORE,
+    "documents": PROMPT_DOCUMENTS,
+    "email": PROMPT_EMAIL,
+    "inbox": PROMPT_INBOX,
+    "next_steps": PROMPT_NEXT_STEPS,
+}
+
+SYSTEM_PROMPT = "---\n\n".join(PROMPT_SECTIONS.values())
+
 
 # ---------------------------------------------------------------------------
 # Custom tool: case email history  (placeholder — executed manually in chat())
@@ -266,14 +351,14 @@ def generate_filing_documents(
     date_of_deficiency: str = "",
     grievance_description: str = "",
     relief_sought: str = "",
-    forum_name: str = "District Consumer Disputes Redressal Forum",
+    forum_name: str = "",
     state: str = "",
     district: str = "",
 ) -> str:
     """Generate 5 mandatory consumer complaint filing documents (Index, Proforma,
     Affidavit, Memo of Parties, List of Dates & Events) as PDFs auto-filled with
-    the case details gathered during the conversation. Call this when the user asks
-    to generate, prepare, or create filing documents."""
+    the case details. Call this when the user asks to generate, prepare, or
+    create filing documents. Which fields to pass is described in the system prompt."""
     return ""  # Placeholder — actual execution happens in chat()
 
 
@@ -288,19 +373,18 @@ class ChatService:
         self.supabase = _get_supabase()
         self.llm = None
         self.llm_with_tools = None
+        self.tools: list = []
+        self.stage_aware = CHAT_STAGE_AWARE
+        self._stage_calls: Dict[str, tuple] = {}
         if GOOGLE_API_KEY:
-            self.llm = ChatGoogleGenerativeAI(
-                model=LLM_MODEL,
-                google_api_key=GOOGLE_API_KEY,
-                temperature=0.7,
-                max_output_tokens=2048,
-            )
+            self.llm = llm_clients.get(LLM_MODEL, temperature=0.7, max_output_tokens=2048)
             # Combine Gmail toolkit tools + our custom tools
             gmail_tools = email_service.get_tools_for_llm()
             all_tools = gmail_tools + [get_case_emails_history, generate_filing_documents]
             if all_tools:
                 try:
                     self.llm_with_tools = self.llm.bind_tools(all_tools)
+                    self.tools = all_tools
                 except Exception as e:
                     print(f"⚠️ [ChatService] Could not bind tools: {e}")
 
@@ -327,6 +411,8 @@ class ChatService:
             }).execute()
             if result.data:
                 case_id = result.data[0]["id"]
+                case_cache.put_case(result.data[0])
+                case_cache.set_messages(case_id, [])
                 print(f"✅ [ChatService] Created case {case_id}")
                 return case_id
         except Exception as e:
@@ -336,6 +422,9 @@ class ChatService:
 
     def get_case(self, case_id: str) -> Optional[dict]:
         """Fetch a case by ID."""
+        cached = case_cache.get_case(case_id)
+        if cached is not None:
+            return cached
         if not self.supabase:
             return None
         try:
@@ -346,6 +435,7 @@ class ChatService:
                 .single()
                 .execute()
             )
+            case_cache.put_case(result.data)
             return result.data
         except Exception:
             return None
@@ -362,6 +452,8 @@ class ChatService:
                 .order("created_at", desc=True)
                 .execute()
             )
+            for row in result.data or []:
+                case_cache.put_case(row)
             return result.data or []
         except Exception:
             return []
@@ -378,23 +470,35 @@ class ChatService:
         metadata: Optional[dict] = None,
     ) -> Optional[str]:
         """Insert a message row and return its id."""
-        if not self.supabase:
-            return None
-        try:
-            result = self.supabase.table("case_messages").insert({
-                "case_id": case_id,
-                "role": role,
-                "content": content,
-                "metadata": metadata or {},
-            }).execute()
-            if result.data:
-                return result.data[0]["id"]
-        except Exception as e:
-            print(f"❌ [ChatService] save_message error: {e}")
-        return None
+        ids = self.save_messages(case_id, [{"role": role, "content": content, "metadata": metadata}])
+        return ids[0] if ids else None
+
+    def save_messages(self, case_id: str, messages: List[dict]) -> List[str]:
+        """
+        Insert several message rows ({role, content, metadata, created_at}) and
+        return their ids. Rows go through the write-behind queue when it has
+        room, otherwise they are inserted here in one request.
+        """
+        if not self.supabase or not messages:
+            return []
+        rows = [
+            {"id": str(uuid.uuid4()), "case_id": case_id, "created_at": _now_iso(), **m, "metadata": m.get("metadata") or {}}
+            for m in messages
+        ]
+        if not write_behind.submit("case_messages", rows):
+            try:
+                self.supabase.table("case_messages").insert(rows).execute()
+            except Exception as e:
+                print(f"❌ [ChatService] save_messages error: {e}")
+                return []
+        case_cache.append_messages(case_id, [_message_row(r) for r in rows])
+        return [r["id"] for r in rows]
 
     def get_messages(self, case_id: str) -> List[dict]:
         """Load all messages for a case in chronological order."""
+        cached = case_cache.get_messages(case_id)
+        if cached is not None:
+            return cached
         if not self.supabase:
             return []
         try:
@@ -405,7 +509,15 @@ class ChatService:
                 .order("created_at", desc=False)
                 .execute()
             )
-            return result.data or []
+            rows = result.data or []
+            # Read-your-writes: rows still waiting in the write-behind queue
+            known = {r["id"] for r in rows}
+            rows += [
+                _message_row(r) for r in write_behind.pending_rows("case_messages", case_id=case_id)
+                if r["id"] not in known
+            ]
+            case_cache.set_messages(case_id, rows)
+            return rows
         except Exception as e:
             print(f"❌ [ChatService] get_messages error: {e}")
             return []
@@ -453,13 +565,229 @@ class ChatService:
         except Exception:
             return []
 
+    # ------------------------------------------------------------------
+    # Async persistence — same API, offloaded to the "io" pool
+    # ------------------------------------------------------------------
+
+    async def acreate_case(self, user_id: str, case_name: str = "New Consumer Complaint") -> Optional[str]:
+        return await run_blocking(self.create_case, user_id, case_name)
+
+    async def aget_case(self, case_id: str) -> Optional[dict]:
+        return await run_blocking(self.get_case, case_id)
+
+    async def alist_user_cases(self, user_id: str) -> List[dict]:
+        return await run_blocking(self.list_user_cases, user_id)
+
+    async def asave_message(
+        self,
+        case_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[dict] = None,
+    ) -> Optional[str]:
+        return await run_blocking(self.save_message, case_id, role, content, metadata)
+
+    async def asave_messages(self, case_id: str, messages: List[dict]) -> List[str]:
+        return await run_blocking(self.save_messages, case_id, messages)
+
+    async def aget_messages(self, case_id: str) -> List[dict]:
+        return await run_blocking(self.get_messages, case_id)
+
+    async def asave_voice_transcript(
+        self,
+        case_id: str,
+        original_transcript: str,
+        english_translation: Optional[str] = None,
+        language_code: Optional[str] = None,
+    ) -> Optional[str]:
+        return await run_blocking(
+            self.save_voice_transcript, case_id, original_transcript, english_translation, language_code
+        )
+
+    async def aget_voice_transcripts(self, case_id: str) -> List[dict]:
+        return await run_blocking(self.get_voice_transcripts, case_id)
+
+    # ------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------
+
+    async def _execute_tool(
+        self,
+        case_id: str,
+        tc: dict,
+        emit: Callable[[str, dict], None],
+    ) -> ToolOutcome:
+        """Run one tool call from the model; blocking work goes to the "tools" pool."""
+        tool_name = tc["name"]
+        args = tc["args"]
+        email_draft = None
+        document_pack = None
+
+        if tool_name == "create_gmail_draft":
+            # Recipient defaults to the opposite party's address the user gave
+            # (case_facts only stores addresses that appear in user messages)
+            if not args.get("to"):
+                op_email = (await case_facts.aget(case_id)).get("op_email")
+                if op_email:
+                    args = {**args, "to": [op_email]}
+            # Execute the real Gmail tool
+            gmail_tool = email_service.get_tool_by_name("create_gmail_draft")
+            if gmail_tool:
+                tool_result = await run_blocking(gmail_tool.invoke, args, pool="tools")
+            else:
+                tool_result = "Gmail not configured — draft not created in Gmail."
+
+            # Parse Gmail draft ID & persist to Supabase
+            gmail_draft_id = EmailService.parse_draft_id(str(tool_result))
+            to_list = args.get("to", [])
+            to_email = to_list[0] if isinstance(to_list, list) and to_list else str(to_list)
+            draft_row = await email_service.asave_draft_record(
+                case_id=case_id,
+                to_email=to_email,
+                subject=args.get("subject", ""),
+                body=args.get("message", ""),
+                gmail_draft_id=gmail_draft_id,
+            )
+            if draft_row:
+                email_draft = {
+                    "id": draft_row["id"],
+                    "to_email": draft_row["to_email"],
+                    "subject": draft_row["subject"],
+                    "body": draft_row["body"],
+                    "status": draft_row["status"],
+                }
+                emit("email_draft", email_draft)
+            message = ToolMessage(
+                content=str(tool_result),
+                tool_call_id=tc["id"],
+            )
+
+        elif tool_name == "search_gmail":
+            gmail_tool = email_service.get_tool_by_name("search_gmail")
+            if gmail_tool:
+                tool_result = await run_blocking(gmail_tool.invoke, args, pool="tools")
+                print(f"🔍 [ChatService] search_gmail query={args.get('query','')} → {len(str(tool_result))} chars")
+            else:
+                tool_result = "Gmail not configured."
+            message = ToolMessage(
+                content=str(tool_result),
+                tool_call_id=tc["id"],
+            )
+
+        elif tool_name == "get_gmail_message":
+            gmail_tool = email_service.get_tool_by_name("get_gmail_message")
+            if gmail_tool:
+                tool_result = await run_blocking(gmail_tool.invoke, args, pool="tools")
+                print(f"📧 [ChatService] get_gmail_message id={args.get('message_id','')}")
+            else:
+                tool_result = "Gmail not configured."
+            message = ToolMessage(
+                content=str(tool_result),
+                tool_call_id=tc["id"],
+            )
+
+        elif tool_name == "get_case_emails_history":
+            rows = await email_service.aget_case_emails(case_id)
+            summary = json.dumps([
+                {"to": r["to_email"], "subject": r["subject"],
+                 "status": r["status"], "sent_at": r.get("sent_at")}
+                for r in rows
+            ]) if rows else "[]"
+            message = ToolMessage(
+                content=summary,
+                tool_call_id=tc["id"],
+            )
+
+        elif tool_name == "generate_filing_documents":
+            # Case facts on file, plus whatever the user just gave or corrected
+            facts = await case_facts.amerge(case_id, args)
+            form_data = facts_form_data(facts)
+            blank = missing_fields(facts)
+            try:
+                docs = await run_blocking(_render_filing_documents, form_data, pool="tools")
+                safe_name = "".join(
+                    c if c.isalnum() or c in " _-" else ""
+                    for c in form_data.get("complainantName", "case")
+                ).strip() or "case"
+                year = form_data.get("complaintYear", str(datetime.now().year))
+                doc_names = {
+                    "index":           f"Index_{safe_name}_{year}.pdf",
+                    "proforma":        f"Proforma_{safe_name}_{year}.pdf",
+                    "affidavit":       f"Affidavit_{safe_name}_{year}.pdf",
+                    "memo_of_parties": f"MemoOfParties_{safe_name}_{year}.pdf",
+                    "list_of_dates":   f"ListOfDates_{safe_name}_{year}.pdf",
+                }
+                document_pack = {
+                    "documents": docs,
+                    "document_names": doc_names,
+                }
+                emit("documents", {"document_names": doc_names})
+                tool_result = "Successfully generated 5 filing documents: Index, Proforma, Affidavit, Memo of Parties, and List of Dates & Events."
+                if blank:
+                    tool_result += f" Fields left blank: {', '.join(blank)}."
+                print(f"📄 [ChatService] Generated 5 filing documents for {safe_name}")
+            except Exception as doc_err:
+                tool_result = f"Error generating documents: {str(doc_err)}"
+                print(f"❌ [ChatService] Document generation error: {doc_err}")
+
+            message = ToolMessage(
+                content=tool_result,
+                tool_call_id=tc["id"],
+            )
+
+        else:
+            # Unknown tool — feed empty result
+            message = ToolMessage(
+                content="Tool not recognised.",
+                tool_call_id=tc["id"],
+            )
+        return ToolOutcome(message, email_draft, document_pack)
+
+    async def _run_tool(
+        self,
+        case_id: str,
+        tc: dict,
+        emit: Callable[[str, dict], None],
+    ) -> ToolOutcome:
+        """
+        _execute_tool() under the tool's timeout. A timeout or error becomes
+        the tool's result message so the model can tell the user; a timed-out
+        blocking call finishes in the background and its result is dropped.
+        """
+        tool_name = tc["name"]
+        timeout = CHAT_TOOL_TIMEOUTS.get(tool_name, CHAT_TOOL_TIMEOUT_SECONDS)
+        emit("tool_call", {"name": tool_name, "status": "started"})
+        started = time.perf_counter()
+        status = "completed"
+        try:
+            outcome = await asyncio.wait_for(self._execute_tool(case_id, tc, emit), timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            metrics.incr("chat.tool_timeouts", tool=tool_name)
+            print(f"⚠️ [ChatService] Tool {tool_name} timed out after {timeout:g}s")
+            outcome = ToolOutcome(ToolMessage(
+                content=f"The {tool_name} tool timed out after {timeout:g} seconds.",
+                tool_call_id=tc["id"],
+            ))
+        except Exception as e:
+            status = "failed"
+            metrics.incr("chat.tool_errors", tool=tool_name)
+            print(f"❌ [ChatService] Tool {tool_name} failed: {e}")
+            outcome = ToolOutcome(ToolMessage(
+                content=f"The {tool_name} tool failed: {e}",
+                tool_call_id=tc["id"],
+            ))
+        metrics.observe("chat.tool_seconds", time.perf_counter() - started, tool=tool_name)
+        emit("tool_call", {"name": tool_name, "status": status})
+        return outcome
+
     # ------------------------------------------------------------------
     # LLM conversation
     # ------------------------------------------------------------------
 
     def _build_langchain_messages(self, db_messages: List[dict]) -> list:
-        """Convert DB rows to LangChain message objects."""
-        lc_messages = [SystemMessage(content=SYSTEM_PROMPT)]
+        """Convert DB rows to LangChain message objects (SYSTEM_PROMPT excluded)."""
+        lc_messages = []
         for m in db_messages:
             if m["role"] == "user":
                 lc_messages.append(HumanMessage(content=m["content"]))
@@ -469,39 +797,173 @@ class ChatService:
                 lc_messages.append(SystemMessage(content=m["content"]))
         return lc_messages
 
+    def _llm_call(self, stage: Optional[str]) -> tuple:
+        """(system messages, tools, fallback runnable) for a stage; None = full prompt, all tools."""
+        if stage is None:
+            return [SystemMessage(content=SYSTEM_PROMPT)], self.tools or None, self.llm_with_tools or self.llm
+        call = self._stage_calls.get(stage)
+        if call is None:
+            tools = stage_tools(stage, self.tools)
+            fallback = self.llm
+            if tools:
+                try:
+                    fallback = self.llm.bind_tools(tools)
+                except Exception as e:
+                    print(f"⚠️ [ChatService] Could not bind tools for stage {stage}: {e}")
+                    tools = []
+            call = ([SystemMessage(content=stage_prompt(stage, PROMPT_SECTIONS))], tools or None, fallback)
+            self._stage_calls[stage] = call
+        return call
+
+    async def _invoke_llm(self, lc_messages: list, stage: Optional[str] = None):
+        """Call the model with the stage's system prompt (and tools) as a cached static prefix."""
+        system, tools, fallback = self._llm_call(stage)
+        return await llm_hedger.ainvoke("chat", lambda: llm_gateway.ainvoke(
+            self.llm,
+            system,
+            lc_messages,
+            tools=tools,
+            fallback_llm=fallback,
+        ))
+
+    async def _stream_llm(
+        self,
+        lc_messages: list,
+        on_event: Callable[[str, dict], None],
+        stage: Optional[str] = None,
+    ):
+        """Streaming _invoke_llm(): emits "token" events and returns the merged message."""
+        system, tools, fallback = self._llm_call(stage)
+        response = None
+        async for chunk in llm_hedger.astream("chat", lambda: llm_gateway.astream(
+            self.llm,
+            system,
+            lc_messages,
+            tools=tools,
+            fallback_llm=fallback,
+        )):
+            # Chunks add up to one AIMessageChunk, tool calls included
+            response = chunk if response is None else response + chunk
+            text = _extract_text(chunk.content)
+            if text:
+                on_event("token", {"text": text})
+        return response if response is not None else AIMessage(content="")
+
     async def chat(
         self,
         case_id: str,
         user_message: str,
         metadata: Optional[dict] = None,
+        on_event: Optional[Callable[[str, dict], None]] = None,
+        stream_tokens: bool = False,
     ) -> Tuple[Optional[str], Optional[dict], Optional[dict], Optional[str]]:
         """
-        Process a user message:
-          1. Save user message
-          2. Load full history
+        Process a user message once the case's previous turn has finished
+        (see turns.py). With CHAT_COALESCE_MESSAGES on, messages sent while
+        a turn is running are answered together, and each sender receives
+        that shared result.
+        """
+        request = TurnRequest(
+            content=user_message,
+            metadata=metadata or {},
+            on_event=on_event,
+            stream_tokens=stream_tokens,
+            created_at=_now_iso(),
+        )
+        return await case_turns.run(case_id, request, self._chat_turn)
+
+    async def _chat_turn(
+        self,
+        case_id: str,
+        batch: List[TurnRequest],
+    ) -> Tuple[Optional[str], Optional[dict], Optional[dict], Optional[str]]:
+        """
+        Run one turn for one or more queued user messages:
+          0. A single generic question opening a case, with a curated
+             answer (faq.py), is answered from the bank without an LLM call
+          1. Stage the user messages (written together with the reply)
+          2. Load the history window (recent turns + running summary) and case facts
           3. Call LLM with tool-enabled model
           4. If tool call → execute, feed result back, get text reply
-          5. Save assistant response
+          5. Save user + assistant messages in one insert, refresh the summary
+             and extract case facts in the background
           6. Return (assistant_reply, email_draft, document_pack, error)
+
+        With a warm case_cache a turn makes no DB reads and one write.
+
+        on_event(event, data) receives "stage" {stage, tools} first, then
+        "tool_call" {name, status},
+        "email_draft" and "documents" {document_names} as tools run, and
+        "token" {text} for each model chunk when stream_tokens is set. If the
+        turn is cancelled (client gone), the user messages are still saved.
+        Events go to every sender in the batch.
         """
+        listeners = [r.on_event for r in batch if r.on_event]
+
+        def emit(event: str, data: dict) -> None:
+            for listener in listeners:
+                listener(event, data)
+
+        stream_tokens = any(r.stream_tokens for r in batch)
+
+        # 1. Stage user messages
+        user_rows = [
+            {"role": "user", "content": r.content, "metadata": r.metadata, "created_at": r.created_at}
+            for r in batch
+        ]
+
+        # 0. Generic opening questions with a curated answer skip the model entirely
+        faq = None
+        if faq_bank.enabled and len(batch) == 1 and not batch[0].metadata:
+            if faq_eligible(await self.aget_messages(case_id)):
+                faq = faq_bank.match(batch[0].content)
+        if faq is not None:
+            reply = faq.entry.reply
+            print(f"✅ [ChatService] FAQ hit '{faq.entry.id}' (score={faq.score}) for case {case_id}")
+            await self.asave_messages(case_id, user_rows + [{
+                "role": "assistant",
+                "content": reply,
+                "metadata": {"faq": {"id": faq.entry.id, "version": faq.version, "score": faq.score}},
+                "created_at": _now_iso(),
+            }])
+            if stream_tokens:
+                emit("token", {"text": reply})
+            return reply, None, None, None
+
         if not self.llm:
             return None, None, None, "LLM not configured (GOOGLE_API_KEY missing)"
 
-        # 1. Save user message
-        self.save_message(case_id, "user", user_message, metadata)
-
-        # 2. Load full history
-        db_messages = self.get_messages(case_id)
-        lc_messages = self._build_langchain_messages(db_messages)
+        # 2. Load the history window
+        db_messages, summary, facts = await asyncio.gather(
+            self.aget_messages(case_id), chat_history.aget_summary(case_id), case_facts.aget(case_id)
+        )
+        db_messages = db_messages + user_rows
+        window = chat_history.window(db_messages, summary)
+        lc_messages = chat_history.build_messages(window, self._build_langchain_messages)
+        if case_facts.enabled:
+            lc_messages.insert(0, HumanMessage(content=facts_note(facts)))
+
+        # Only the current stage's prompt sections and tools (stages.py)
+        stage = detect_stage(db_messages, facts) if self.stage_aware else None
+        system, tools, _ = self._llm_call(stage)
+        metrics.observe(
+            "chat.system_prompt_tokens", estimate_tokens(system[0].content), stage=stage or "full"
+        )
+        if stage:
+            emit("stage", {"stage": stage, "tools": [t.name for t in tools or []]})
+
+        def call_llm(msgs: list):
+            if stream_tokens:
+                return self._stream_llm(msgs, emit, stage)
+            return self._invoke_llm(msgs, stage)
 
         # 3. Call LLM (with tools bound) — loop to support multi-step tool use
         email_draft = None
         document_pack = None
         MAX_TOOL_ROUNDS = 5  # safety limit
         try:
-            active_llm = self.llm_with_tools or self.llm
-            print(f"🤖 [ChatService] Invoking LLM with {len(lc_messages)} messages, tools_bound={self.llm_with_tools is not None}")
-            response = await active_llm.ainvoke(lc_messages)
+            print(f"🤖 [ChatService] Invoking LLM with {len(lc_messages) + 1} messages, stage={stage or 'full'}, tools={len(tools or [])}")
+            response = await call_llm(lc_messages)
             print(f"🤖 [ChatService] LLM response: content_len={len(str(response.content))}, tool_calls={len(response.tool_calls) if hasattr(response, 'tool_calls') and response.tool_calls else 0}")
             print(f"🤖 [ChatService] Response content preview: {str(response.content)[:200]}")
 
@@ -511,175 +973,57 @@ class ChatService:
                 # Append the AI message (carries the tool-call metadata)
                 lc_messages.append(response)
 
-                for tc in response.tool_calls:
-                    tool_name = tc["name"]
-                    args = tc["args"]
-
-                    if tool_name == "create_gmail_draft":
-                        # Execute the real Gmail tool
-                        gmail_tool = email_service.get_tool_by_name("create_gmail_draft")
-                        if gmail_tool:
-                            tool_result = gmail_tool.invoke(args)
-                        else:
-                            tool_result = "Gmail not configured — draft not created in Gmail."
-
-                        # Parse Gmail draft ID & persist to Supabase
-                        gmail_draft_id = EmailService.parse_draft_id(str(tool_result))
-                        to_list = args.get("to", [])
-                        to_email = to_list[0] if isinstance(to_list, list) and to_list else str(to_list)
-                        draft_row = email_service.save_draft_record(
-                            case_id=case_id,
-                            to_email=to_email,
-                            subject=args.get("subject", ""),
-                            body=args.get("message", ""),
-                            gmail_draft_id=gmail_draft_id,
-                        )
-                        if draft_row:
-                            email_draft = {
-                                "id": draft_row["id"],
-                                "to_email": draft_row["to_email"],
-                                "subject": draft_row["subject"],
-                                "body": draft_row["body"],
-                                "status": draft_row["status"],
-                            }
-                        lc_messages.append(ToolMessage(
-                            content=str(tool_result),
-                            tool_call_id=tc["id"],
-                        ))
-
-                    elif tool_name == "search_gmail":
-                        gmail_tool = email_service.get_tool_by_name("search_gmail")
-                        if gmail_tool:
-                            tool_result = gmail_tool.invoke(args)
-                            print(f"🔍 [ChatService] search_gmail query={args.get('query','')} → {len(str(tool_result))} chars")
-                        else:
-                            tool_result = "Gmail not configured."
-                        lc_messages.append(ToolMessage(
-                            content=str(tool_result),
-                            tool_call_id=tc["id"],
-                        ))
-
-                    elif tool_name == "get_gmail_message":
-                        gmail_tool = email_service.get_tool_by_name("get_gmail_message")
-                        if gmail_tool:
-                            tool_result = gmail_tool.invoke(args)
-                            print(f"📧 [ChatService] get_gmail_message id={args.get('message_id','')}")
-                        else:
-                            tool_result = "Gmail not configured."
-                        lc_messages.append(ToolMessage(
-                            content=str(tool_result),
-                            tool_call_id=tc["id"],
-                        ))
-
-                    elif tool_name == "get_case_emails_history":
-                        rows = email_service.get_case_emails(case_id)
-                        summary = json.dumps([
-                            {"to": r["to_email"], "subject": r["subject"],
-                             "status": r["status"], "sent_at": r.get("sent_at")}
-                            for r in rows
-                        ]) if rows else "[]"
-                        lc_messages.append(ToolMessage(
-                            content=summary,
-                            tool_call_id=tc["id"],
-                        ))
-
-                    elif tool_name == "generate_filing_documents":
-                        # Build form_data dict from tool call args
-                        form_data = {
-                            "complainantName": args.get("complainant_name", ""),
-                            "complainantFatherHusbandName": args.get("complainant_father_husband_name", ""),
-                            "complainantAge": args.get("complainant_age", ""),
-                            "complainantOccupation": args.get("complainant_occupation", ""),
-                            "complainantAddress": args.get("complainant_address", ""),
-                            "complainantPhone": args.get("complainant_phone", ""),
-                            "complainantEmail": args.get("complainant_email", ""),
-                            "opName": args.get("op_name", ""),
-                            "opAddress": args.get("op_address", ""),
-                            "opPhone": args.get("op_phone", ""),
-                            "caseCategory": args.get("case_category", ""),
-                            "subCategory": args.get("sub_category", ""),
-                            "productServiceDescription": args.get("product_service_description", ""),
-                            "purchaseDate": args.get("purchase_date", ""),
-                            "purchaseAmount": args.get("purchase_amount", ""),
-                            "paidAsConsideration": args.get("purchase_amount", ""),
-                            "paymentMode": args.get("payment_mode", ""),
-                            "invoiceNumber": args.get("invoice_number", ""),
-                            "deficiencyType": args.get("deficiency_type", ""),
-                            "dateOfDeficiency": args.get("date_of_deficiency", ""),
-                            "grievanceDescription": args.get("grievance_description", ""),
-                            "reliefSought": args.get("relief_sought", ""),
-                            "forumName": args.get("forum_name", "District Consumer Disputes Redressal Forum"),
-                            "stateOfCauseOfAction": args.get("state", ""),
-                            "districtOfCauseOfAction": args.get("district", ""),
-                            "complaintYear": str(datetime.now().year),
-                        }
-                        try:
-                            docs = {
-                                "index":           generate_index(form_data),
-                                "proforma":        generate_proforma(form_data),
-                                "affidavit":       generate_affidavit(form_data),
-                                "memo_of_parties": generate_memo_of_parties(form_data),
-                                "list_of_dates":   generate_list_of_dates(form_data),
-                            }
-                            safe_name = "".join(
-                                c if c.isalnum() or c in " _-" else ""
-                                for c in form_data.get("complainantName", "case")
-                            ).strip() or "case"
-                            year = form_data.get("complaintYear", str(datetime.now().year))
-                            doc_names = {
-                                "index":           f"Index_{safe_name}_{year}.pdf",
-                                "proforma":        f"Proforma_{safe_name}_{year}.pdf",
-                                "affidavit":       f"Affidavit_{safe_name}_{year}.pdf",
-                                "memo_of_parties": f"MemoOfParties_{safe_name}_{year}.pdf",
-                                "list_of_dates":   f"ListOfDates_{safe_name}_{year}.pdf",
-                            }
-                            document_pack = {
-                                "documents": docs,
-                                "document_names": doc_names,
-                            }
-                            tool_result = "Successfully generated 5 filing documents: Index, Proforma, Affidavit, Memo of Parties, and List of Dates & Events."
-                            print(f"📄 [ChatService] Generated 5 filing documents for {safe_name}")
-                        except Exception as doc_err:
-                            tool_result = f"Error generating documents: {str(doc_err)}"
-                            print(f"❌ [ChatService] Document generation error: {doc_err}")
-
-                        lc_messages.append(ToolMessage(
-                            content=tool_result,
-                            tool_call_id=tc["id"],
-                        ))
-
-                    else:
-                        # Unknown tool — feed empty result
-                        lc_messages.append(ToolMessage(
-                            content="Tool not recognised.",
-                            tool_call_id=tc["id"],
-                        ))
+                # Independent calls run concurrently; results keep the call order
+                outcomes = await asyncio.gather(*(
+                    self._run_tool(case_id, tc, emit) for tc in response.tool_calls
+                ))
+                for outcome in outcomes:
+                    lc_messages.append(outcome.message)
+                    email_draft = outcome.email_draft or email_draft
+                    document_pack = outcome.document_pack or document_pack
 
                 # Call LLM again — it may produce more tool calls or a text reply
-                response = await active_llm.ainvoke(lc_messages)
+                response = await call_llm(lc_messages)
 
             # Final response is now a text reply (no more tool calls)
             assistant_reply = _extract_text(response.content)
             print(f"🤖 [ChatService] Final reply length={len(assistant_reply)}, preview='{assistant_reply[:200]}'")
 
+        except asyncio.CancelledError:
+            metrics.incr("chat.cancelled")
+            print(f"⚠️ [ChatService] Turn for case {case_id} cancelled; saving the user messages only")
+            await asyncio.shield(self.asave_messages(case_id, user_rows))
+            raise
         except Exception as e:
             print(f"❌ [ChatService] LLM error: {e}")
             traceback.print_exc()
+            await self.asave_messages(case_id, user_rows)
             return None, None, None, f"LLM error: {str(e)}"
 
-        # 5. Save assistant response (with email draft ref in metadata)
+        # 5. Save user message and assistant response (with email draft ref in metadata)
         msg_meta = {}
         if email_draft:
             msg_meta["email_draft"] = email_draft
         if document_pack:
             # Store only the document_names in DB metadata (not the huge base64)
             msg_meta["document_pack"] = {"document_names": document_pack["document_names"]}
+        if len(batch) > 1:
+            msg_meta["coalesced_messages"] = len(batch)
+        if stage:
+            msg_meta["stage"] = stage
 
         # Only persist non-empty replies
+        turn_rows = list(user_rows)
         if assistant_reply and assistant_reply.strip():
-            self.save_message(case_id, "assistant", assistant_reply, msg_meta if msg_meta else None)
+            turn_rows.append({
+                "role": "assistant", "content": assistant_reply, "metadata": msg_meta, "created_at": _now_iso(),
+            })
         else:
             print("⚠️ [ChatService] Skipping save — empty assistant reply")
+        await self.asave_messages(case_id, turn_rows)
+        db_messages.extend(turn_rows[len(user_rows):])
+        chat_history.refresh(case_id, db_messages, window.summary)
+        case_facts.update(case_id, turn_rows)
 
         return assistant_reply, email_draft, document_pack, None
 
@@ -698,11 +1042,11 @@ class ChatService:
         """
         # Resolve case
         if case_id:
-            case = self.get_case(case_id)
+            case = await self.aget_case(case_id)
             if not case:
                 return None, None, None, None, f"Case {case_id} not found"
         else:
-            case_id = self.create_case(user_id)
+            case_id = await self.acreate_case(user_id)
             if not case_id:
                 return None, None, None, None, "Failed to create case"
 
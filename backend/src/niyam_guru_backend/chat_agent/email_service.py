@@ -5,23 +5,26 @@ Uses OAuth2 credentials (credentials.json / token.json) to interact with
 the Gmail API.  The LLM is only allowed to *draft* emails; actual sending
 is gated behind an explicit user approval step.
 
-All email activity is tracked in the `case_emails` Supabase table.
+All email activity is tracked in the `case_emails` Supabase table. Async
+callers use the a-prefixed twins, which run the blocking Supabase / Gmail
+calls on the "io" pool.
 """
 
 import re
 import traceback
+import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 
 from langchain_core.tools import BaseTool
-from supabase import Client, create_client
+from supabase import Client
 
 from ..config import (
-    SUPABASE_URL,
-    SUPABASE_KEY,
     GMAIL_CREDENTIALS_FILE,
     GMAIL_TOKEN_FILE,
 )
+from ..core import get_supabase, run_blocking, write_behind
+from .case_cache import case_cache
 
 
 # ---------------------------------------------------------------------------
@@ -29,12 +32,7 @@ from ..config import (
 # ---------------------------------------------------------------------------
 
 def _get_supabase() -> Optional[Client]:
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        return None
-    try:
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception:
-        return None
+    return get_supabase()
 
 
 # ---------------------------------------------------------------------------
@@ -115,18 +113,26 @@ class EmailService:
         """Persist an email draft record and return the full row."""
         if not self.supabase:
             return None
+        row = {
+            "id": str(uuid.uuid4()),
+            "case_id": case_id,
+            "direction": "outbound",
+            "from_email": "",
+            "to_email": to_email,
+            "subject": subject,
+            "body": body,
+            "status": "pending_review",
+            "metadata": {"gmail_draft_id": gmail_draft_id} if gmail_draft_id else {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if write_behind.submit("case_emails", [row]):
+            case_cache.upsert_email(row)
+            print(f"✅ [EmailService] Draft record queued: {row['id']}")
+            return row
         try:
-            result = self.supabase.table("case_emails").insert({
-                "case_id": case_id,
-                "direction": "outbound",
-                "from_email": "",
-                "to_email": to_email,
-                "subject": subject,
-                "body": body,
-                "status": "pending_review",
-                "metadata": {"gmail_draft_id": gmail_draft_id} if gmail_draft_id else {},
-            }).execute()
+            result = self.supabase.table("case_emails").insert(row).execute()
             if result.data:
+                case_cache.upsert_email(result.data[0])
                 print(f"✅ [EmailService] Draft record saved: {result.data[0]['id']}")
                 return result.data[0]
         except Exception as e:
@@ -136,6 +142,9 @@ class EmailService:
 
     def get_email(self, email_id: str) -> Optional[dict]:
         """Fetch a single email by ID."""
+        pending = write_behind.get_pending("case_emails", email_id)
+        if pending is not None:
+            return pending
         if not self.supabase:
             return None
         try:
@@ -154,6 +163,8 @@ class EmailService:
         """Update an email row."""
         if not self.supabase:
             return None
+        # The row must exist before it can be updated
+        write_behind.ensure_written("case_emails", email_id)
         try:
             result = (
                 self.supabase.table("case_emails")
@@ -162,6 +173,7 @@ class EmailService:
                 .execute()
             )
             if result.data:
+                case_cache.upsert_email(result.data[0])
                 return result.data[0]
         except Exception as e:
             print(f"❌ [EmailService] update_email error: {e}")
@@ -169,6 +181,9 @@ class EmailService:
 
     def get_case_emails(self, case_id: str) -> List[dict]:
         """Get all emails for a case, chronological."""
+        cached = case_cache.get_emails(case_id)
+        if cached is not None:
+            return cached
         if not self.supabase:
             return []
         try:
@@ -179,7 +194,11 @@ class EmailService:
                 .order("created_at", desc=False)
                 .execute()
             )
-            return result.data or []
+            rows = result.data or []
+            known = {r["id"] for r in rows}
+            rows += [r for r in write_behind.pending_rows("case_emails", case_id=case_id) if r["id"] not in known]
+            case_cache.set_emails(case_id, rows)
+            return rows
         except Exception:
             return []
 
@@ -230,6 +249,26 @@ class EmailService:
             self.update_email(email_id, {"status": "failed"})
             return False, f"Gmail send error: {str(e)}"
 
+    # ------------------------------------------------------------------
+    # Async variants — same API, offloaded to the "io" pool
+    # ------------------------------------------------------------------
+
+    async def asave_draft_record(
+        self,
+        case_id: str,
+        to_email: str,
+        subject: str,
+        body: str,
+        gmail_draft_id: Optional[str] = None,
+    ) -> Optional[dict]:
+        return await run_blocking(self.save_draft_record, case_id, to_email, subject, body, gmail_draft_id)
+
+    async def aget_case_emails(self, case_id: str) -> List[dict]:
+        return await run_blocking(self.get_case_emails, case_id)
+
+    async def aapprove_and_send(self, email_id: str) -> tuple[bool, str]:
+        return await run_blocking(self.approve_and_send, email_id)
+
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
@@ -0,0 +1,278 @@
+"""
+FAQ fast path for generic consumer-law questions.
+
+Many first messages are generic ("what is the limit for District
+Commission?", "how long do I have to file?") and used to take the full
+Gemini chat path. ChatService now checks short opening questions against a
+curated answer bank first (FAQ_BANK_PATH, JSON):
+
+    {"version": "...", "entries": [
+        {"id": "...", "questions": ["paraphrase", ...],
+         "answer": "markdown", "sections": ["34(1)", ...]}]}
+
+- grounding  every cited section must exist in the statute index built
+             from consumer_laws.csv; entries citing an unknown section are
+             dropped at load, and each answer ends with its sources
+- matching   TF-IDF cosine similarity between the message and each
+             entry's paraphrases (statute_index tokenisation, question
+             words removed, a few synonyms folded; words outside the
+             bank's vocabulary get the highest weight); a hit needs
+             FAQ_MATCH_THRESHOLD and a clear lead over the next entry.
+             Only short questions (at most FAQ_MAX_WORDS words, no digits)
+             are tried: narratives, amounts and dates describe a case,
+             which needs the full assistant
+- version    bank version + statute index version, recorded on every
+             answered message
+- checks     the bank's "checks" block lists questions that must (or must
+             not) match; they are replayed at load and failures logged
+
+Only the opening of a case is eligible: a message without metadata, in a
+case whose earlier replies (if any) were all FAQ answers. Once the user has
+started describing their problem, "is this a deficiency in service?" is
+about their case and goes to the full assistant.
+
+A hit is answered without an LLM call and stored as an assistant message
+like any other reply; hits and misses are counted in metrics.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import FAQ_ENABLED, FAQ_BANK_PATH, FAQ_MATCH_THRESHOLD, FAQ_MAX_WORDS
+from ..core import metrics
+from ..retrieval.statute_index import get_statute_index, tokenize
+
+
+# Words that make a message a question but say nothing about its topic
+_QUESTION_WORDS = frozenset({
+    "what", "how", "i", "do", "does", "can", "my", "me", "you", "we", "should",
+    "would", "please", "tell", "about", "there", "have", "has", "need", "get",
+    "if", "am", "was", "will", "much", "kindly", "know", "want",
+})
+
+_QUESTION_STARTS = frozenset({
+    "what", "whats", "how", "who", "when", "where", "which", "why", "can", "could",
+    "is", "are", "am", "do", "does", "should", "will", "tell", "explain", "define",
+})
+
+# A hit must beat the next-best entry by this much
+_MIN_MARGIN = 0.1
+
+_SYNONYMS = {
+    "forum": "commission",
+    "fora": "commission",
+    "court": "commission",
+    "ncdrc": "national",
+    "deadline": "time",
+    "period": "time",
+    "duration": "time",
+    "maximum": "limit",
+    "upto": "limit",
+    "jurisdiction": "limit",
+    "pecuniary": "limit",
+    "amount": "limit",
+    "deficient": "deficiency",
+    "defective": "defect",
+}
+
+
+def _is_generic_question(text: str, max_words: int) -> bool:
+    """A short question with no figures of its own (amounts and dates mean a specific case)."""
+    words = text.split()
+    if not words or len(words) > max_words or any(c.isdigit() for c in text):
+        return False
+    first = "".join(c for c in words[0].lower() if c.isalpha())
+    return text.rstrip().endswith("?") or first in _QUESTION_STARTS
+
+
+def _terms(text: str) -> List[str]:
+    terms = []
+    for token in tokenize(text):
+        if token in _QUESTION_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(_SYNONYMS.get(token, token))
+    return terms
+
+
+@dataclass
+class FAQEntry:
+    """One curated answer and the paraphrases it is matched on."""
+    id: str
+    questions: List[str]
+    answer: str
+    sections: List[str]
+    sources: str = ""
+    vectors: List[Dict[str, float]] = field(default_factory=list)
+
+    @property
+    def reply(self) -> str:
+        return f"{self.answer}\n\n{self.sources}"
+
+
+@dataclass
+class FAQMatch:
+    entry: FAQEntry
+    score: float
+    version: str
+
+
+def faq_eligible(db_messages: List[dict]) -> bool:
+    """True while a case holds nothing but FAQ exchanges (or nothing at all)."""
+    return all(
+        (m.get("metadata") or {}).get("faq")
+        for m in db_messages
+        if m.get("role") == "assistant"
+    ) and not any(m.get("role") == "user" and m.get("metadata") for m in db_messages)
+
+
+class FAQBank:
+    """Curated answer bank with lexical matching; see the module docstring."""
+
+    def __init__(
+        self,
+        path: str = FAQ_BANK_PATH,
+        enabled: bool = FAQ_ENABLED,
+        threshold: float = FAQ_MATCH_THRESHOLD,
+        max_words: int = FAQ_MAX_WORDS,
+    ):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_words = max_words
+        self.version = ""
+        self._entries: List[FAQEntry] = []
+        self._idf: Dict[str, float] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _vector(self, text: str) -> Dict[str, float]:
+        # Words the bank never uses weigh as much as its rarest word: they
+        # still count toward the norm, so one shared word is not a match
+        counts = Counter(_terms(text))
+        unknown = max(self._idf.values(), default=1.0)
+        vector = {t: n * self._idf.get(t, unknown) for t, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def load(self) -> None:
+        """Read the bank, check its citations against the statute index and build vectors."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                bank = json.loads(self.path.read_text(encoding="utf-8"))
+                index = get_statute_index()
+            except Exception as e:
+                print(f"⚠️ [FAQ] Could not load answer bank {self.path}, FAQ answers disabled: {e}")
+                return
+            entries = []
+            for raw in bank.get("entries", []):
+                cited = [index.get(s) for s in raw.get("sections", [])]
+                if not cited or any(s is None for s in cited):
+                    print(f"⚠️ [FAQ] Skipping '{raw.get('id')}': cites a section not in consumer_laws.csv")
+                    continue
+                sources = "; ".join(f"{s.identifier} — {s.title.rstrip('.')}" for s in cited)
+                entries.append(FAQEntry(
+                    id=raw["id"],
+                    questions=list(raw["questions"]),
+                    answer=raw["answer"],
+                    sections=list(raw["sections"]),
+                    sources=f"*Source: Consumer Protection Act, 2019 — {sources}. "
+                            "This is general information; tell me about your case for advice on it.*",
+                ))
+
+            documents = [set(_terms(q)) for e in entries for q in e.questions]
+            df = Counter(t for doc in documents for t in doc)
+            self._idf = {t: math.log((len(documents) + 1) / (n + 1)) + 1 for t, n in df.items()}
+            for entry in entries:
+                entry.vectors = [self._vector(q) for q in entry.questions]
+            self._entries = entries
+            self.version = f"{bank.get('version', 'unversioned')}+{index.version}"
+            self._check(bank.get("checks", {}))
+            print(f"✅ [FAQ] Answer bank {self.version} loaded ({len(entries)} entries)")
+
+    def _check(self, checks: dict) -> None:
+        """Warn about regression questions the matcher now answers wrongly."""
+        for question, expected in checks.get("match", {}).items():
+            hit = self._decide(question)
+            if hit is None or hit[0].id != expected:
+                print(f"⚠️ [FAQ] Check failed: '{question}' should match '{expected}', got {hit and hit[0].id}")
+        for question in checks.get("no_match", []):
+            hit = self._decide(question)
+            if hit is not None:
+                print(f"⚠️ [FAQ] Check failed: '{question}' should not match, got '{hit[0].id}'")
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def _best(self, text: str) -> Tuple[Optional[FAQEntry], float, float]:
+        """Best entry, its score and the runner-up entry's score."""
+        query = self._vector(text)
+        scores = []
+        for entry in self._entries:
+            score = max((sum(w * v.get(t, 0.0) for t, w in query.items()) for v in entry.vectors), default=0.0)
+            scores.append((score, entry))
+        scores.sort(key=lambda pair: pair[0], reverse=True)
+        if not scores or scores[0][0] <= 0:
+            return None, 0.0, 0.0
+        return scores[0][1], scores[0][0], scores[1][0] if len(scores) > 1 else 0.0
+
+    def _decide(self, text: str) -> Optional[Tuple[FAQEntry, float]]:
+        if not _is_generic_question(text, self.max_words):
+            return None
+        entry, score, runner_up = self._best(text)
+        # Close calls between two entries go to the full assistant
+        if entry is None or score < self.threshold or score - runner_up < _MIN_MARGIN:
+            return None
+        return entry, score
+
+    def match(self, text: str) -> Optional[FAQMatch]:
+        """The curated answer for a generic question, or None."""
+        if not self.enabled or not text or not _is_generic_question(text, self.max_words):
+            return None
+        self.load()
+        started = time.perf_counter()
+        hit = self._decide(text)
+        metrics.observe("chat.faq_match_seconds", time.perf_counter() - started)
+        if hit is None:
+            metrics.incr("chat.faq", outcome="miss")
+            return None
+        entry, score = hit
+        metrics.incr("chat.faq", outcome="hit")
+        metrics.incr("chat.faq_hits", entry=entry.id)
+        return FAQMatch(entry, round(score, 4), self.version)
+
+    def stats(self) -> dict:
+        hits = metrics.counter("chat.faq", outcome="hit")
+        misses = metrics.counter("chat.faq", outcome="miss")
+        return {
+            "enabled": self.enabled,
+            "version": self.version or None,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "hits_by_entry": {e.id: metrics.counter("chat.faq_hits", entry=e.id) for e in self._entries},
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+faq_bank = FAQBank()
@@ -0,0 +1,265 @@
+"""
+Windowed chat history with a rolling summary.
+
+chat() used to send every message of a case on every turn, so prompts (and
+latency) grew with the conversation. The prompt now carries:
+
+- summary  a running summary of everything before the window, stored on the
+           case row (user_cases.conversation_summary, with
+           summary_message_count = how many messages it covers)
+- window   the last CHAT_HISTORY_WINDOW_TURNS turns verbatim (a turn starts
+           at a user message)
+
+After each reply, refresh() folds the messages that have slid out of the
+window into the summary in a background task, once at least
+CHAT_SUMMARY_MIN_MESSAGES of them have accumulated. Messages between the
+summary and the window are sent verbatim until then, capped at
+CHAT_HISTORY_MAX_MESSAGES, so nothing is dropped while a refresh is pending.
+
+Summaries are also kept in process, so the steady state needs no extra
+read; the (cached) case row is consulted after a restart. With
+CHAT_SUMMARY_ENABLED=false the full history is sent, as before.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from ..config import (
+    CHAT_HISTORY_WINDOW_TURNS,
+    CHAT_HISTORY_MAX_MESSAGES,
+    CHAT_SUMMARY_ENABLED,
+    CHAT_SUMMARY_MIN_MESSAGES,
+    CHAT_SUMMARY_MODEL,
+)
+from ..core import get_supabase, metrics, run_blocking
+from ..llm import estimate_tokens, llm_clients, llm_hedger
+from .case_cache import case_cache
+
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation between a consumer and Niyam Guru, an assistant for Indian consumer complaints.
+
+Update the summary with the new messages below. Keep every concrete fact the assistant will need later:
+complainant details, opposite party, product/service, dates, amounts, order/invoice numbers, what went wrong,
+relief wanted, evidence mentioned, documents generated, emails drafted or sent, and open questions.
+Drop pleasantries and repetition. Write plain sentences or short bullets, at most 250 words, in English.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Respond with ONLY the updated summary."""
+
+
+@dataclass
+class SummaryState:
+    """Running summary of a case's first `message_count` messages."""
+    text: str = ""
+    message_count: int = 0
+
+
+@dataclass
+class HistoryWindow:
+    """What one turn sends to the model."""
+    summary: SummaryState
+    messages: List[dict] = field(default_factory=list)    # DB rows, chronological
+    start: int = 0                                        # index of messages[0] in the case history
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary.text) + sum(estimate_tokens(m.get("content") or "") for m in self.messages)
+
+
+def _window_start(db_messages: List[dict], turns: int) -> int:
+    """Index of the first message of the last `turns` turns."""
+    seen = 0
+    for i in range(len(db_messages) - 1, -1, -1):
+        if db_messages[i].get("role") == "user":
+            seen += 1
+            if seen == turns:
+                return i
+    return 0
+
+
+class ChatHistoryManager:
+    """Builds bounded per-turn history and keeps each case's summary current."""
+
+    def __init__(
+        self,
+        window_turns: int = CHAT_HISTORY_WINDOW_TURNS,
+        max_messages: int = CHAT_HISTORY_MAX_MESSAGES,
+        min_messages: int = CHAT_SUMMARY_MIN_MESSAGES,
+        model: str = CHAT_SUMMARY_MODEL,
+        enabled: bool = CHAT_SUMMARY_ENABLED,
+        max_cached: int = 1024,
+    ):
+        self.window_turns = window_turns
+        self.max_messages = max_messages
+        self.min_messages = min_messages
+        self.model = model
+        self.enabled = enabled
+        self.max_cached = max_cached
+        self._summaries: "OrderedDict[str, SummaryState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------
+    # Summary state
+    # ------------------------------------------------------------------
+
+    def _remember(self, case_id: str, state: SummaryState) -> None:
+        with self._lock:
+            current = self._summaries.get(case_id)
+            if current is None or state.message_count >= current.message_count:
+                self._summaries[case_id] = state
+            self._summaries.move_to_end(case_id)
+            while len(self._summaries) > self.max_cached:
+                self._summaries.popitem(last=False)
+
+    def _read_summary(self, case_id: str) -> SummaryState:
+        case = case_cache.get_case(case_id)
+        if case is not None and "summary_message_count" in case:
+            return SummaryState(case.get("conversation_summary") or "", int(case.get("summary_message_count") or 0))
+        supabase = get_supabase()
+        if supabase is None:
+            return SummaryState()
+        try:
+            result = (
+                supabase.table("user_cases")
+                .select("conversation_summary, summary_message_count")
+                .eq("id", case_id)
+                .single()
+                .execute()
+            )
+            row = result.data or {}
+            return SummaryState(row.get("conversation_summary") or "", int(row.get("summary_message_count") or 0))
+        except Exception as e:
+            print(f"⚠️ [ChatHistory] Could not read summary for case {case_id}: {e}")
+            return SummaryState()
+
+    def _write_summary(self, case_id: str, state: SummaryState) -> None:
+        case_cache.update_case(case_id, {
+            "conversation_summary": state.text,
+            "summary_message_count": state.message_count,
+        })
+        supabase = get_supabase()
+        if supabase is None:
+            return
+        try:
+            supabase.table("user_cases").update({
+                "conversation_summary": state.text,
+                "summary_message_count": state.message_count,
+            }).eq("id", case_id).execute()
+        except Exception as e:
+            print(f"⚠️ [ChatHistory] Could not store summary for case {case_id} (kept in memory): {e}")
+
+    async def aget_summary(self, case_id: str) -> SummaryState:
+        """The case's summary: in process if known, else from the case row."""
+        if not self.enabled:
+            return SummaryState()
+        with self._lock:
+            state = self._summaries.get(case_id)
+        if state is not None:
+            return state
+        state = await run_blocking(self._read_summary, case_id)
+        self._remember(case_id, state)
+        return state
+
+    # ------------------------------------------------------------------
+    # Per-turn window
+    # ------------------------------------------------------------------
+
+    def window(self, db_messages: List[dict], summary: SummaryState) -> HistoryWindow:
+        """Summary plus the messages to send verbatim for this turn."""
+        if not self.enabled:
+            return HistoryWindow(SummaryState(), list(db_messages), 0)
+        if summary.message_count > len(db_messages):
+            # Summary is ahead of the history we were given; don't trust it
+            summary = SummaryState()
+        start = min(summary.message_count, _window_start(db_messages, self.window_turns))
+        if len(db_messages) - start > self.max_messages:
+            start = len(db_messages) - self.max_messages
+            print(f"⚠️ [ChatHistory] Summary is {start - summary.message_count} messages behind; oldest unsummarised messages left out")
+        window = HistoryWindow(summary, db_messages[start:], start)
+        metrics.observe("chat.history_messages", len(window.messages))
+        metrics.observe("chat.history_tokens", window.tokens())
+        return window
+
+    def build_messages(self, window: HistoryWindow, convert) -> list:
+        """LangChain messages for the window; convert() maps DB rows to messages."""
+        messages = convert(window.messages)
+        if window.summary.text:
+            # A user-turn note rather than a SystemMessage: the system prompt
+            # may live in a provider-side prefix cache
+            messages.insert(0, HumanMessage(
+                content=f"[Summary of the earlier conversation — for context only]\n{window.summary.text}"
+            ))
+        return messages
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def _pending(self, db_messages: List[dict], summary: SummaryState) -> Tuple[int, int]:
+        """(from, to) slice of messages that have left the window but are not summarised."""
+        end = _window_start(db_messages, self.window_turns)
+        return summary.message_count, max(end, summary.message_count)
+
+    async def _summarise(self, case_id: str, db_messages: List[dict], summary: SummaryState) -> None:
+        start, end = self._pending(db_messages, summary)
+        transcript = "\n".join(
+            f"{m.get('role', 'user').upper()}: {m.get('content') or ''}" for m in db_messages[start:end]
+        )
+        prompt = SUMMARY_PROMPT.format(summary=summary.text or "(none yet)", messages=transcript)
+        llm = llm_clients.get(self.model, temperature=0)
+        try:
+            response = await llm_hedger.ainvoke("chat_summary", lambda: llm.ainvoke([HumanMessage(content=prompt)]))
+            text = response.content if isinstance(response.content, str) else str(response.content)
+        except Exception as e:
+            metrics.incr("chat.summary_refreshes", outcome="error")
+            print(f"⚠️ [ChatHistory] Summary refresh failed for case {case_id}: {e}")
+            return
+        state = SummaryState(text.strip(), end)
+        self._remember(case_id, state)
+        await run_blocking(self._write_summary, case_id, state)
+        metrics.incr("chat.summary_refreshes", outcome="ok")
+        print(f"♻️ [ChatHistory] Case {case_id} summary now covers {end} messages")
+
+    def refresh(self, case_id: str, db_messages: List[dict], summary: SummaryState) -> Optional[asyncio.Task]:
+        """Start a background summary update if enough messages have left the window."""
+        if not self.enabled:
+            return None
+        start, end = self._pending(db_messages, summary)
+        if end - start < self.min_messages or case_id in self._refreshing:
+            return None
+        self._refreshing.add(case_id)
+        task = asyncio.ensure_future(self._summarise(case_id, list(db_messages), summary))
+        self._tasks.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            self._tasks.discard(t)
+            self._refreshing.discard(case_id)
+
+        task.add_done_callback(_done)
+        return task
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "window_turns": self.window_turns,
+            "cached_summaries": len(self._summaries),
+            "refreshing": len(self._refreshing),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+chat_history = ChatHistoryManager()
@@ -0,0 +1,141 @@
+"""
+Conversation stages of the intake flow.
+
+Every chat turn used to send the whole system prompt — including the long
+document and Gmail sections — and bind every tool schema, even while the
+user was still describing their problem. Each turn is now placed in one of
+the flow's stages and sends only that stage's prompt sections and tools:
+
+  stage          prompt sections                       tools
+  understanding  core                                  —
+  rights         core                                  —
+  collection     core, documents                       generate_filing_documents
+  documents      core, documents                       generate_filing_documents
+  notice         core, documents, email                email draft + history, documents
+  follow_up      core, documents, email, inbox,        all
+                 next steps
+
+A section is sent exactly when its tools are bound: the documents section
+with generate_filing_documents, the inbox section with search_gmail and
+get_gmail_message.
+
+The stage only moves forward. detect_stage() combines the stage recorded on
+the last assistant message with cheap signals: user turns so far, how many
+case facts are on file, whether documents or an email draft were produced,
+and requests in the latest message (so "generate my documents" jumps
+ahead in one turn, and "did Amazon reply?" reaches the inbox tools from
+any stage). Early stages tell the model that more tools unlock later.
+
+CHAT_STAGE_AWARE=false sends the full prompt and all tools, as before.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from ..config import CHAT_STAGE_MIN_FACTS
+
+STAGES = ("understanding", "rights", "collection", "documents", "notice", "follow_up")
+
+
+@dataclass(frozen=True)
+class StageProfile:
+    """Prompt sections and tool names sent in one stage."""
+    name: str
+    sections: Tuple[str, ...]
+    tools: Tuple[str, ...]
+
+
+EMAIL_TOOLS = ("create_gmail_draft", "get_case_emails_history")
+ALL_TOOLS = ("*",)
+
+STAGE_PROFILES: Dict[str, StageProfile] = {
+    "understanding": StageProfile("understanding", ("core",), ()),
+    "rights": StageProfile("rights", ("core",), ()),
+    "collection": StageProfile("collection", ("core", "documents"), ("generate_filing_documents",)),
+    "documents": StageProfile("documents", ("core", "documents"), ("generate_filing_documents",)),
+    "notice": StageProfile("notice", ("core", "documents", "email"), EMAIL_TOOLS + ("generate_filing_documents",)),
+    "follow_up": StageProfile("follow_up", ("core", "documents", "email", "inbox", "next_steps"), ALL_TOOLS),
+}
+
+EARLY_STAGE_NOTE = (
+    "\n### Current stage\n"
+    "You are still understanding the complaint. Document generation and email tools are not available yet; "
+    "if the user asks for documents or a legal notice, start collecting the details they need."
+)
+
+# Requests in the latest user message that move the flow ahead. An explicit
+# inbox request ("check my email", "did they reply?") reaches follow_up from
+# any stage; looser wording ("any response") only once a notice is under way,
+# since "they didn't reply" is part of describing most complaints.
+INBOX_REQUEST = re.compile(
+    r"\b(check|search|read)\b.{0,30}\b(repl(y|ies)|response|inbox|e-?mails?|mails?)\b"
+    r"|\bdid\b[^.?!]{0,30}\b(repl(y|ied)|respond(ed)?)\b[^.!]*\?|जवाब आया"
+)
+
+INTENTS: List[Tuple[str, "re.Pattern"]] = [
+    ("follow_up", re.compile(r"\bany\b.{0,30}\b(repl(y|ies)|response|e-?mails?|mails?)\b")),
+    ("notice", re.compile(r"\blegal notice\b|\b(draft|send|write|prepare)\b.{0,30}\b(e-?mail|mail|notice|letter)\b|नोटिस|ईमेल")),
+    ("documents", re.compile(
+        r"\b(generate|prepare|create|make|draft|regenerate)\b.{0,30}\b(documents?|pdfs?|affidavit|proforma|complaint form)\b"
+        r"|\bfiling documents\b|दस्तावेज"
+    )),
+]
+
+
+def _later(a: str, b: str) -> str:
+    return a if STAGES.index(a) >= STAGES.index(b) else b
+
+
+def detect_stage(db_messages: List[dict], facts: dict, min_facts: int = CHAT_STAGE_MIN_FACTS) -> str:
+    """Stage for the next reply; db_messages ends with this turn's user message(s)."""
+    stage = "understanding"
+    user_turns = 0
+    for m in db_messages:
+        metadata = m.get("metadata") or {}
+        if m.get("role") == "user":
+            user_turns += 1
+        elif m.get("role") == "assistant":
+            if metadata.get("stage") in STAGES:
+                stage = _later(metadata["stage"], stage)
+            if metadata.get("document_pack"):
+                stage = _later("notice", stage)
+            if metadata.get("email_draft"):
+                stage = _later("follow_up", stage)
+    if user_turns >= 2:
+        stage = _later("rights", stage)
+    if len([v for v in facts.values() if v]) >= min_facts:
+        stage = _later("collection", stage)
+
+    latest = ""
+    for m in reversed(db_messages):
+        if m.get("role") != "user":
+            break
+        latest = f"{m.get('content') or ''} {latest}"
+    latest = latest.lower()
+    if INBOX_REQUEST.search(latest):
+        return _later("follow_up", stage)
+    for target, pattern in INTENTS:
+        if target == "follow_up" and STAGES.index(stage) < STAGES.index("notice"):
+            continue
+        if pattern.search(latest):
+            stage = _later(target, stage)
+            break
+    return stage
+
+
+def stage_prompt(stage: str, sections: Dict[str, str]) -> str:
+    """The system prompt for a stage, built from the named sections."""
+    profile = STAGE_PROFILES[stage]
+    prompt = "---\n\n".join(sections[name] for name in profile.sections)
+    if not profile.tools:
+        prompt += EARLY_STAGE_NOTE
+    return prompt
+
+
+def stage_tools(stage: str, tools: list) -> list:
+    """The subset of tools bound in a stage (by tool name)."""
+    names = STAGE_PROFILES[stage].tools
+    if names == ALL_TOOLS:
+        return list(tools)
+    return [t for t in tools if t.name in names]
@@ -0,0 +1,173 @@
+"""
+Per-case serialization of chat turns.
+
+Two quick sends for the same case used to interleave: both staged their
+user message, both loaded the same history and both called the model, so
+one LLM call was wasted and the replies could be stored out of order.
+ChatService.chat() now runs every turn through CaseTurnQueue:
+
+- serialize  turns of one case run one at a time, in arrival order;
+             different cases never wait on each other
+- coalesce   with CHAT_COALESCE_MESSAGES on, messages that queue up behind
+             a running turn (or arrive within CHAT_COALESCE_WINDOW_MS of
+             one starting) are answered together by one LLM turn, up to
+             CHAT_COALESCE_MAX_MESSAGES; every sender gets that reply and
+             the turn's events
+
+A coalesced turn keeps running if the sender who started it disconnects,
+because the others are still waiting for it. Locks are per process: with
+several workers, a case's sends should be routed to one of them.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..config import (
+    CHAT_SERIALIZE_TURNS,
+    CHAT_COALESCE_MESSAGES,
+    CHAT_COALESCE_WINDOW_MS,
+    CHAT_COALESCE_MAX_MESSAGES,
+)
+from ..core import metrics
+
+
+@dataclass
+class TurnRequest:
+    """One user message waiting for its turn."""
+    content: str
+    metadata: dict = field(default_factory=dict)
+    on_event: Optional[Callable[[str, dict], None]] = None
+    stream_tokens: bool = False
+    created_at: str = ""
+    future: Optional[asyncio.Future] = None       # set when answered by another sender's turn
+
+
+@dataclass
+class _CaseState:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    queue: List[TurnRequest] = field(default_factory=list)    # not yet taken into a turn
+    refs: int = 0                                             # senders holding this state
+
+
+TurnRunner = Callable[[str, List[TurnRequest]], Awaitable[tuple]]
+
+
+class CaseTurnQueue:
+    """Runs each case's turns one at a time; see the module docstring."""
+
+    def __init__(
+        self,
+        enabled: bool = CHAT_SERIALIZE_TURNS,
+        coalesce: bool = CHAT_COALESCE_MESSAGES,
+        coalesce_window_ms: float = CHAT_COALESCE_WINDOW_MS,
+        max_messages: int = CHAT_COALESCE_MAX_MESSAGES,
+    ):
+        self.enabled = enabled
+        self.coalesce = coalesce
+        self.coalesce_window = coalesce_window_ms / 1000
+        self.max_messages = max(1, max_messages)
+        self._cases: Dict[str, _CaseState] = {}
+
+    def _forget_if_idle(self, case_id: str, state: _CaseState) -> None:
+        if state.refs == 0 and not state.lock.locked() and self._cases.get(case_id) is state:
+            del self._cases[case_id]
+
+    def _release(self, case_id: str, state: _CaseState) -> None:
+        state.lock.release()
+        self._forget_if_idle(case_id, state)
+
+    def _take(self, state: _CaseState, request: TurnRequest) -> List[TurnRequest]:
+        """The messages this turn answers: ours, plus those queued behind it when coalescing."""
+        if not self.coalesce:
+            state.queue.remove(request)
+            return [request]
+        batch = state.queue[:self.max_messages]
+        del state.queue[:len(batch)]
+        return batch
+
+    async def run(self, case_id: str, request: TurnRequest, runner: TurnRunner) -> tuple:
+        """Run runner(case_id, batch) once it is this request's turn and return its result."""
+        if not self.enabled:
+            return await runner(case_id, [request])
+
+        loop = asyncio.get_running_loop()
+        request.future = loop.create_future()
+        state = self._cases.setdefault(case_id, _CaseState())
+        state.refs += 1
+        state.queue.append(request)
+        queued_at = time.perf_counter()
+        try:
+            await state.lock.acquire()
+        except asyncio.CancelledError:
+            if request in state.queue:
+                state.queue.remove(request)
+            state.refs -= 1
+            self._forget_if_idle(case_id, state)
+            raise
+        state.refs -= 1
+        metrics.observe("chat.turn_wait_seconds", time.perf_counter() - queued_at)
+
+        if request.future.done():
+            # Answered by a coalesced turn that started before we got the lock
+            self._release(case_id, state)
+            return request.future.result()
+
+        if self.coalesce and self.coalesce_window > 0:
+            try:
+                await asyncio.sleep(self.coalesce_window)
+            except asyncio.CancelledError:
+                state.queue.remove(request)
+                self._release(case_id, state)
+                raise
+        batch = self._take(state, request)
+        if len(batch) > 1:
+            metrics.incr("chat.coalesced_messages", len(batch) - 1)
+            print(f"♻️ [ChatTurns] Case {case_id}: answering {len(batch)} messages in one turn")
+
+        task = asyncio.ensure_future(runner(case_id, batch))
+
+        def _finish(t: asyncio.Task) -> None:
+            for r in batch:
+                if r is request or r.future.done():
+                    continue
+                if t.cancelled():
+                    r.future.cancel()
+                elif t.exception() is not None:
+                    r.future.set_exception(t.exception())
+                else:
+                    r.future.set_result(t.result())
+
+        task.add_done_callback(_finish)
+        try:
+            # Other senders wait for this turn too; don't cancel it on their behalf
+            result = await (asyncio.shield(task) if len(batch) > 1 else task)
+        except asyncio.CancelledError:
+            if task.done():
+                self._release(case_id, state)
+            else:
+                # Keep the case locked until the shielded turn finishes
+                task.add_done_callback(lambda t: self._release(case_id, state))
+            raise
+        except BaseException:
+            self._release(case_id, state)
+            raise
+        self._release(case_id, state)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "coalesce": self.coalesce,
+            "coalesce_window_ms": self.coalesce_window * 1000,
+            "active_cases": sum(1 for s in self._cases.values() if s.lock.locked()),
+            "queued_messages": sum(len(s.queue) for s in self._cases.values()),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+case_turns = CaseTurnQueue()
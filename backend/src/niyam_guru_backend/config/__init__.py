@@ -13,9 +13,88 @@ from .settings import (
     LLM_MODEL,
     ENRICH_MODEL,
     API_RATE_LIMIT_SECONDS,
+    PROMPT_CHARS_PER_TOKEN,
+    PROMPT_TOTAL_TOKEN_BUDGET,
+    PROMPT_BUDGET_CPA_TOKENS,
+    PROMPT_BUDGET_SIMILAR_CASES_TOKENS,
+    PROMPT_BUDGET_CASE_TOKENS,
+    PROMPT_BUDGET_VALIDATION_TOKENS,
+    LLM_PREFIX_CACHE_PROVIDER,
+    LLM_PREFIX_CACHE_TTL_SECONDS,
+    LLM_PREFIX_CACHE_MIN_TOKENS,
+    EXECUTOR_IO_WORKERS,
+    EXECUTOR_CPU_WORKERS,
+    EXECUTOR_LLM_WORKERS,
+    EXECUTOR_TOOL_WORKERS,
+    PREDICTION_JOB_BACKEND,
+    PREDICTION_JOB_WORKERS,
+    PREDICTION_JOB_MAX_PENDING,
+    PREDICTION_JOB_RETENTION,
+    PREDICTION_JOB_DB_PATH,
+    PREDICTION_IDEMPOTENCY_TTL_SECONDS,
+    PREDICTION_IDEMPOTENCY_MAX_ENTRIES,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    UPLOAD_MAX_FILE_BYTES,
+    UPLOAD_MAX_REQUEST_BYTES,
+    UPLOAD_MAX_FILES,
+    UPLOAD_SPOOL_MEMORY_BYTES,
+    EVIDENCE_PREPROCESS_ENABLED,
+    EVIDENCE_IMAGE_MAX_SIDE,
+    EVIDENCE_IMAGE_QUALITY,
+    EVIDENCE_PDF_MIN_TEXT_CHARS,
+    EVIDENCE_FACTS_ENABLED,
+    EVIDENCE_FACTS_REUSE,
+    EVIDENCE_FACTS_MODEL,
+    EVIDENCE_FACTS_DB_PATH,
+    LLM_DEADLINES,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_BUDGET_RATIO,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_POOL_KEEPALIVE_SECONDS,
+    CHAT_SUMMARY_ENABLED,
+    CHAT_HISTORY_WINDOW_TURNS,
+    CHAT_HISTORY_MAX_MESSAGES,
+    CHAT_SUMMARY_MIN_MESSAGES,
+    CHAT_SUMMARY_MODEL,
+    CASE_FACTS_ENABLED,
+    CASE_FACTS_MODEL,
+    CASE_FACTS_WAIT_SECONDS,
+    CHAT_TOOL_TIMEOUT_SECONDS,
+    CHAT_TOOL_TIMEOUTS,
+    CHAT_SERIALIZE_TURNS,
+    CHAT_COALESCE_MESSAGES,
+    CHAT_COALESCE_WINDOW_MS,
+    CHAT_COALESCE_MAX_MESSAGES,
+    CHAT_STAGE_AWARE,
+    CHAT_STAGE_MIN_FACTS,
+    FAQ_ENABLED,
+    FAQ_BANK_PATH,
+    FAQ_MATCH_THRESHOLD,
+    FAQ_MAX_WORDS,
+    CASE_CACHE_ENABLED,
+    CASE_CACHE_BACKEND,
+    CASE_CACHE_TTL_SECONDS,
+    CASE_CACHE_MAX_ENTRIES,
+    CASE_CACHE_DB_PATH,
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    WRITE_BEHIND_MAX_PENDING,
+    WRITE_BEHIND_MAX_RETRIES,
     SUPABASE_URL,
     SUPABASE_KEY,
     SUPABASE_ANON_KEY,
+    SUPABASE_POOL_MAX_CONNECTIONS,
+    SUPABASE_POOL_MAX_KEEPALIVE,
+    SUPABASE_POOL_KEEPALIVE_SECONDS,
+    SUPABASE_TIMEOUT_SECONDS,
+    SUPABASE_HTTP2,
     SARVAM_API_KEY,
     GMAIL_CREDENTIALS_FILE,
     GMAIL_TOKEN_FILE,
@@ -36,9 +115,88 @@ __all__ = [
     "LLM_MODEL",
     "ENRICH_MODEL",
     "API_RATE_LIMIT_SECONDS",
+    "PROMPT_CHARS_PER_TOKEN",
+    "PROMPT_TOTAL_TOKEN_BUDGET",
+    "PROMPT_BUDGET_CPA_TOKENS",
+    "PROMPT_BUDGET_SIMILAR_CASES_TOKENS",
+    "PROMPT_BUDGET_CASE_TOKENS",
+    "PROMPT_BUDGET_VALIDATION_TOKENS",
+    "LLM_PREFIX_CACHE_PROVIDER",
+    "LLM_PREFIX_CACHE_TTL_SECONDS",
+    "LLM_PREFIX_CACHE_MIN_TOKENS",
+    "EXECUTOR_IO_WORKERS",
+    "EXECUTOR_CPU_WORKERS",
+    "EXECUTOR_LLM_WORKERS",
+    "EXECUTOR_TOOL_WORKERS",
+    "PREDICTION_JOB_BACKEND",
+    "PREDICTION_JOB_WORKERS",
+    "PREDICTION_JOB_MAX_PENDING",
+    "PREDICTION_JOB_RETENTION",
+    "PREDICTION_JOB_DB_PATH",
+    "PREDICTION_IDEMPOTENCY_TTL_SECONDS",
+    "PREDICTION_IDEMPOTENCY_MAX_ENTRIES",
+    "SEMANTIC_CACHE_ENABLED",
+    "SEMANTIC_CACHE_THRESHOLD",
+    "SEMANTIC_CACHE_MAX_ENTRIES",
+    "SEMANTIC_CACHE_TTL_SECONDS",
+    "UPLOAD_MAX_FILE_BYTES",
+    "UPLOAD_MAX_REQUEST_BYTES",
+    "UPLOAD_MAX_FILES",
+    "UPLOAD_SPOOL_MEMORY_BYTES",
+    "EVIDENCE_PREPROCESS_ENABLED",
+    "EVIDENCE_IMAGE_MAX_SIDE",
+    "EVIDENCE_IMAGE_QUALITY",
+    "EVIDENCE_PDF_MIN_TEXT_CHARS",
+    "EVIDENCE_FACTS_ENABLED",
+    "EVIDENCE_FACTS_REUSE",
+    "EVIDENCE_FACTS_MODEL",
+    "EVIDENCE_FACTS_DB_PATH",
+    "LLM_DEADLINES",
+    "LLM_HEDGE_ENABLED",
+    "LLM_HEDGE_PERCENTILE",
+    "LLM_HEDGE_MIN_SAMPLES",
+    "LLM_HEDGE_BUDGET_RATIO",
+    "LLM_POOL_MAX_CONNECTIONS",
+    "LLM_POOL_MAX_KEEPALIVE",
+    "LLM_POOL_KEEPALIVE_SECONDS",
+    "CHAT_SUMMARY_ENABLED",
+    "CHAT_HISTORY_WINDOW_TURNS",
+    "CHAT_HISTORY_MAX_MESSAGES",
+    "CHAT_SUMMARY_MIN_MESSAGES",
+    "CHAT_SUMMARY_MODEL",
+    "CASE_FACTS_ENABLED",
+    "CASE_FACTS_MODEL",
+    "CASE_FACTS_WAIT_SECONDS",
+    "CHAT_TOOL_TIMEOUT_SECONDS",
+    "CHAT_TOOL_TIMEOUTS",
+    "CHAT_SERIALIZE_TURNS",
+    "CHAT_COALESCE_MESSAGES",
+    "CHAT_COALESCE_WINDOW_MS",
+    "CHAT_COALESCE_MAX_MESSAGES",
+    "CHAT_STAGE_AWARE",
+    "CHAT_STAGE_MIN_FACTS",
+    "FAQ_ENABLED",
+    "FAQ_BANK_PATH",
+    "FAQ_MATCH_THRESHOLD",
+    "FAQ_MAX_WORDS",
+    "CASE_CACHE_ENABLED",
+    "CASE_CACHE_BACKEND",
+    "CASE_CACHE_TTL_SECONDS",
+    "CASE_CACHE_MAX_ENTRIES",
+    "CASE_CACHE_DB_PATH",
+    "WRITE_BEHIND_ENABLED",
+    "WRITE_BEHIND_BATCH_SIZE",
+    "WRITE_BEHIND_FLUSH_INTERVAL_MS",
+    "WRITE_BEHIND_MAX_PENDING",
+    "WRITE_BEHIND_MAX_RETRIES",
     "SUPABASE_URL",
     "SUPABASE_KEY",
     "SUPABASE_ANON_KEY",
+    "SUPABASE_POOL_MAX_CONNECTIONS",
+    "SUPABASE_POOL_MAX_KEEPALIVE",
+    "SUPABASE_POOL_KEEPALIVE_SECONDS",
+    "SUPABASE_TIMEOUT_SECONDS",
+    "SUPABASE_HTTP2",
     "SARVAM_API_KEY",
     "GMAIL_CREDENTIALS_FILE",
     "GMAIL_TOKEN_FILE",
@@ -31,10 +31,157 @@ ENRICH_MODEL = os.getenv("ENRICH_MODEL", "gemini-2.0-flash")
 # Rate limiting (seconds between API calls)
 API_RATE_LIMIT_SECONDS = float(os.getenv("API_RATE_LIMIT_SECONDS", "4.0"))  # 15 RPM = 4 sec delay
 
+# Prompt token budgets for the judgment prediction prompt (estimated tokens)
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4.0"))
+PROMPT_TOTAL_TOKEN_BUDGET = int(os.getenv("PROMPT_TOTAL_TOKEN_BUDGET", "28000"))
+PROMPT_BUDGET_CPA_TOKENS = int(os.getenv("PROMPT_BUDGET_CPA_TOKENS", "13000"))
+PROMPT_BUDGET_SIMILAR_CASES_TOKENS = int(os.getenv("PROMPT_BUDGET_SIMILAR_CASES_TOKENS", "6000"))
+PROMPT_BUDGET_CASE_TOKENS = int(os.getenv("PROMPT_BUDGET_CASE_TOKENS", "4000"))
+PROMPT_BUDGET_VALIDATION_TOKENS = int(os.getenv("PROMPT_BUDGET_VALIDATION_TOKENS", "1500"))
+
+# Static prompt-prefix caching ("gemini" = Gemini context caching, "local" = offline stand-in, "none" = off)
+LLM_PREFIX_CACHE_PROVIDER = os.getenv("LLM_PREFIX_CACHE_PROVIDER", "gemini").lower()
+LLM_PREFIX_CACHE_TTL_SECONDS = int(os.getenv("LLM_PREFIX_CACHE_TTL_SECONDS", "3600"))
+LLM_PREFIX_CACHE_MIN_TOKENS = int(os.getenv("LLM_PREFIX_CACHE_MIN_TOKENS", "1024"))  # Gemini minimum for implicit/explicit caching
+
+# Bounded thread pool for blocking calls made from async endpoints
+EXECUTOR_IO_WORKERS = int(os.getenv("EXECUTOR_IO_WORKERS", "32"))
+EXECUTOR_CPU_WORKERS = int(os.getenv("EXECUTOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTOR_LLM_WORKERS = int(os.getenv("EXECUTOR_LLM_WORKERS", "16"))  # blocking (sync) LLM calls
+EXECUTOR_TOOL_WORKERS = int(os.getenv("EXECUTOR_TOOL_WORKERS", "8"))  # chat tools (Gmail, PDF rendering)
+
+# Background prediction jobs ("memory" or "sqlite" backend)
+PREDICTION_JOB_BACKEND = os.getenv("PREDICTION_JOB_BACKEND", "memory").lower()
+PREDICTION_JOB_WORKERS = int(os.getenv("PREDICTION_JOB_WORKERS", "4"))
+PREDICTION_JOB_MAX_PENDING = int(os.getenv("PREDICTION_JOB_MAX_PENDING", "100"))
+PREDICTION_JOB_RETENTION = int(os.getenv("PREDICTION_JOB_RETENTION", "500"))  # finished jobs kept
+PREDICTION_JOB_DB_PATH = os.getenv("PREDICTION_JOB_DB_PATH", str(BACKEND_DATA_DIR / "prediction_jobs.sqlite3"))
+
+# Deduplication of identical prediction requests
+PREDICTION_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("PREDICTION_IDEMPOTENCY_TTL_SECONDS", "600"))
+PREDICTION_IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("PREDICTION_IDEMPOTENCY_MAX_ENTRIES", "256"))
+
+# Semantic near-duplicate prediction cache (opt-in): reuse a prediction for
+# a near-identical complaint against the same party in the same amount band
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+
+# Streaming evidence uploads (multipart): files are spooled in memory up to
+# UPLOAD_SPOOL_MEMORY_BYTES, then to a temporary file on disk
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "10"))
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+
+# Evidence preprocessing before multimodal predictions
+EVIDENCE_PREPROCESS_ENABLED = os.getenv("EVIDENCE_PREPROCESS_ENABLED", "true").lower() == "true"
+EVIDENCE_IMAGE_MAX_SIDE = int(os.getenv("EVIDENCE_IMAGE_MAX_SIDE", "1536"))  # px, longest side
+EVIDENCE_IMAGE_QUALITY = int(os.getenv("EVIDENCE_IMAGE_QUALITY", "80"))  # JPEG quality
+EVIDENCE_PDF_MIN_TEXT_CHARS = int(os.getenv("EVIDENCE_PDF_MIN_TEXT_CHARS", "40"))  # below: rasterise page
+
+# Evidence fact cache: facts extracted once per file (by SHA-256) and reused
+# by re-predictions, judge questions and the courtroom simulation
+EVIDENCE_FACTS_ENABLED = os.getenv("EVIDENCE_FACTS_ENABLED", "true").lower() == "true"
+EVIDENCE_FACTS_REUSE = os.getenv("EVIDENCE_FACTS_REUSE", "true").lower() == "true"  # text-only re-predictions
+EVIDENCE_FACTS_MODEL = os.getenv("EVIDENCE_FACTS_MODEL", LLM_MODEL)
+EVIDENCE_FACTS_DB_PATH = os.getenv("EVIDENCE_FACTS_DB_PATH", str(BACKEND_DATA_DIR / "evidence_facts.sqlite3"))
+
+# LLM call deadlines (seconds, per endpoint; 0 = none) and hedged requests: a
+# call still running at the endpoint's LLM_HEDGE_PERCENTILE latency gets one
+# duplicate, the first response wins and the other is cancelled
+LLM_DEADLINES = {
+    "prediction": float(os.getenv("LLM_DEADLINE_PREDICTION_SECONDS", "120")),
+    "prediction_multimodal": float(os.getenv("LLM_DEADLINE_PREDICTION_MULTIMODAL_SECONDS", "180")),
+    "chat": float(os.getenv("LLM_DEADLINE_CHAT_SECONDS", "60")),
+    "questions": float(os.getenv("LLM_DEADLINE_QUESTIONS_SECONDS", "90")),
+    "simulation_judge": float(os.getenv("LLM_DEADLINE_SIMULATION_JUDGE_SECONDS", "90")),
+    "simulation_defense": float(os.getenv("LLM_DEADLINE_SIMULATION_DEFENSE_SECONDS", "90")),
+    "simulation_router": float(os.getenv("LLM_DEADLINE_SIMULATION_ROUTER_SECONDS", "30")),
+    "simulation_verdict": float(os.getenv("LLM_DEADLINE_SIMULATION_VERDICT_SECONDS", "180")),
+    "evidence_facts": float(os.getenv("LLM_DEADLINE_EVIDENCE_FACTS_SECONDS", "60")),
+    "chat_summary": float(os.getenv("LLM_DEADLINE_CHAT_SUMMARY_SECONDS", "60")),
+    "case_facts": float(os.getenv("LLM_DEADLINE_CASE_FACTS_SECONDS", "30")),
+}
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # no hedging until p90 is known
+LLM_HEDGE_BUDGET_RATIO = float(os.getenv("LLM_HEDGE_BUDGET_RATIO", "0.1"))  # extra requests per request
+
+# Shared LLM clients: one per (model, temperature, max tokens), with a bounded
+# keep-alive connection pool each
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+LLM_POOL_KEEPALIVE_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "60"))
+
+# Chat history: last CHAT_HISTORY_WINDOW_TURNS turns verbatim plus a rolling
+# summary of older messages, refreshed in the background after each reply
+CHAT_SUMMARY_ENABLED = os.getenv("CHAT_SUMMARY_ENABLED", "true").lower() == "true"
+CHAT_HISTORY_WINDOW_TURNS = int(os.getenv("CHAT_HISTORY_WINDOW_TURNS", "6"))
+CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "40"))  # hard cap while a summary lags
+CHAT_SUMMARY_MIN_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES", "4"))  # batch size per refresh
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", LLM_MODEL)
+
+# Case facts (complainant, opposite party, amounts, dates, ...) kept on the
+# case row, extracted from each turn in the background; documents and email
+# drafts read them instead of the model re-emitting every field
+CASE_FACTS_ENABLED = os.getenv("CASE_FACTS_ENABLED", "true").lower() == "true"
+CASE_FACTS_MODEL = os.getenv("CASE_FACTS_MODEL", LLM_MODEL)
+CASE_FACTS_WAIT_SECONDS = float(os.getenv("CASE_FACTS_WAIT_SECONDS", "10"))  # for the previous turn's extraction
+
+# Chat tool calls from one model response run concurrently, each under a
+# timeout (CHAT_TOOL_TIMEOUTS overrides the default per tool)
+CHAT_TOOL_TIMEOUT_SECONDS = float(os.getenv("CHAT_TOOL_TIMEOUT_SECONDS", "30"))
+CHAT_TOOL_TIMEOUTS = {
+    "generate_filing_documents": float(os.getenv("CHAT_TOOL_TIMEOUT_DOCUMENTS_SECONDS", "60")),
+}
+
+# Chat turns of one case run one at a time (per process); optionally, messages
+# that arrive while a turn is running are answered together in the next turn
+CHAT_SERIALIZE_TURNS = os.getenv("CHAT_SERIALIZE_TURNS", "true").lower() == "true"
+CHAT_COALESCE_MESSAGES = os.getenv("CHAT_COALESCE_MESSAGES", "false").lower() == "true"
+CHAT_COALESCE_WINDOW_MS = float(os.getenv("CHAT_COALESCE_WINDOW_MS", "300"))  # wait for a follow-up
+CHAT_COALESCE_MAX_MESSAGES = int(os.getenv("CHAT_COALESCE_MAX_MESSAGES", "5"))
+
+# Stage-aware chat prompts: each turn sends only the system-prompt sections and
+# tool schemas of the conversation's current stage (false = everything, always)
+CHAT_STAGE_AWARE = os.getenv("CHAT_STAGE_AWARE", "true").lower() == "true"
+CHAT_STAGE_MIN_FACTS = int(os.getenv("CHAT_STAGE_MIN_FACTS", "4"))  # case facts that start collection
+
+# FAQ fast path: short generic questions answered from a curated, versioned
+# answer bank grounded in consumer_laws.csv, without an LLM call
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+FAQ_BANK_PATH = os.getenv("FAQ_BANK_PATH", str(DATA_DIR / "faq" / "consumer_faq.json"))
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.6"))  # cosine similarity
+FAQ_MAX_WORDS = int(os.getenv("FAQ_MAX_WORDS", "25"))  # longer messages describe a case
+
+# Read-through cache of case rows, conversations and case emails
+# ("memory" = per process, "sqlite" = shared by the workers on one host)
+CASE_CACHE_ENABLED = os.getenv("CASE_CACHE_ENABLED", "true").lower() == "true"
+CASE_CACHE_BACKEND = os.getenv("CASE_CACHE_BACKEND", "memory")
+CASE_CACHE_TTL_SECONDS = float(os.getenv("CASE_CACHE_TTL_SECONDS", "300"))
+CASE_CACHE_MAX_ENTRIES = int(os.getenv("CASE_CACHE_MAX_ENTRIES", "3000"))
+CASE_CACHE_DB_PATH = os.getenv("CASE_CACHE_DB_PATH", str(BACKEND_DATA_DIR / "case_cache.sqlite3"))
+
+# Write-behind inserts (chat messages, email drafts, predictions): rows get a
+# client-side id and are inserted in batches off the request path
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true"
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))
+WRITE_BEHIND_FLUSH_INTERVAL_MS = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "200"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "5000"))  # rows; beyond this writes are synchronous
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+
 # Supabase Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")  # e.g. https://your-project.supabase.co
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")  # Use service role key for backend
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")  # Anon key for client operations
+# One shared client for the whole process, with a pooled keep-alive transport
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+SUPABASE_POOL_KEEPALIVE_SECONDS = float(os.getenv("SUPABASE_POOL_KEEPALIVE_SECONDS", "60"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "120"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
 
 # Sarvam AI (Voice Processing)
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
@@ -0,0 +1,25 @@
+"""
+Core Module — process-wide runtime services shared by every feature area.
+"""
+
+from .metrics import MetricsRegistry, metrics
+from .executors import get_executor, run_blocking, shutdown_executors
+from .stage_graph import Stage, StageGraph, StageRun
+from .supabase_pool import SupabaseProvider, get_supabase, supabase_provider
+from .write_behind import WriteBehindQueue, write_behind
+
+__all__ = [
+    "MetricsRegistry",
+    "metrics",
+    "get_executor",
+    "run_blocking",
+    "shutdown_executors",
+    "Stage",
+    "StageGraph",
+    "StageRun",
+    "SupabaseProvider",
+    "get_supabase",
+    "supabase_provider",
+    "WriteBehindQueue",
+    "write_behind",
+]
@@ -0,0 +1,106 @@
+"""
+Bounded executors for blocking work called from async code.
+
+The Supabase, Chroma and Google embedding clients are synchronous. Async
+endpoints hand such calls to a named, fixed-size thread pool instead of
+running them on the event loop (or in the unbounded default executor):
+
+- io   network / disk bound calls (Supabase, Chroma, embeddings, PDF reads)
+- llm  blocking LLM calls made by sync code paths (hedged requests)
+- tools  blocking chat tools (Gmail API, filing-document rendering)
+- cpu  CPU-bound work (image/PDF preprocessing) in a process pool, so it
+       does not contend for the GIL; callables and arguments must be
+       picklable (module-level functions, plain data)
+
+Pool sizes come from settings; active calls and queue wait time per pool are
+recorded in the metrics registry (for process pools, wait time includes the
+work itself).
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from niyam_guru_backend.config import (
+    EXECUTOR_IO_WORKERS,
+    EXECUTOR_CPU_WORKERS,
+    EXECUTOR_LLM_WORKERS,
+    EXECUTOR_TOOL_WORKERS,
+)
+from niyam_guru_backend.core.metrics import metrics
+
+
+POOL_SIZES: Dict[str, int] = {
+    "io": EXECUTOR_IO_WORKERS,
+    "cpu": EXECUTOR_CPU_WORKERS,
+    "llm": EXECUTOR_LLM_WORKERS,
+    "tools": EXECUTOR_TOOL_WORKERS,
+}
+
+# Pools backed by worker processes rather than threads
+PROCESS_POOLS = {"cpu"}
+
+_executors: Dict[str, Executor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(pool: str = "io") -> Executor:
+    """Return the named pool, creating it on first use."""
+    with _lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            if pool not in POOL_SIZES:
+                raise ValueError(f"Unknown executor pool '{pool}'")
+            if pool in PROCESS_POOLS:
+                # spawn, not fork: the server process runs threads
+                executor = ProcessPoolExecutor(
+                    max_workers=POOL_SIZES[pool], mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                executor = ThreadPoolExecutor(max_workers=POOL_SIZES[pool], thread_name_prefix=f"niyam-{pool}")
+            _executors[pool] = executor
+        return executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, pool: str = "io", **kwargs) -> Any:
+    """Run a blocking callable on a bounded pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+
+    if pool in PROCESS_POOLS:
+        metrics.incr("executor.active", pool=pool)
+        executor = get_executor(pool)
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        except BrokenExecutor:
+            # A worker died; replace the pool so later calls can succeed
+            with _lock:
+                if _executors.get(pool) is executor:
+                    del _executors[pool]
+            raise
+        finally:
+            metrics.incr("executor.active", -1, pool=pool)
+            metrics.observe("executor.wait_seconds", time.perf_counter() - submitted, pool=pool)
+
+    def _call():
+        metrics.observe("executor.wait_seconds", time.perf_counter() - submitted, pool=pool)
+        metrics.incr("executor.active", pool=pool)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.incr("executor.active", -1, pool=pool)
+
+    return await loop.run_in_executor(get_executor(pool), _call)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down every pool (called from the application lifespan)."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
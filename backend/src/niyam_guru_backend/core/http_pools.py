@@ -0,0 +1,20 @@
+"""
+Inspection helpers for pooled HTTP clients.
+
+httpx keeps no public counters for its connection pool; these helpers read
+the transport's pool so services can report how many keep-alive
+connections they hold. They return None when a client does not expose a
+pool (e.g. a custom transport or a different httpx version).
+"""
+
+from typing import Any, Optional
+
+
+def httpx_pool_stats(http_client: Any) -> Optional[dict]:
+    """Open, idle and active connections of an httpx (or httpx async) client."""
+    try:
+        connections = list(http_client._transport._pool.connections)
+    except AttributeError:
+        return None
+    idle = sum(1 for conn in connections if conn.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
@@ -0,0 +1,110 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and rolling-window histograms keyed by name + labels.
+Everything lives in memory and is exposed through GET /api/metrics; the
+histogram windows also back latency-aware behaviour such as percentile
+lookups at runtime.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+def _series_key(name: str, labels: Dict[str, object]) -> str:
+    """Render "name{a=1,b=2}" with labels sorted for stable keys."""
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile on an already-sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[rank]
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms."""
+
+    def __init__(self, window: int = 1024):
+        self._window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._histograms: Dict[str, Tuple[Deque[float], list]] = {}  # key → (window, [count, sum])
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = _series_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _series_key(name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = (deque(maxlen=self._window), [0, 0.0])
+                self._histograms[key] = series
+            series[0].append(value)
+            series[1][0] += 1
+            series[1][1] += value
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_series_key(name, labels), 0)
+
+    def percentile(self, name: str, pct: float, min_samples: int = 1, **labels) -> Optional[float]:
+        """Percentile over the rolling window, or None with too few samples."""
+        with self._lock:
+            series = self._histograms.get(_series_key(name, labels))
+            if series is None or len(series[0]) < min_samples:
+                return None
+            values = sorted(series[0])
+        return _percentile(values, pct)
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view of every series."""
+        with self._lock:
+            histograms = {
+                key: (sorted(window), totals[0], totals[1])
+                for key, (window, totals) in self._histograms.items()
+            }
+            snapshot = {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+        snapshot["histograms"] = {
+            key: {
+                "count": count,
+                "sum": round(total, 4),
+                "p50": round(_percentile(values, 50), 4),
+                "p90": round(_percentile(values, 90), 4),
+                "p99": round(_percentile(values, 99), 4),
+                "max": round(values[-1], 4) if values else 0.0,
+            }
+            for key, (values, count, total) in histograms.items()
+        }
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+metrics = MetricsRegistry()
@@ -0,0 +1,201 @@
+"""
+Small dependency graphs of pipeline stages.
+
+A pipeline declares its stages and what each one needs; every stage starts
+as soon as its dependencies have finished, so independent stages overlap
+and the wall time is the longest dependency chain rather than the sum:
+
+    graph = StageGraph("prediction")
+    graph.add("cpa", load_cpa_2019_context)
+    graph.add("vectorstore", get_vectorstore)
+    graph.add("query_embedding", embed_query, args=(query,))
+    graph.add("retrieval", search, deps=("vectorstore", "query_embedding"))
+    run = await graph.run()
+    run.results["retrieval"], run.timings
+
+A stage callable receives its positional args followed by the results of
+its dependencies as keyword arguments (named after the stages). Where it
+runs:
+
+- coroutine functions are awaited on the event loop (run() only)
+- pool=None calls it inline, for cheap CPU-only stages
+- otherwise it is handed to the named executor pool (default "io")
+
+run() is the async scheduler; run_sync() schedules the same graph from a
+blocking caller using the pools directly. The first failing stage cancels
+whatever has not started and its exception propagates.
+
+Durations are recorded per stage in StageRun.timings and as
+"<graph>.stage_seconds{stage=...}" histograms.
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from niyam_guru_backend.core.executors import get_executor, run_blocking
+from niyam_guru_backend.core.metrics import metrics
+
+
+@dataclass
+class Stage:
+    """One node of a StageGraph."""
+    name: str
+    func: Callable[..., Any]
+    args: Tuple = ()
+    deps: Tuple[str, ...] = ()
+    pool: Optional[str] = "io"          # None = run inline
+
+
+@dataclass
+class StageRun:
+    """Results and timings of one graph execution."""
+    graph: str
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, dict] = field(default_factory=dict)   # stage → {start_ms, duration_ms}
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    _ends: Dict[str, float] = field(default_factory=dict)
+    _deps: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+    def record(self, name: str, start: float, end: float, deps: Tuple[str, ...] = ()) -> None:
+        self.timings[name] = {
+            "start_ms": round((start - self.started) * 1000, 1),
+            "duration_ms": round((end - start) * 1000, 1),
+        }
+        self._ends[name] = end
+        self._deps[name] = deps
+        metrics.observe(f"{self.graph}.stage_seconds", end - start, stage=name)
+
+    @contextmanager
+    def timed(self, name: str, *deps: str):
+        """Time a stage that runs after the graph (e.g. the LLM call)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), deps)
+
+    def critical_path(self) -> List[str]:
+        """Stages on the chain that finished last, earliest first."""
+        if not self._ends:
+            return []
+        name = max(self._ends, key=self._ends.get)
+        path = [name]
+        while True:
+            deps = [d for d in self._deps.get(name, ()) if d in self._ends]
+            if not deps:
+                break
+            name = max(deps, key=self._ends.get)
+            path.append(name)
+        return path[::-1]
+
+    def to_dict(self) -> dict:
+        # Stages timed after the graph extend the total
+        end = max([self.finished or time.perf_counter(), *self._ends.values()])
+        return {
+            "total_ms": round((end - self.started) * 1000, 1),
+            "critical_path": self.critical_path(),
+            "stages": dict(self.timings),
+        }
+
+
+class StageGraph:
+    """Stages and their dependencies; see the module docstring."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        args: Tuple = (),
+        deps: Tuple[str, ...] = (),
+        pool: Optional[str] = "io",
+    ) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        unknown = [d for d in deps if d not in self.stages]
+        if unknown:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Stage '{name}' depends on undefined stages: {unknown}")
+        self.stages[name] = Stage(name, func, tuple(args), tuple(deps), pool)
+        return self
+
+    def _ready(self, done: Dict[str, Any], started: set) -> List[Stage]:
+        return [
+            stage for stage in self.stages.values()
+            if stage.name not in started and all(d in done for d in stage.deps)
+        ]
+
+    async def _run_stage(self, stage: Stage, run: StageRun) -> Any:
+        kwargs = {d: run.results[d] for d in stage.deps}
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.func):
+                return await stage.func(*stage.args, **kwargs)
+            if stage.pool is None:
+                return stage.func(*stage.args, **kwargs)
+            return await run_blocking(stage.func, *stage.args, pool=stage.pool, **kwargs)
+        finally:
+            run.record(stage.name, start, time.perf_counter(), stage.deps)
+
+    async def run(self) -> StageRun:
+        """Execute every stage as soon as its dependencies are done."""
+        run = StageRun(self.name)
+        started: set = set()
+        pending: Dict[asyncio.Task, str] = {}
+        try:
+            while len(run.results) < len(self.stages):
+                for stage in self._ready(run.results, started):
+                    started.add(stage.name)
+                    pending[asyncio.ensure_future(self._run_stage(stage, run))] = stage.name
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    run.results[pending.pop(task)] = task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            run.finished = time.perf_counter()
+        return run
+
+    def _call_stage(self, stage: Stage, run: StageRun, kwargs: dict) -> Any:
+        start = time.perf_counter()
+        try:
+            return stage.func(*stage.args, **kwargs)
+        finally:
+            run.record(stage.name, start, time.perf_counter(), stage.deps)
+
+    def run_sync(self) -> StageRun:
+        """Blocking variant of run(); coroutine stages are not supported."""
+        run = StageRun(self.name)
+        started: set = set()
+        pending: Dict[Future, str] = {}
+        try:
+            while len(run.results) < len(self.stages):
+                for stage in self._ready(run.results, started):
+                    if inspect.iscoroutinefunction(stage.func):
+                        raise TypeError(f"Stage '{stage.name}' is async; use run()")
+                    started.add(stage.name)
+                    kwargs = {d: run.results[d] for d in stage.deps}
+                    if stage.pool is None:
+                        run.results[stage.name] = self._call_stage(stage, run, kwargs)
+                        continue
+                    future = get_executor(stage.pool).submit(self._call_stage, stage, run, kwargs)
+                    pending[future] = stage.name
+                if not pending:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run.results[pending.pop(future)] = future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            run.finished = time.perf_counter()
+        return run
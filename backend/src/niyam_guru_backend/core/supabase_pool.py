@@ -0,0 +1,162 @@
+"""
+Single shared Supabase client with a pooled, keep-alive HTTP transport.
+
+Every service used to call create_client() itself, some of them on every
+request, paying a fresh TLS handshake each time. The whole process now
+shares one client whose PostgREST, storage and functions calls go through
+one httpx.Client:
+
+- pool     at most SUPABASE_POOL_MAX_CONNECTIONS connections, of which
+           SUPABASE_POOL_MAX_KEEPALIVE stay open for
+           SUPABASE_POOL_KEEPALIVE_SECONDS when idle
+- http2    multiplexed over one connection when SUPABASE_HTTP2 is on and
+           the h2 package is installed
+- timeout  SUPABASE_TIMEOUT_SECONDS per request
+
+httpx.Client is thread-safe, so the client can be used from the io pool.
+get_supabase() returns None when credentials are missing; a failed
+creation is not cached, so the next call retries. supabase-py releases
+without the httpx_client option still get one shared client, on the
+library's default transport.
+"""
+
+import dataclasses
+import threading
+from typing import Optional
+
+import httpx
+from supabase import Client, create_client
+
+try:
+    from supabase.lib.client_options import SyncClientOptions
+except ImportError:  # older supabase-py
+    SyncClientOptions = None
+
+# SyncClientOptions(httpx_client=...) only exists in recent supabase-py releases
+POOLING_SUPPORTED = SyncClientOptions is not None and any(
+    f.name == "httpx_client" for f in dataclasses.fields(SyncClientOptions)
+)
+
+from niyam_guru_backend.config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    SUPABASE_POOL_MAX_CONNECTIONS,
+    SUPABASE_POOL_MAX_KEEPALIVE,
+    SUPABASE_POOL_KEEPALIVE_SECONDS,
+    SUPABASE_TIMEOUT_SECONDS,
+    SUPABASE_HTTP2,
+)
+from niyam_guru_backend.core.http_pools import httpx_pool_stats
+from niyam_guru_backend.core.metrics import metrics
+
+
+class SupabaseProvider:
+    """Creates the shared Supabase client on first use and hands it out."""
+
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        key: Optional[str] = SUPABASE_KEY,
+        max_connections: int = SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive: int = SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_seconds: float = SUPABASE_POOL_KEEPALIVE_SECONDS,
+        timeout_seconds: float = SUPABASE_TIMEOUT_SECONDS,
+        http2: bool = SUPABASE_HTTP2,
+    ):
+        self.url = url
+        self.key = key
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_seconds = keepalive_seconds
+        self.timeout_seconds = timeout_seconds
+        self.http2 = http2
+        self._client: Optional[Client] = None
+        self._http: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url and self.key)
+
+    def _http_client(self) -> httpx.Client:
+        options = dict(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_seconds,
+            ),
+            timeout=self.timeout_seconds,
+            follow_redirects=True,
+        )
+        if self.http2:
+            try:
+                return httpx.Client(http2=True, **options)
+            except ImportError:
+                print("⚠️ [Supabase] h2 is not installed, using HTTP/1.1 keep-alive")
+        return httpx.Client(**options)
+
+    def get(self) -> Optional[Client]:
+        """The shared client, or None if Supabase is not configured or unreachable."""
+        if self._client is not None:
+            return self._client
+        if not self.configured:
+            return None
+        with self._lock:
+            if self._client is None:
+                if not POOLING_SUPPORTED:
+                    return self._create_unpooled()
+                http = self._http_client()
+                try:
+                    self._client = create_client(self.url, self.key, options=SyncClientOptions(httpx_client=http))
+                except Exception as e:
+                    http.close()
+                    metrics.incr("supabase.client_errors")
+                    print(f"❌ [Supabase] Could not create client: {e}")
+                    return None
+                self._http = http
+                print(f"✅ [Supabase] Shared client ready (pool {self.max_connections}, keep-alive {self.max_keepalive})")
+            return self._client
+
+    def _create_unpooled(self) -> Optional[Client]:
+        """Shared client on supabase-py's own transport (no httpx_client option); caller holds the lock."""
+        try:
+            self._client = create_client(self.url, self.key)
+        except Exception as e:
+            metrics.incr("supabase.client_errors")
+            print(f"❌ [Supabase] Could not create client: {e}")
+            return None
+        print("⚠️ [Supabase] This supabase-py has no httpx_client option; shared client uses its default transport")
+        return self._client
+
+    def close(self) -> None:
+        """Close pooled connections (application shutdown)."""
+        with self._lock:
+            http, self._http, self._client = self._http, None, None
+        if http is not None:
+            http.close()
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "connected": self._client is not None,
+            "pooled": POOLING_SUPPORTED,
+            "http2": self.http2,
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive,
+                "keepalive_seconds": self.keepalive_seconds,
+            },
+            "pool": httpx_pool_stats(self._http) if self._http is not None else None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+supabase_provider = SupabaseProvider()
+
+
+def get_supabase() -> Optional[Client]:
+    """The process-wide Supabase client (None when not configured)."""
+    return supabase_provider.get()
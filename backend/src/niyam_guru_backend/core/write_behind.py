@@ -0,0 +1,244 @@
+"""
+Write-behind queue for Supabase inserts.
+
+Chat messages and email draft records used to be inserted on the
+request's critical path. Callers now give each row its id (a client-side
+UUID) and hand it to the queue, which acknowledges at once; a background
+thread inserts queued rows in multi-row batches per table:
+
+- batching   up to WRITE_BEHIND_BATCH_SIZE rows per insert, at least every
+             WRITE_BEHIND_FLUSH_INTERVAL_MS
+- bounded    at most WRITE_BEHIND_MAX_PENDING rows wait in memory; when full,
+             submit() returns False and the caller inserts synchronously
+- retries    a failed batch is retried row by row with exponential backoff,
+             up to WRITE_BEHIND_MAX_RETRIES times per row, then dropped
+             (logged and counted)
+- shutdown   flush() drains the queue; the application lifespan calls it
+
+Read-your-writes: services keep their in-process cache current on submit,
+and pending_rows() / get_pending() expose queued rows to reads that miss
+the cache. ensure_written() flushes first when a row that is about to be
+updated is still queued.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from niyam_guru_backend.config import (
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    WRITE_BEHIND_MAX_PENDING,
+    WRITE_BEHIND_MAX_RETRIES,
+)
+from niyam_guru_backend.core.metrics import metrics
+from niyam_guru_backend.core.supabase_pool import get_supabase
+
+
+@dataclass
+class PendingWrite:
+    """One queued row."""
+    table: str
+    row: dict
+    attempts: int = 0
+    not_before: float = 0.0                   # retry backoff
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class WriteBehindQueue:
+    """Per-table FIFO of rows waiting to be inserted; see the module docstring."""
+
+    def __init__(
+        self,
+        enabled: bool = WRITE_BEHIND_ENABLED,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_ms: float = WRITE_BEHIND_FLUSH_INTERVAL_MS,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._queues: "OrderedDict[str, Deque[PendingWrite]]" = OrderedDict()
+        self._index: Dict[Tuple[str, str], dict] = {}          # (table, id) → row
+        self._size = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()                    # one flusher at a time
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Submitting
+    # ------------------------------------------------------------------
+
+    def submit(self, table: str, rows: List[dict]) -> bool:
+        """
+        Queue rows (each with an "id") for insertion. Returns False when the
+        queue is disabled, stopped or full — the caller must then insert itself.
+        """
+        if not self.enabled or not rows or get_supabase() is None:
+            return False
+        with self._cond:
+            if self._stopping or self._size + len(rows) > self.max_pending:
+                if not self._stopping:
+                    metrics.incr("write_behind.overflow", len(rows), table=table)
+                return False
+            queue = self._queues.setdefault(table, deque())
+            for row in rows:
+                queue.append(PendingWrite(table, row))
+                self._index[(table, str(row["id"]))] = row
+            self._size += len(rows)
+            metrics.incr("write_behind.submitted", len(rows), table=table)
+            self._ensure_thread()
+            if self._size >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="niyam-write-behind", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Read-your-writes
+    # ------------------------------------------------------------------
+
+    def get_pending(self, table: str, row_id: str) -> Optional[dict]:
+        with self._cond:
+            row = self._index.get((table, str(row_id)))
+            return dict(row) if row is not None else None
+
+    def pending_rows(self, table: str, **match) -> List[dict]:
+        """Unwritten rows (queued or in flight) of a table whose columns equal `match`, in submit order."""
+        with self._cond:
+            rows = [row for (t, _), row in self._index.items() if t == table]
+        return [dict(row) for row in rows if all(row.get(k) == v for k, v in match.items())]
+
+    def ensure_written(self, table: str, row_id: str) -> None:
+        """Flush now if the row is still queued (call before updating it)."""
+        if self.get_pending(table, row_id) is not None:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def _take_batch(self, force: bool) -> Optional[List[PendingWrite]]:
+        """Next batch: rows of the oldest table, or one retried row on its own."""
+        now = time.perf_counter()
+        for table, queue in self._queues.items():
+            if not queue:
+                continue
+            head = queue[0]
+            if head.not_before > now and not force:
+                continue
+            # Round-robin between tables
+            self._queues.move_to_end(table)
+            if head.attempts:
+                # A batch failed: isolate rows so one bad row cannot block the rest
+                return [queue.popleft()]
+            batch = []
+            while queue and len(batch) < self.batch_size and not queue[0].attempts:
+                batch.append(queue.popleft())
+            return batch
+        return None
+
+    def _insert(self, batch: List[PendingWrite]) -> None:
+        table = batch[0].table
+        started = time.perf_counter()
+        try:
+            get_supabase().table(table).insert([p.row for p in batch]).execute()
+        except Exception as e:
+            self._failed(batch, e)
+            return
+        metrics.observe("write_behind.batch_seconds", time.perf_counter() - started, table=table)
+        metrics.observe("write_behind.batch_rows", len(batch), table=table)
+        metrics.incr("write_behind.written", len(batch), table=table)
+        for p in batch:
+            metrics.observe("write_behind.lag_seconds", time.perf_counter() - p.enqueued_at, table=table)
+        with self._cond:
+            for p in batch:
+                self._index.pop((table, str(p.row["id"])), None)
+            self._size -= len(batch)
+
+    def _failed(self, batch: List[PendingWrite], error: Exception) -> None:
+        table = batch[0].table
+        retry, dropped = [], []
+        for p in batch:
+            p.attempts += 1
+            (retry if p.attempts <= self.max_retries else dropped).append(p)
+        with self._cond:
+            queue = self._queues.setdefault(table, deque())
+            for p in reversed(retry):
+                p.not_before = time.perf_counter() + min(30.0, 0.5 * 2 ** (p.attempts - 1))
+                queue.appendleft(p)
+            for p in dropped:
+                self._index.pop((table, str(p.row["id"])), None)
+            self._size -= len(dropped)
+        metrics.incr("write_behind.retries", len(retry), table=table)
+        if dropped:
+            metrics.incr("write_behind.dropped", len(dropped), table=table)
+            print(f"❌ [WriteBehind] Dropped {len(dropped)} {table} row(s) after {self.max_retries} retries: {error}")
+        else:
+            print(f"⚠️ [WriteBehind] Insert into {table} failed, will retry {len(retry)} row(s): {error}")
+
+    def _drain(self, force: bool = False) -> None:
+        """Insert ready batches; force ignores retry backoff (each row still has bounded retries)."""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = self._take_batch(force)
+                if not batch:
+                    return
+                self._insert(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(timeout=self.flush_interval)
+            try:
+                self._drain()
+            except Exception as e:
+                print(f"❌ [WriteBehind] Flush loop error: {e}")
+
+    def flush(self) -> None:
+        """Insert everything queued now (blocking)."""
+        self._drain(force=True)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush and stop accepting writes (application shutdown)."""
+        pending = self._size
+        self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if pending:
+            print(f"✅ [WriteBehind] Flushed on shutdown ({pending} row(s) were queued, {self._size} left)")
+
+    def stats(self) -> dict:
+        with self._cond:
+            by_table = {table: len(queue) for table, queue in self._queues.items()}
+        return {
+            "enabled": self.enabled,
+            "pending": self._size,
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "pending_by_table": by_table,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+write_behind = WriteBehindQueue()
@@ -0,0 +1,30 @@
+"""
+LLM Module — shared plumbing between the application and the model providers.
+"""
+
+from .tokens import estimate_tokens
+from .gateway import (
+    LLMGateway,
+    PrefixCacheProvider,
+    GeminiContextCacheProvider,
+    LocalPrefixCacheProvider,
+    llm_gateway,
+)
+from .clients import ClientEntry, LLMClientRegistry, llm_clients
+from .hedging import HedgeBudget, HedgedCaller, LLMDeadlineExceeded, llm_hedger
+
+__all__ = [
+    "estimate_tokens",
+    "LLMGateway",
+    "PrefixCacheProvider",
+    "GeminiContextCacheProvider",
+    "LocalPrefixCacheProvider",
+    "llm_gateway",
+    "ClientEntry",
+    "LLMClientRegistry",
+    "llm_clients",
+    "HedgeBudget",
+    "HedgedCaller",
+    "LLMDeadlineExceeded",
+    "llm_hedger",
+]
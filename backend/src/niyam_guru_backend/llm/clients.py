@@ -0,0 +1,157 @@
+"""
+Process-wide registry of configured chat model clients.
+
+Building a ChatGoogleGenerativeAI sets up a google-genai Client and fresh
+HTTP connection pools; building one per call throws away warm keep-alive
+connections and repeats that setup on every request. Call sites ask the
+registry instead:
+
+    llm = llm_clients.get(LLM_MODEL, temperature=0.3)
+
+Clients are keyed by (model, temperature, max output tokens), created once
+and shared for the life of the process, so the handful of configurations
+the app uses each keep one set of warm transports. The sync httpx pool is
+bounded by LLM_POOL_MAX_CONNECTIONS / LLM_POOL_MAX_KEEPALIVE; async calls
+use google-genai's per-event-loop session.
+
+stats() reports, per client, how often it was handed out and how many
+pooled connections are open and idle.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from niyam_guru_backend.config import (
+    GOOGLE_API_KEY,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_POOL_KEEPALIVE_SECONDS,
+)
+from niyam_guru_backend.core import metrics
+from niyam_guru_backend.core.http_pools import httpx_pool_stats
+
+
+ClientKey = Tuple[str, float, Optional[int]]     # (model, temperature, max output tokens)
+
+
+@dataclass
+class ClientEntry:
+    """A shared model client and its usage."""
+    key: ClientKey
+    llm: ChatGoogleGenerativeAI
+    created_at: float = field(default_factory=time.time)
+    uses: int = 0
+
+
+def _aiohttp_pool_stats(sessions: Dict[Any, Any]) -> Optional[dict]:
+    """Open/idle connections across google-genai's per-loop aiohttp sessions."""
+    idle = active = 0
+    for session in list(sessions.values()):
+        connector = getattr(session, "connector", None)
+        if connector is None:
+            continue
+        idle += sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        active += len(getattr(connector, "_acquired", ()))
+    if not sessions:
+        return None
+    return {"open": idle + active, "idle": idle, "active": active, "sessions": len(sessions)}
+
+
+class LLMClientRegistry:
+    """Creates each (model, temperature, max tokens) client once and shares it."""
+
+    def __init__(
+        self,
+        max_connections: int = LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive: int = LLM_POOL_MAX_KEEPALIVE,
+        keepalive_seconds: float = LLM_POOL_KEEPALIVE_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_seconds = keepalive_seconds
+        self._entries: Dict[ClientKey, ClientEntry] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, model: str, temperature: float, max_output_tokens: Optional[int]) -> ChatGoogleGenerativeAI:
+        kwargs: Dict[str, Any] = {
+            "model": model,
+            "temperature": temperature,
+            "client_args": {
+                "limits": httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_seconds,
+                ),
+            },
+        }
+        if GOOGLE_API_KEY:
+            kwargs["google_api_key"] = GOOGLE_API_KEY
+        if max_output_tokens is not None:
+            kwargs["max_output_tokens"] = max_output_tokens
+        return ChatGoogleGenerativeAI(**kwargs)
+
+    def get(
+        self,
+        model: str,
+        temperature: float,
+        max_output_tokens: Optional[int] = None,
+    ) -> ChatGoogleGenerativeAI:
+        """The shared client for this configuration, created on first use."""
+        key = (model, float(temperature), max_output_tokens)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = ClientEntry(key, self._create(model, temperature, max_output_tokens))
+                self._entries[key] = entry
+                metrics.incr("llm.clients", outcome="created", model=model)
+            else:
+                metrics.incr("llm.clients", outcome="reused", model=model)
+            entry.uses += 1
+            return entry.llm
+
+    def clear(self) -> None:
+        """Forget every client (their transports close when collected)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Registered clients with usage and connection-pool state."""
+        with self._lock:
+            entries = list(self._entries.values())
+        clients = []
+        for entry in entries:
+            api_client = getattr(entry.llm.client, "_api_client", None)
+            clients.append({
+                "model": entry.key[0],
+                "temperature": entry.key[1],
+                "max_output_tokens": entry.key[2],
+                "uses": entry.uses,
+                "age_seconds": int(time.time() - entry.created_at),
+                "sync_pool": httpx_pool_stats(getattr(api_client, "_httpx_client", None)),
+                "async_pool": (
+                    _aiohttp_pool_stats(getattr(api_client, "_aiohttp_sessions", {}))
+                    or httpx_pool_stats(getattr(api_client, "_async_httpx_client", None))
+                ),
+            })
+        return {
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive,
+                "keepalive_seconds": self.keepalive_seconds,
+            },
+            "clients": clients,
+            # Constructions avoided by sharing
+            "reuses": sum(c["uses"] for c in clients) - len(clients),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+llm_clients = LLMClientRegistry()
@@ -0,0 +1,446 @@
+"""
+LLM Gateway — static prompt-prefix caching across providers.
+
+Callers split a request into a static prefix (system prompt, statute text,
+output schema — identical across requests) and the dynamic messages that
+follow it. The gateway marks the prefix cacheable with the configured
+provider and sends only the dynamic part on subsequent calls:
+
+- gemini  Gemini explicit context caching (cachedContents); the prefix and
+          any bound tools are uploaded once per TTL and referenced by name.
+- local   Offline stand-in that keeps the prefix in memory and resends it;
+          used to exercise hit/miss and latency accounting without a key.
+- none    Pass-through.
+
+Any failure to create or use a cache falls back to a plain call with the
+full prompt, so caching never changes what the caller gets back. Concurrent
+misses on one prefix wait for a single creation instead of each creating
+(and paying for) their own cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from niyam_guru_backend.config import (
+    LLM_PREFIX_CACHE_PROVIDER,
+    LLM_PREFIX_CACHE_TTL_SECONDS,
+    LLM_PREFIX_CACHE_MIN_TOKENS,
+)
+from niyam_guru_backend.core import metrics, run_blocking
+from niyam_guru_backend.llm.tokens import estimate_tokens
+
+
+# ========== Helpers ==========
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def _tool_signature(tools: Optional[Sequence[Any]]) -> str:
+    """Stable description of a tool list, so a tool change means a new cache."""
+    if not tools:
+        return ""
+    names = []
+    for tool in tools:
+        names.append(getattr(tool, "name", None) or getattr(tool, "__name__", None) or repr(tool))
+    return ",".join(sorted(names))
+
+
+def _model_name(llm: Any) -> str:
+    return str(getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__)
+
+
+@dataclass
+class PrefixCacheEntry:
+    """A provider-side (or local) cache of one static prefix."""
+    key: str
+    handle: Any
+    prefix_tokens: int
+    expires_at: float
+    hits: int = 0
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+# ========== Providers ==========
+
+class PrefixCacheProvider:
+    """Base provider: no caching, every call carries the full prompt."""
+
+    name = "none"
+
+    def create(self, llm: Any, static_messages: List[BaseMessage], tools: Optional[list], ttl_seconds: int) -> Any:
+        return None
+
+    def invoke(self, llm: Any, handle: Any, static_messages: List[BaseMessage], messages: List[BaseMessage]):
+        raise NotImplementedError
+
+    async def ainvoke(self, llm: Any, handle: Any, static_messages: List[BaseMessage], messages: List[BaseMessage]):
+        raise NotImplementedError
+
+    def astream(self, llm: Any, handle: Any, static_messages: List[BaseMessage], messages: List[BaseMessage]):
+        raise NotImplementedError
+
+
+class GeminiContextCacheProvider(PrefixCacheProvider):
+    """Gemini explicit context caching via langchain_google_genai."""
+
+    name = "gemini"
+
+    def create(self, llm, static_messages, tools, ttl_seconds):
+        from langchain_google_genai.utils import create_context_cache
+
+        return create_context_cache(llm, static_messages, ttl=f"{ttl_seconds}s", tools=tools or None)
+
+    # Cached requests must not repeat the system instruction or tools — both
+    # live in the cache — so the unbound model is called with the tail only.
+    def invoke(self, llm, handle, static_messages, messages):
+        return llm.invoke(messages, cached_content=handle)
+
+    async def ainvoke(self, llm, handle, static_messages, messages):
+        return await llm.ainvoke(messages, cached_content=handle)
+
+    def astream(self, llm, handle, static_messages, messages):
+        return llm.astream(messages, cached_content=handle)
+
+
+class LocalPrefixCacheProvider(PrefixCacheProvider):
+    """
+    Offline stand-in for provider caching.
+
+    Keeps the prefix in process and resends it with every call, so responses
+    are identical to an uncached call. Misses optionally sleep for a simulated
+    prefill cost, which makes hit/miss latency visible in the metrics.
+    """
+
+    name = "local"
+
+    def __init__(self, prefill_seconds_per_1k_tokens: float = 0.0):
+        self.prefill_seconds_per_1k_tokens = prefill_seconds_per_1k_tokens
+
+    def create(self, llm, static_messages, tools, ttl_seconds):
+        tokens = sum(estimate_tokens(_message_text(m)) for m in static_messages)
+        if self.prefill_seconds_per_1k_tokens:
+            time.sleep(tokens / 1000 * self.prefill_seconds_per_1k_tokens)
+        return list(static_messages)
+
+    def invoke(self, llm, handle, static_messages, messages):
+        return llm.invoke(list(handle) + list(messages))
+
+    async def ainvoke(self, llm, handle, static_messages, messages):
+        return await llm.ainvoke(list(handle) + list(messages))
+
+    def astream(self, llm, handle, static_messages, messages):
+        return llm.astream(list(handle) + list(messages))
+
+
+PROVIDERS = {
+    "gemini": GeminiContextCacheProvider,
+    "local": LocalPrefixCacheProvider,
+    "none": PrefixCacheProvider,
+}
+
+
+# ========== Gateway ==========
+
+class LLMGateway:
+    """Routes LLM calls through a static-prefix cache with transparent fallback."""
+
+    # After a failed cache creation, don't retry the same prefix for this long
+    NEGATIVE_CACHE_SECONDS = 300
+
+    def __init__(
+        self,
+        provider: Optional[PrefixCacheProvider] = None,
+        ttl_seconds: int = LLM_PREFIX_CACHE_TTL_SECONDS,
+        min_prefix_tokens: int = LLM_PREFIX_CACHE_MIN_TOKENS,
+    ):
+        if provider is None:
+            provider = PROVIDERS.get(LLM_PREFIX_CACHE_PROVIDER, PrefixCacheProvider)()
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.min_prefix_tokens = min_prefix_tokens
+        self._entries: Dict[str, PrefixCacheEntry] = {}
+        self._failed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._create_locks: Dict[str, threading.Lock] = {}    # one creation per key at a time
+        self._creating: Dict[str, asyncio.Future] = {}        # in-flight async creations by key
+
+    # ------------------------------------------------------------------
+    # Cache bookkeeping
+    # ------------------------------------------------------------------
+
+    def _cache_key(self, llm: Any, static_messages: List[BaseMessage], tools: Optional[list]) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.provider.name.encode())
+        digest.update(_model_name(llm).encode())
+        digest.update(_tool_signature(tools).encode())
+        for message in static_messages:
+            digest.update(message.type.encode())
+            digest.update(_message_text(message).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cacheable(self, static_messages: List[BaseMessage], messages: List[BaseMessage]) -> Optional[int]:
+        """Prefix token count if this request can use a cache, else None."""
+        if self.provider.name == "none" or not static_messages:
+            return None
+        # Gemini rejects a system instruction alongside cached content
+        if any(isinstance(m, SystemMessage) for m in messages):
+            return None
+        tokens = sum(estimate_tokens(_message_text(m)) for m in static_messages)
+        return tokens if tokens >= self.min_prefix_tokens else None
+
+    def _lookup(self, key: str) -> Optional[PrefixCacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expired:
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def _recently_failed(self, key: str) -> bool:
+        failed_at = self._failed.get(key)
+        return failed_at is not None and time.time() - failed_at < self.NEGATIVE_CACHE_SECONDS
+
+    def _create(self, key: str, llm: Any, static_messages, tools, prefix_tokens: int) -> Optional[PrefixCacheEntry]:
+        started = time.perf_counter()
+        try:
+            handle = self.provider.create(llm, static_messages, tools, self.ttl_seconds)
+        except Exception as e:
+            print(f"⚠️ [LLMGateway] Prefix cache creation failed ({self.provider.name}): {e}")
+            self._failed[key] = time.time()
+            metrics.incr("llm.prefix_cache.errors", provider=self.provider.name, stage="create")
+            return None
+        metrics.observe("llm.prefix_cache.create_seconds", time.perf_counter() - started, provider=self.provider.name)
+        metrics.incr("llm.prefix_cache.creations", provider=self.provider.name)
+        if handle is None:
+            return None
+
+        # Expire slightly early so we never reference a cache the provider dropped
+        entry = PrefixCacheEntry(
+            key=key,
+            handle=handle,
+            prefix_tokens=prefix_tokens,
+            expires_at=time.time() + max(1, self.ttl_seconds - 60),
+        )
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _create_once(self, key: str, llm: Any, static_messages, tools, prefix_tokens: int) -> Optional[PrefixCacheEntry]:
+        """_create() unless another caller created (or failed to create) this prefix meanwhile."""
+        with self._lock:
+            key_lock = self._create_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._lookup(key)
+            if entry is None and not self._recently_failed(key):
+                entry = self._create(key, llm, static_messages, tools, prefix_tokens)
+            return entry
+
+    async def _acreate_once(self, key: str, llm: Any, static_messages, tools, prefix_tokens: int) -> Optional[PrefixCacheEntry]:
+        """Async single-flight creation; a cancelled waiter doesn't cancel it for the others."""
+        future = self._creating.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                run_blocking(self._create_once, key, llm, static_messages, tools, prefix_tokens)
+            )
+            self._creating[key] = future
+            future.add_done_callback(lambda f: self._creating.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _record(self, outcome: str, seconds: float, prefix_tokens: int = 0) -> None:
+        metrics.incr(f"llm.prefix_cache.{outcome}", provider=self.provider.name)
+        metrics.observe("llm.prefix_cache.latency_seconds", seconds, provider=self.provider.name, outcome=outcome)
+        if outcome == "hits":
+            metrics.incr("llm.prefix_cache.cached_tokens", prefix_tokens, provider=self.provider.name)
+
+    def _on_cached_call_error(self, entry: PrefixCacheEntry, error: Exception) -> None:
+        print(f"⚠️ [LLMGateway] Cached call failed, falling back to full prompt: {error}")
+        metrics.incr("llm.prefix_cache.errors", provider=self.provider.name, stage="invoke")
+        with self._lock:
+            self._entries.pop(entry.key, None)
+        self._failed[entry.key] = time.time()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def invoke(
+        self,
+        llm: Any,
+        static_messages: List[BaseMessage],
+        messages: List[BaseMessage],
+        *,
+        tools: Optional[list] = None,
+        fallback_llm: Any = None,
+    ):
+        """
+        Invoke llm on static_messages + messages, reusing a cached prefix.
+
+        Args:
+            llm: The unbound chat model (tools are attached via the cache)
+            static_messages: Prefix identical across requests
+            messages: Per-request messages that follow the prefix
+            tools: Tools bound to the request, if any
+            fallback_llm: Runnable used for uncached calls (e.g. llm.bind_tools(tools))
+        """
+        fallback = fallback_llm or llm
+        full = list(static_messages) + list(messages)
+        started = time.perf_counter()
+
+        prefix_tokens = self._cacheable(static_messages, messages)
+        if prefix_tokens is None:
+            response = fallback.invoke(full)
+            self._record("bypass", time.perf_counter() - started)
+            return response
+
+        key = self._cache_key(llm, static_messages, tools)
+        entry = self._lookup(key)
+        outcome = "hits"
+        if entry is None:
+            outcome = "misses"
+            if not self._recently_failed(key):
+                entry = self._create_once(key, llm, static_messages, tools, prefix_tokens)
+
+        if entry is not None:
+            try:
+                response = self.provider.invoke(llm, entry.handle, static_messages, messages)
+                entry.hits += outcome == "hits"
+                self._record(outcome, time.perf_counter() - started, prefix_tokens)
+                return response
+            except Exception as e:
+                self._on_cached_call_error(entry, e)
+
+        response = fallback.invoke(full)
+        self._record("fallbacks", time.perf_counter() - started)
+        return response
+
+    async def ainvoke(
+        self,
+        llm: Any,
+        static_messages: List[BaseMessage],
+        messages: List[BaseMessage],
+        *,
+        tools: Optional[list] = None,
+        fallback_llm: Any = None,
+    ):
+        """Async variant of invoke(); cache creation runs on the io pool."""
+        fallback = fallback_llm or llm
+        full = list(static_messages) + list(messages)
+        started = time.perf_counter()
+
+        prefix_tokens = self._cacheable(static_messages, messages)
+        if prefix_tokens is None:
+            response = await fallback.ainvoke(full)
+            self._record("bypass", time.perf_counter() - started)
+            return response
+
+        key = self._cache_key(llm, static_messages, tools)
+        entry = self._lookup(key)
+        outcome = "hits"
+        if entry is None:
+            outcome = "misses"
+            if not self._recently_failed(key):
+                entry = await self._acreate_once(key, llm, static_messages, tools, prefix_tokens)
+
+        if entry is not None:
+            try:
+                response = await self.provider.ainvoke(llm, entry.handle, static_messages, messages)
+                entry.hits += outcome == "hits"
+                self._record(outcome, time.perf_counter() - started, prefix_tokens)
+                return response
+            except Exception as e:
+                self._on_cached_call_error(entry, e)
+
+        response = await fallback.ainvoke(full)
+        self._record("fallbacks", time.perf_counter() - started)
+        return response
+
+    async def astream(
+        self,
+        llm: Any,
+        static_messages: List[BaseMessage],
+        messages: List[BaseMessage],
+        *,
+        tools: Optional[list] = None,
+        fallback_llm: Any = None,
+    ):
+        """
+        Streaming variant of ainvoke(); yields message chunks.
+
+        A cached stream that fails before its first chunk falls back to an
+        uncached stream. Once chunks have been yielded, errors propagate.
+        """
+        fallback = fallback_llm or llm
+        full = list(static_messages) + list(messages)
+        started = time.perf_counter()
+
+        prefix_tokens = self._cacheable(static_messages, messages)
+        if prefix_tokens is None:
+            async for chunk in fallback.astream(full):
+                yield chunk
+            self._record("bypass", time.perf_counter() - started)
+            return
+
+        key = self._cache_key(llm, static_messages, tools)
+        entry = self._lookup(key)
+        outcome = "hits"
+        if entry is None:
+            outcome = "misses"
+            if not self._recently_failed(key):
+                entry = await self._acreate_once(key, llm, static_messages, tools, prefix_tokens)
+
+        if entry is not None:
+            yielded = False
+            try:
+                async for chunk in self.provider.astream(llm, entry.handle, static_messages, messages):
+                    yielded = True
+                    yield chunk
+                entry.hits += outcome == "hits"
+                self._record(outcome, time.perf_counter() - started, prefix_tokens)
+                return
+            except Exception as e:
+                if yielded:
+                    raise
+                self._on_cached_call_error(entry, e)
+
+        async for chunk in fallback.astream(full):
+            yield chunk
+        self._record("fallbacks", time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Current cache entries and counters for this provider."""
+        with self._lock:
+            entries = [
+                {
+                    "key": e.key[:12],
+                    "prefix_tokens": e.prefix_tokens,
+                    "hits": e.hits,
+                    "expires_in_seconds": max(0, int(e.expires_at - time.time())),
+                }
+                for e in self._entries.values()
+            ]
+        counters = {
+            outcome: metrics.counter(f"llm.prefix_cache.{outcome}", provider=self.provider.name)
+            for outcome in ("hits", "misses", "fallbacks", "bypass", "creations", "cached_tokens")
+        }
+        return {"provider": self.provider.name, "ttl_seconds": self.ttl_seconds, "entries": entries, **counters}
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+llm_gateway = LLMGateway()
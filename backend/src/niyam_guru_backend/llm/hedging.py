@@ -0,0 +1,329 @@
+"""
+Deadlines and hedged requests for LLM calls.
+
+A Gemini call occasionally stalls long after its siblings have returned,
+and one such call sets the endpoint's p99. Every call site wraps its model
+call in a factory and names its endpoint:
+
+    response = await llm_hedger.ainvoke("chat", lambda: llm_gateway.ainvoke(...))
+
+- deadline  each endpoint has a hard limit (LLM_DEADLINES, 0 for none);
+            exceeding it raises LLMDeadlineExceeded
+- hedge     if the first attempt has not answered by the endpoint's
+            LLM_HEDGE_PERCENTILE attempt latency, one duplicate is sent;
+            the first successful response wins and the other attempt is
+            cancelled. A failing attempt does not end the race while the
+            other is still running.
+- budget    duplicates draw from a token bucket refilled by
+            LLM_HEDGE_BUDGET_RATIO per request, so hedging never adds more
+            than that fraction of extra load (plus a small burst)
+
+No hedging happens until LLM_HEDGE_MIN_SAMPLES attempts have been timed
+for the endpoint. Streams are hedged on their first chunk and then
+continue on the winner. Sync calls run on the "llm" pool; a losing sync
+attempt cannot be interrupted, so it finishes in the background and its
+result is dropped.
+
+Metrics per endpoint: llm.hedge.requests, .sent, .wins, .budget_exhausted,
+llm.deadline_exceeded and the llm.attempt_seconds / llm.first_chunk_seconds
+histograms the hedge delay is derived from. Attempts cancelled by the
+deadline or by losing the race are timed too (up to the cancellation), so
+the slowest calls are not left out of the percentile; a failed attempt is
+not timed.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from niyam_guru_backend.config import (
+    LLM_DEADLINES,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_BUDGET_RATIO,
+)
+from niyam_guru_backend.core import get_executor, metrics
+
+
+T = TypeVar("T")
+
+_END_OF_STREAM = object()
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """An LLM call did not complete within its endpoint's deadline."""
+
+
+class HedgeBudget:
+    """Token bucket limiting duplicate requests to a fraction of traffic."""
+
+    def __init__(self, ratio: float, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._balance = burst if ratio > 0 else 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self.burst, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class HedgedCaller:
+    """Runs LLM calls under per-endpoint deadlines with budgeted hedging."""
+
+    def __init__(
+        self,
+        deadlines: Optional[Dict[str, float]] = None,
+        enabled: bool = LLM_HEDGE_ENABLED,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        budget_ratio: float = LLM_HEDGE_BUDGET_RATIO,
+    ):
+        self.deadlines = dict(LLM_DEADLINES if deadlines is None else deadlines)
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = HedgeBudget(budget_ratio)
+        self._endpoints: set = set()
+
+    # ------------------------------------------------------------------
+    # Policy
+    # ------------------------------------------------------------------
+
+    def deadline(self, endpoint: str) -> Optional[float]:
+        return self.deadlines.get(endpoint) or None
+
+    def hedge_delay(self, endpoint: str, series: str = "llm.attempt_seconds") -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not warmed up."""
+        if not self.enabled:
+            return None
+        return metrics.percentile(series, self.percentile, min_samples=self.min_samples, endpoint=endpoint)
+
+    def _begin(self, endpoint: str) -> None:
+        self._endpoints.add(endpoint)
+        metrics.incr("llm.hedge.requests", endpoint=endpoint)
+        self.budget.deposit()
+
+    def _try_hedge(self, endpoint: str) -> bool:
+        if self.budget.withdraw():
+            metrics.incr("llm.hedge.sent", endpoint=endpoint)
+            return True
+        metrics.incr("llm.hedge.budget_exhausted", endpoint=endpoint)
+        return False
+
+    def _expired(self, endpoint: str, deadline: Optional[float]) -> LLMDeadlineExceeded:
+        metrics.incr("llm.deadline_exceeded", endpoint=endpoint)
+        return LLMDeadlineExceeded(f"LLM call for '{endpoint}' exceeded its {deadline:g}s deadline")
+
+    # ------------------------------------------------------------------
+    # Async
+    # ------------------------------------------------------------------
+
+    async def _attempt(self, endpoint: str, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            metrics.observe("llm.attempt_seconds", time.perf_counter() - started, endpoint=endpoint)
+            raise
+        metrics.observe("llm.attempt_seconds", time.perf_counter() - started, endpoint=endpoint)
+        return result
+
+    async def _race(
+        self,
+        endpoint: str,
+        start: Callable[[], Awaitable[T]],
+        delay: Optional[float],
+        discard: Optional[Callable[[T], Any]] = None,
+    ) -> T:
+        """
+        First successful result of one attempt plus (maybe) a hedge after delay.
+        discard() receives the result of an attempt that also succeeded but lost.
+        """
+        attempts = {asyncio.ensure_future(start()): False}      # task → is hedge
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done and self._try_hedge(endpoint):
+                    attempts[asyncio.ensure_future(start())] = True
+            pending, error = set(attempts), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if attempts[task]:
+                            metrics.incr("llm.hedge.wins", endpoint=endpoint)
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif task is not winner and discard and not task.cancelled() and task.exception() is None:
+                    discard(task.result())
+
+    async def ainvoke(self, endpoint: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Await call() under the endpoint's deadline, hedging a slow attempt."""
+        self._begin(endpoint)
+        deadline = self.deadline(endpoint)
+        race = self._race(endpoint, lambda: self._attempt(endpoint, call), self.hedge_delay(endpoint))
+        try:
+            return await asyncio.wait_for(race, deadline)
+        except asyncio.TimeoutError:
+            raise self._expired(endpoint, deadline) from None
+
+    async def _first_chunk(self, endpoint: str, make_stream: Callable[[], AsyncIterator]) -> tuple:
+        stream = make_stream()
+        started = time.perf_counter()
+        try:
+            chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            chunk = _END_OF_STREAM
+        except BaseException as e:
+            # Lost the race (cancelled) or failed: release the HTTP stream
+            if isinstance(e, asyncio.CancelledError):
+                metrics.observe("llm.first_chunk_seconds", time.perf_counter() - started, endpoint=endpoint)
+            await stream.aclose()
+            raise
+        metrics.observe("llm.first_chunk_seconds", time.perf_counter() - started, endpoint=endpoint)
+        return stream, chunk
+
+    async def astream(self, endpoint: str, make_stream: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """Iterate make_stream() under the deadline, hedging a slow first chunk."""
+        self._begin(endpoint)
+        deadline = self.deadline(endpoint)
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline else None
+
+        def remaining() -> Optional[float]:
+            return None if expires_at is None else max(0.0, expires_at - loop.time())
+
+        race = self._race(
+            endpoint,
+            lambda: self._first_chunk(endpoint, make_stream),
+            self.hedge_delay(endpoint, "llm.first_chunk_seconds"),
+            discard=lambda result: asyncio.ensure_future(result[0].aclose()),
+        )
+        try:
+            stream, chunk = await asyncio.wait_for(race, remaining())
+        except asyncio.TimeoutError:
+            raise self._expired(endpoint, deadline) from None
+
+        try:
+            while chunk is not _END_OF_STREAM:
+                yield chunk
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise self._expired(endpoint, deadline) from None
+        finally:
+            await stream.aclose()
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _timed_call(self, endpoint: str, call: Callable[[], T], abandoned: threading.Event) -> T:
+        started = time.perf_counter()
+        result = call()
+        # An abandoned attempt was already timed when invoke() gave up on it
+        if not abandoned.is_set():
+            metrics.observe("llm.attempt_seconds", time.perf_counter() - started, endpoint=endpoint)
+        return result
+
+    def invoke(self, endpoint: str, call: Callable[[], T]) -> T:
+        """Blocking variant of ainvoke(); attempts run on the "llm" pool."""
+        self._begin(endpoint)
+        deadline = self.deadline(endpoint)
+        expires_at = time.monotonic() + deadline if deadline else None
+
+        def remaining() -> Optional[float]:
+            return None if expires_at is None else max(0.0, expires_at - time.monotonic())
+
+        executor = get_executor("llm")
+        abandoned = threading.Event()
+        started = {}
+
+        def submit() -> Any:
+            future = executor.submit(self._timed_call, endpoint, call, abandoned)
+            started[future] = time.perf_counter()
+            return future
+
+        attempts = {submit(): False}
+        try:
+            delay = self.hedge_delay(endpoint)
+            if delay is not None:
+                limit = remaining()
+                done, _ = wait(attempts, timeout=delay if limit is None else min(delay, limit))
+                if not done and remaining() != 0 and self._try_hedge(endpoint):
+                    attempts[submit()] = True
+            pending, error = set(attempts), None
+            while pending:
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise self._expired(endpoint, deadline)
+                for future in done:
+                    if future.exception() is None:
+                        if attempts[future]:
+                            metrics.incr("llm.hedge.wins", endpoint=endpoint)
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            abandoned.set()
+            for future in attempts:
+                if not future.cancel() and not future.done():
+                    # Still running (lost or past the deadline): time it up to now
+                    metrics.observe("llm.attempt_seconds", time.perf_counter() - started[future], endpoint=endpoint)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Hedge rate (duplicates per request) and win rate (duplicates that answered first)."""
+        endpoints = {}
+        for endpoint in sorted(self._endpoints):
+            requests = metrics.counter("llm.hedge.requests", endpoint=endpoint)
+            sent = metrics.counter("llm.hedge.sent", endpoint=endpoint)
+            wins = metrics.counter("llm.hedge.wins", endpoint=endpoint)
+            endpoints[endpoint] = {
+                "deadline_seconds": self.deadline(endpoint),
+                "hedge_delay_seconds": self.hedge_delay(endpoint),
+                "stream_hedge_delay_seconds": self.hedge_delay(endpoint, "llm.first_chunk_seconds"),
+                "requests": requests,
+                "hedges_sent": sent,
+                "hedge_wins": wins,
+                "hedge_rate": round(sent / requests, 4) if requests else 0.0,
+                "win_rate": round(wins / sent, 4) if sent else 0.0,
+                "budget_exhausted": metrics.counter("llm.hedge.budget_exhausted", endpoint=endpoint),
+                "deadline_exceeded": metrics.counter("llm.deadline_exceeded", endpoint=endpoint),
+            }
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget_ratio": self.budget.ratio,
+            "endpoints": endpoints,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+llm_hedger = HedgedCaller()
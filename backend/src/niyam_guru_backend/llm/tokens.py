@@ -0,0 +1,22 @@
+"""
+Local token estimation shared by prompt budgeting and prefix caching.
+"""
+
+import math
+
+from niyam_guru_backend.config import PROMPT_CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a string.
+
+    ASCII text averages ~PROMPT_CHARS_PER_TOKEN characters per token for
+    Gemini; non-ASCII characters (Devanagari, ₹, box-drawing rules) tokenise
+    far less efficiently, so they are counted at two characters per token.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / PROMPT_CHARS_PER_TOKEN + other_chars / 2)
@@ -10,13 +10,12 @@ from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
-from supabase import create_client, Client
+from supabase import Client
 
-from niyam_guru_backend.config import (
-    LLM_MODEL,
-    SUPABASE_URL,
-    SUPABASE_KEY,
-)
+from niyam_guru_backend.config import LLM_MODEL
+from niyam_guru_backend.core import get_supabase
+from niyam_guru_backend.llm import llm_clients, llm_hedger
+from niyam_guru_backend.simulation.evidence_store import evidence_fact_store, evidence_facts_text
 
 
 # ========== Data Classes ==========
@@ -41,10 +40,11 @@ class UserResponse:
 # ========== Supabase Functions ==========
 
 def get_supabase_client() -> Client:
-    """Get Supabase client."""
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    """Get the shared Supabase client."""
+    client = get_supabase()
+    if client is None:
         raise ValueError("Supabase credentials not configured")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return client
 
 
 def fetch_prediction_from_supabase(prediction_id: str) -> Optional[Dict[str, Any]]:
@@ -97,10 +97,7 @@ def update_prediction_in_supabase(
 
 def get_llm() -> ChatGoogleGenerativeAI:
     """Get the LLM instance."""
-    return ChatGoogleGenerativeAI(
-        model=LLM_MODEL,
-        temperature=0.3,  # Lower temperature for more focused questions
-    )
+    return llm_clients.get(LLM_MODEL, temperature=0.3)  # Lower temperature for more focused questions
 
 
 GENERATE_QUESTIONS_PROMPT = PromptTemplate(
@@ -177,7 +174,7 @@ def generate_clarifying_questions(
             prediction_summary=prediction_summary
         )
         
-        response = llm.invoke(prompt)
+        response = llm_hedger.invoke("questions", lambda: llm.invoke(prompt))
         content = response.content
         
         # Parse JSON response
@@ -245,6 +242,13 @@ def _build_case_summary(prediction_data: Dict[str, Any]) -> str:
     if prediction_json.get("deficiency_type"):
         parts.append(f"**Deficiency Type:** {prediction_json['deficiency_type']}")
     
+    # Facts extracted from the uploaded documents when the prediction was made
+    evidence_hashes = [e.get("sha256") for e in prediction_json.get("_evidence") or [] if isinstance(e, dict)]
+    if evidence_hashes:
+        facts = evidence_fact_store.get_many(evidence_hashes)
+        if facts:
+            parts.append(f"**Documentary Evidence:**\n{evidence_facts_text(facts.values())}")
+    
     return "\n".join(parts) if parts else "Case details not available"
 
 
@@ -394,7 +398,7 @@ def process_user_responses(
             qa_session=qa_session
         )
         
-        response = llm.invoke(prompt)
+        response = llm_hedger.invoke("questions", lambda: llm.invoke(prompt))
         content = response.content
         
         # Parse JSON response
@@ -0,0 +1,272 @@
+"""
+Statute Index — in-memory lookup structures over consumer_laws.csv.
+
+Built once per process from CONSUMER_LAWS_CSV and shared by the law lookup
+API, the chat assistant and the prediction engine:
+
+- identifier hash map   "Section 2 (7)" / "2(7)" / "s. 35"  → section row(s)
+- chapter tree          Chapter → Section number → sub-sections (CSV order)
+- inverted index        token → {section key: term frequency} for full-text search
+
+Everything is precomputed at build time so lookups are plain dict reads.
+"""
+
+import csv
+import hashlib
+import math
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from niyam_guru_backend.config import CONSUMER_LAWS_CSV
+
+
+# ========== Identifier Normalisation ==========
+
+# Accepts "Section 2 (7)", "section 2(7)", "Sec. 35", "s.35", "2-7", "2.7", "35"
+_IDENTIFIER_RE = re.compile(
+    r"^\s*(?:sections?|sec|s)?\.?\s*(\d+[a-z]?)\s*"
+    r"(?:\(\s*([0-9a-z]+)\s*\)|[-./\s]+([0-9a-z]+))?\s*$",
+    re.IGNORECASE,
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "any", "are", "as", "at", "be", "by", "for", "from",
+    "in", "is", "it", "of", "on", "or", "such", "that", "the", "this", "to",
+    "under", "which", "with", "shall", "may",
+})
+
+
+def normalize_identifier(identifier: str) -> Optional[str]:
+    """
+    Normalise a user-supplied section reference to the index key.
+
+    "Section 2 (7)" → "2(7)", "Sec. 35" → "35". Returns None when the
+    string does not look like a section reference at all.
+    """
+    if not identifier:
+        return None
+    match = _IDENTIFIER_RE.match(identifier)
+    if not match:
+        return None
+    number = match.group(1).upper()
+    sub = match.group(2) or match.group(3)
+    return f"{number}({sub.lower()})" if sub else number
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens with common legal filler words removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# ========== Data Classes ==========
+
+@dataclass
+class StatuteSection:
+    """A single row of consumer_laws.csv (a section or sub-section)."""
+    key: str                    # Normalised identifier, e.g. "2(7)"
+    identifier: str             # As written in the CSV, e.g. "Section 2 (7)"
+    section_number: str         # e.g. "2"
+    sub_section: Optional[str]  # e.g. "7", or None for whole sections
+    chapter_number: str
+    chapter_title: str
+    title: str
+    text: str
+
+    def to_dict(self) -> dict:
+        return {
+            "key": self.key,
+            "identifier": self.identifier,
+            "section_number": self.section_number,
+            "sub_section": self.sub_section,
+            "chapter_number": self.chapter_number,
+            "chapter_title": self.chapter_title,
+            "title": self.title,
+            "text": self.text,
+        }
+
+
+@dataclass
+class ChapterNode:
+    """A chapter of the Act with its sections in statute order."""
+    number: str
+    title: str
+    # section number → ordered list of section keys belonging to it
+    sections: "OrderedDict[str, List[str]]" = field(default_factory=OrderedDict)
+
+
+# ========== Index ==========
+
+class StatuteIndex:
+    """Precomputed lookup structures over the Consumer Protection Act, 2019."""
+
+    SEARCH_CACHE_SIZE = 512
+
+    def __init__(self, sections: List[StatuteSection], version: str):
+        self.version = version
+        self._sections: Dict[str, StatuteSection] = OrderedDict()
+        self._by_number: Dict[str, List[str]] = OrderedDict()
+        self._chapters: Dict[str, ChapterNode] = OrderedDict()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._idf: Dict[str, float] = {}
+        self._avg_doc_length = 0.0
+        self._search_cache: "OrderedDict[Tuple[str, int], List[Tuple[str, float]]]" = OrderedDict()
+
+        for section in sections:
+            self._add(section)
+        self._finalise_search_index()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_csv(cls, csv_path: Union[str, Path] = CONSUMER_LAWS_CSV) -> "StatuteIndex":
+        """Build the index from the processed consumer_laws.csv file."""
+        raw = Path(csv_path).read_bytes()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        sections: List[StatuteSection] = []
+        reader = csv.DictReader(raw.decode("utf-8-sig").splitlines())
+        for row in reader:
+            identifier = (row.get("Section_Identifier") or "").strip()
+            key = normalize_identifier(identifier)
+            if not key:
+                continue
+            number, _, sub = key.partition("(")
+            sections.append(StatuteSection(
+                key=key,
+                identifier=identifier,
+                section_number=number,
+                sub_section=sub.rstrip(")") or None,
+                chapter_number=(row.get("Chapter_Number") or "").strip(),
+                chapter_title=(row.get("Chapter_Title") or "").strip(),
+                title=(row.get("Section_Title") or "").strip(),
+                text=(row.get("Section_Text") or "").strip(),
+            ))
+        return cls(sections, version)
+
+    def _add(self, section: StatuteSection) -> None:
+        # Later duplicates of the same identifier are kept as continuation text
+        if section.key in self._sections:
+            existing = self._sections[section.key]
+            existing.text = f"{existing.text}\n{section.text}"
+        else:
+            self._sections[section.key] = section
+            self._by_number.setdefault(section.section_number, []).append(section.key)
+
+            chapter = self._chapters.get(section.chapter_number)
+            if chapter is None:
+                chapter = ChapterNode(number=section.chapter_number, title=section.chapter_title)
+                self._chapters[section.chapter_number] = chapter
+            chapter.sections.setdefault(section.section_number, []).append(section.key)
+
+    def _finalise_search_index(self) -> None:
+        for key, section in self._sections.items():
+            tokens = tokenize(f"{section.title} {section.text}")
+            self._doc_lengths[key] = len(tokens)
+            for token, tf in Counter(tokens).items():
+                self._postings.setdefault(token, {})[key] = tf
+
+        n_docs = len(self._sections) or 1
+        self._avg_doc_length = (sum(self._doc_lengths.values()) / n_docs) if self._doc_lengths else 0.0
+        for token, postings in self._postings.items():
+            df = len(postings)
+            self._idf[token] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def get(self, identifier: str) -> Optional[StatuteSection]:
+        """Exact lookup of a section or sub-section ("2(7)", "Section 35")."""
+        key = normalize_identifier(identifier)
+        return self._sections.get(key) if key else None
+
+    def get_group(self, identifier: str) -> List[StatuteSection]:
+        """
+        Resolve an identifier to every row it covers.
+
+        "Section 2 (7)" returns that one sub-section; "Section 35" returns
+        Section 35 itself or, when the CSV only has sub-sections, all of them.
+        """
+        key = normalize_identifier(identifier)
+        if not key:
+            return []
+        if key in self._sections:
+            section = self._sections[key]
+            if section.sub_section is not None:
+                return [section]
+        number = key.partition("(")[0]
+        return [self._sections[k] for k in self._by_number.get(number, [])]
+
+    def chapters(self) -> List[dict]:
+        """The chapter tree as plain dicts (for JSON responses)."""
+        return [
+            {
+                "chapter_number": chapter.number,
+                "chapter_title": chapter.title,
+                "sections": [
+                    {
+                        "section_number": number,
+                        "title": self._sections[keys[0]].title,
+                        "keys": list(keys),
+                    }
+                    for number, keys in chapter.sections.items()
+                ],
+            }
+            for chapter in self._chapters.values()
+        ]
+
+    # ------------------------------------------------------------------
+    # Full-text search (BM25 over the inverted index)
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[StatuteSection, float]]:
+        """Rank sections against a free-text query. Results are memoised per query."""
+        terms = tuple(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        cache_key = (" ".join(terms), limit)
+        cached = self._search_cache.get(cache_key)
+        if cached is None:
+            cached = self._rank(terms, limit)
+            self._search_cache[cache_key] = cached
+            if len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        else:
+            self._search_cache.move_to_end(cache_key)
+
+        return [(self._sections[key], score) for key, score in cached]
+
+    def _rank(self, terms: Tuple[str, ...], limit: int) -> List[Tuple[str, float]]:
+        k1, b = 1.2, 0.75
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for key, tf in postings.items():
+                norm = k1 * (1 - b + b * self._doc_lengths[key] / (self._avg_doc_length or 1))
+                scores[key] = scores.get(key, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        return [(key, round(score, 4)) for key, score in ranked[:limit]]
+
+
+@lru_cache(maxsize=1)
+def get_statute_index() -> StatuteIndex:
+    """Return the process-wide StatuteIndex, building it on first use."""
+    index = StatuteIndex.from_csv(CONSUMER_LAWS_CSV)
+    print(f"✅ Statute index built ({len(index)} sections, version {index.version})")
+    return index
@@ -0,0 +1,184 @@
+"""
+Evidence preprocessing for multimodal predictions.
+
+Uploaded evidence is shrunk before it is sent to Gemini:
+
+- images   EXIF orientation applied, metadata stripped, downsized so the
+           longest side is at most EVIDENCE_IMAGE_MAX_SIDE and re-encoded
+           as JPEG at EVIDENCE_IMAGE_QUALITY
+- PDFs     the text layer is extracted with PyMuPDF; only pages with less
+           than EVIDENCE_PDF_MIN_TEXT_CHARS of text (scans, photos) are
+           rasterised, at the same size limit
+
+Each file is processed by prepare_evidence(), a pure bytes-in / parts-out
+function that runs on the "cpu" process pool, so decoding and re-encoding
+never holds the event loop or the GIL. A file that cannot be processed is
+passed through unchanged.
+
+Token figures are estimates using Gemini's accounting: 258 tokens per image
+up to 384 px, otherwise 258 per 768 px tile, and 258 per PDF page.
+"""
+
+import io
+import math
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+from niyam_guru_backend.config import (
+    EVIDENCE_IMAGE_MAX_SIDE,
+    EVIDENCE_IMAGE_QUALITY,
+    EVIDENCE_PDF_MIN_TEXT_CHARS,
+)
+from niyam_guru_backend.llm.tokens import estimate_tokens
+
+
+IMAGE_TILE_TOKENS = 258
+PDF_PAGE_TOKENS = 258
+
+
+@dataclass
+class PreparedPart:
+    """One piece of a preprocessed file: an image to attach or extracted text."""
+    mime_type: str
+    data: bytes = b""
+    text: str = ""
+    label: str = ""
+
+
+@dataclass
+class EvidenceStats:
+    """Before/after figures for one file."""
+    name: str
+    action: str                 # image | pdf_text | pdf_mixed | pdf_rasterized | passthrough
+    original_bytes: int
+    prepared_bytes: int
+    tokens_before: int
+    tokens_after: int
+    pages: int = 0
+    rasterized_pages: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class EvidenceReport:
+    """Savings across every file of a request."""
+    files: List[EvidenceStats] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        original = sum(f.original_bytes for f in self.files)
+        prepared = sum(f.prepared_bytes for f in self.files)
+        return {
+            "original_bytes": original,
+            "prepared_bytes": prepared,
+            "bytes_saved": original - prepared,
+            "estimated_tokens_before": sum(f.tokens_before for f in self.files),
+            "estimated_tokens_after": sum(f.tokens_after for f in self.files),
+            "files": [asdict(f) for f in self.files],
+        }
+
+
+def image_tokens(width: int, height: int) -> int:
+    """Estimated Gemini tokens for an image of the given size."""
+    if width <= 384 and height <= 384:
+        return IMAGE_TILE_TOKENS
+    return math.ceil(width / 768) * math.ceil(height / 768) * IMAGE_TILE_TOKENS
+
+
+def _encode_jpeg(image, quality: int) -> bytes:
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white (receipts and screenshots)
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    # No exif= argument, so no metadata is written
+    image.save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def _prepare_image(name: str, data: bytes, max_side: int, quality: int) -> Tuple[List[PreparedPart], EvidenceStats]:
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as opened:
+        before = image_tokens(*opened.size)
+        image = ImageOps.exif_transpose(opened)
+        image.thumbnail((max_side, max_side))
+        encoded = _encode_jpeg(image, quality)
+        after = image_tokens(*image.size)
+    parts = [PreparedPart(mime_type="image/jpeg", data=encoded, label=name)]
+    return parts, EvidenceStats(name, "image", len(data), len(encoded), before, after)
+
+
+def _prepare_pdf(
+    name: str, data: bytes, max_side: int, quality: int, min_text_chars: int
+) -> Tuple[List[PreparedPart], EvidenceStats]:
+    import fitz  # PyMuPDF
+
+    texts, parts = [], []
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        page_count = pdf.page_count
+        for page in pdf:
+            text = page.get_text("text").strip()
+            if len(text) >= min_text_chars:
+                texts.append(f"--- Page {page.number + 1} ---\n{text}")
+                continue
+            # No usable text layer: rasterise so the longest side fits max_side
+            zoom = min(2.0, max_side / max(page.rect.width, page.rect.height))
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            parts.append(PreparedPart(
+                mime_type="image/jpeg",
+                data=pixmap.tobytes("jpeg", jpg_quality=quality),
+                label=f"{name} (page {page.number + 1})",
+            ))
+
+    text_tokens = 0
+    if texts:
+        extracted = "\n\n".join(texts)
+        text_tokens = estimate_tokens(extracted)
+        parts.insert(0, PreparedPart(mime_type="text/plain", text=extracted, label=name))
+
+    rasterized = len(parts) - (1 if texts else 0)
+    action = "pdf_text" if not rasterized else ("pdf_rasterized" if not texts else "pdf_mixed")
+    prepared_bytes = sum(len(p.data) + len(p.text.encode("utf-8")) for p in parts)
+    return parts, EvidenceStats(
+        name=name,
+        action=action,
+        original_bytes=len(data),
+        prepared_bytes=prepared_bytes,
+        tokens_before=page_count * PDF_PAGE_TOKENS,
+        tokens_after=text_tokens + rasterized * PDF_PAGE_TOKENS,
+        pages=page_count,
+        rasterized_pages=rasterized,
+    )
+
+
+def prepare_evidence(
+    name: str,
+    mime_type: str,
+    data: bytes,
+    max_side: int = EVIDENCE_IMAGE_MAX_SIDE,
+    quality: int = EVIDENCE_IMAGE_QUALITY,
+    min_text_chars: int = EVIDENCE_PDF_MIN_TEXT_CHARS,
+) -> Tuple[List[PreparedPart], EvidenceStats]:
+    """
+    Shrink one uploaded file. Returns the parts to attach in its place and
+    the before/after figures. Safe to run in a worker process.
+    """
+    try:
+        if mime_type.startswith("image/"):
+            return _prepare_image(name, data, max_side, quality)
+        if mime_type == "application/pdf":
+            return _prepare_pdf(name, data, max_side, quality, min_text_chars)
+        error = None
+    except Exception as e:
+        error = str(e)
+    # Unsupported or undecodable: send as uploaded
+    return (
+        [PreparedPart(mime_type=mime_type, data=data, label=name)],
+        EvidenceStats(name, "passthrough", len(data), len(data), 0, 0, error=error),
+    )
@@ -0,0 +1,273 @@
+"""
+Content-addressed store of facts extracted from uploaded evidence.
+
+Every uploaded file is identified by the SHA-256 of its bytes. The first
+time a file is seen with a multimodal prediction, a small extraction call
+records its structured facts (amounts, dates, invoice numbers, parties)
+under that hash. Later stages read the facts as compact text instead of
+re-sending the file:
+
+- re-prediction   when every attached file already has facts, the
+                  prediction runs text-only on the facts (EVIDENCE_FACTS_REUSE)
+- judge questions the case summary lists the facts for the prediction's files
+- simulation      the courtroom case file lists them under the evidence on record
+
+Predictions reference their files in "_evidence" ({sha256, name, category,
+file_type}); the facts themselves live here, in SQLite at
+EVIDENCE_FACTS_DB_PATH with an in-memory LRU in front (memory only if the
+database cannot be opened).
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.messages import HumanMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from niyam_guru_backend.config import EVIDENCE_FACTS_DB_PATH, EVIDENCE_FACTS_MODEL
+from niyam_guru_backend.core import metrics
+from niyam_guru_backend.llm import llm_clients, llm_hedger
+
+
+# ========== Facts ==========
+
+@dataclass
+class EvidenceFacts:
+    """Structured facts extracted from one evidence file."""
+    sha256: str
+    name: str = ""
+    category: str = ""
+    file_type: str = ""
+    document_type: str = ""                              # e.g. invoice, warranty card, email
+    amounts: List[str] = field(default_factory=list)     # "Rs. 25,000 (invoice total)"
+    dates: List[str] = field(default_factory=list)       # "2024-12-14 (date of purchase)"
+    invoice_numbers: List[str] = field(default_factory=list)
+    parties: List[str] = field(default_factory=list)     # "ABC Electronics Pvt. Ltd. (seller)"
+    summary: str = ""
+    model: str = ""
+    extracted_at: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EvidenceFacts":
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def to_text(self) -> str:
+        """Compact block for prompts."""
+        label = f"{self.category}: {self.name}" if self.category else self.name
+        if self.document_type:
+            label += f" [{self.document_type}]"
+        lines = [f"- {label}"]
+        for title, values in (
+            ("Amounts", self.amounts),
+            ("Dates", self.dates),
+            ("Invoice/Reference Nos", self.invoice_numbers),
+            ("Parties", self.parties),
+        ):
+            if values:
+                lines.append(f"  {title}: {'; '.join(values)}")
+        if self.summary:
+            lines.append(f"  Summary: {self.summary}")
+        return "\n".join(lines)
+
+
+def evidence_facts_text(facts: Iterable[EvidenceFacts]) -> str:
+    """Facts for several files as one prompt section ('' when there are none)."""
+    blocks = [f.to_text() for f in facts]
+    if not blocks:
+        return ""
+    return "【 EVIDENCE FACTS (extracted from the uploaded documents) 】\n" + "\n".join(blocks)
+
+
+# ========== Store ==========
+
+class EvidenceFactStore:
+    """SHA-256 → EvidenceFacts, durable in SQLite with an LRU cache in front."""
+
+    def __init__(self, path: Optional[str] = EVIDENCE_FACTS_DB_PATH, max_cached: int = 1024):
+        self.path = str(path) if path else None
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, EvidenceFacts]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_ready: Optional[bool] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db_ready is False or not self.path:
+            return None
+        try:
+            if self._db_ready is None:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            if self._db_ready is None:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS evidence_facts ("
+                    " sha256 TEXT PRIMARY KEY,"
+                    " extracted_at TEXT NOT NULL,"
+                    " facts TEXT NOT NULL)"
+                )
+                self._db_ready = True
+            return conn
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not open evidence facts database, keeping facts in memory: {e}")
+            self._db_ready = False
+            return None
+
+    def _remember(self, facts: EvidenceFacts) -> None:
+        with self._lock:
+            self._cache[facts.sha256] = facts
+            self._cache.move_to_end(facts.sha256)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, EvidenceFacts]:
+        """Facts for every known hash among the given ones (blocking)."""
+        wanted = [h for h in dict.fromkeys(hashes) if h]
+        found: Dict[str, EvidenceFacts] = {}
+        with self._lock:
+            for sha in wanted:
+                if sha in self._cache:
+                    self._cache.move_to_end(sha)
+                    found[sha] = self._cache[sha]
+        missing = [sha for sha in wanted if sha not in found]
+        if missing:
+            rows = []
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    with conn:
+                        rows = conn.execute(
+                            f"SELECT facts FROM evidence_facts WHERE sha256 IN ({','.join('?' * len(missing))})",
+                            missing,
+                        ).fetchall()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Evidence facts lookup failed: {e}")
+                finally:
+                    conn.close()
+                for (raw,) in rows:
+                    facts = EvidenceFacts.from_dict(json.loads(raw))
+                    self._remember(facts)
+                    found[facts.sha256] = facts
+        metrics.incr("evidence.facts", len(found), outcome="hit")
+        metrics.incr("evidence.facts", len(wanted) - len(found), outcome="miss")
+        return found
+
+    def get(self, sha256: str) -> Optional[EvidenceFacts]:
+        return self.get_many([sha256]).get(sha256)
+
+    def put(self, facts: EvidenceFacts) -> None:
+        """Record facts for a file (blocking)."""
+        self._remember(facts)
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO evidence_facts (sha256, extracted_at, facts) VALUES (?, ?, ?)",
+                    (facts.sha256, facts.extracted_at, json.dumps(facts.to_dict())),
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not persist evidence facts for {facts.name}: {e}")
+        finally:
+            conn.close()
+
+
+# ========== Extraction ==========
+
+EXTRACTION_PROMPT = """You are reading ONE document submitted as evidence in an Indian consumer complaint.
+Extract only facts that are actually visible in the document. Do not guess.
+
+Respond with ONLY a JSON object (no markdown):
+{
+  "document_type": "<invoice | receipt | warranty card | email | letter | photo | bank statement | other>",
+  "amounts": ["<amount with currency> (<what it is>)"],
+  "dates": ["<YYYY-MM-DD or as written> (<what happened>)"],
+  "invoice_numbers": ["<invoice, order, ticket or reference number>"],
+  "parties": ["<name> (<role: buyer, seller, manufacturer, service centre, bank, ...>)"],
+  "summary": "<one sentence on what the document shows>"
+}
+Use empty lists when a kind of fact is absent."""
+
+
+def _extraction_llm() -> ChatGoogleGenerativeAI:
+    return llm_clients.get(EVIDENCE_FACTS_MODEL, temperature=0)
+
+
+def _extraction_message(content_parts: List[dict]) -> HumanMessage:
+    return HumanMessage(content=[{"type": "text", "text": EXTRACTION_PROMPT}, *content_parts])
+
+
+def _parse_facts(text: str, sha256: str, name: str, category: str, file_type: str) -> EvidenceFacts:
+    if "```" in text:
+        text = text.split("```json")[-1] if "```json" in text else text.split("```")[1]
+        text = text.split("```")[0]
+    data = json.loads(text.strip())
+
+    def strings(key: str) -> List[str]:
+        return [str(v) for v in (data.get(key) or []) if str(v).strip()]
+
+    return EvidenceFacts(
+        sha256=sha256,
+        name=name,
+        category=category,
+        file_type=file_type,
+        document_type=str(data.get("document_type") or ""),
+        amounts=strings("amounts"),
+        dates=strings("dates"),
+        invoice_numbers=strings("invoice_numbers"),
+        parties=strings("parties"),
+        summary=str(data.get("summary") or ""),
+        model=EVIDENCE_FACTS_MODEL,
+        extracted_at=datetime.now().isoformat(),
+    )
+
+
+def extract_evidence_facts(
+    sha256: str, name: str, category: str, file_type: str, content_parts: List[dict]
+) -> Optional[EvidenceFacts]:
+    """Extract facts from one file's content parts; None if the call or parse fails."""
+    try:
+        llm = _extraction_llm()
+        response = llm_hedger.invoke("evidence_facts", lambda: llm.invoke([_extraction_message(content_parts)]))
+        facts = _parse_facts(response.content, sha256, name, category, file_type)
+    except Exception as e:
+        print(f"⚠️ Evidence fact extraction failed for {name}: {e}")
+        metrics.incr("evidence.facts_extractions", outcome="error")
+        return None
+    metrics.incr("evidence.facts_extractions", outcome="ok")
+    return facts
+
+
+async def aextract_evidence_facts(
+    sha256: str, name: str, category: str, file_type: str, content_parts: List[dict]
+) -> Optional[EvidenceFacts]:
+    """Async variant of extract_evidence_facts()."""
+    try:
+        llm = _extraction_llm()
+        response = await llm_hedger.ainvoke(
+            "evidence_facts", lambda: llm.ainvoke([_extraction_message(content_parts)])
+        )
+        facts = _parse_facts(response.content, sha256, name, category, file_type)
+    except Exception as e:
+        print(f"⚠️ Evidence fact extraction failed for {name}: {e}")
+        metrics.incr("evidence.facts_extractions", outcome="error")
+        return None
+    metrics.incr("evidence.facts_extractions", outcome="ok")
+    return facts
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+evidence_fact_store = EvidenceFactStore()
@@ -0,0 +1,187 @@
+"""
+Request deduplication for predictions.
+
+Identical prediction requests (frontend retries, double clicks) are keyed by
+a canonical hash of the form data plus the SHA-256 of every attached file:
+
+- single-flight   concurrent identical requests await one shared computation
+- TTL cache       successful results are replayed for PREDICTION_IDEMPOTENCY_TTL_SECONDS
+
+A client-supplied Idempotency-Key header replaces the content hash as the
+key; reusing a key with a different body is rejected.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from niyam_guru_backend.config import (
+    PREDICTION_IDEMPOTENCY_TTL_SECONDS,
+    PREDICTION_IDEMPOTENCY_MAX_ENTRIES,
+)
+from niyam_guru_backend.core import metrics
+
+
+# Outcomes reported alongside a result
+COMPUTED = "computed"   # this request ran the computation
+JOINED = "joined"       # waited on an identical in-flight request
+REPLAYED = "replayed"   # served from the TTL cache
+
+
+class IdempotencyConflictError(Exception):
+    """An Idempotency-Key was reused with a different request body."""
+
+
+# ========== Canonical Hashing ==========
+
+def file_content_hash(content_b64: str) -> str:
+    """SHA-256 of a base64 file's decoded bytes (a data URI prefix is ignored)."""
+    if "," in content_b64:
+        content_b64 = content_b64.split(",", 1)[1]
+    try:
+        raw = base64.b64decode(content_b64, validate=False)
+    except (binascii.Error, ValueError):
+        raw = content_b64.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def request_fingerprint(
+    form_data: dict,
+    file_data: Optional[List[dict]] = None,
+    user_id: Optional[str] = None,
+    save_to_db: bool = True,
+) -> str:
+    """
+    Canonical hash of a prediction request.
+
+    Form values are whitespace-trimmed and serialised with sorted keys; files
+    contribute their metadata and content hash in upload order (the order in
+    which they are shown to the model); streamed uploads arrive already hashed.
+    """
+    canonical_form = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in sorted((form_data or {}).items())
+    }
+    files = [
+        {
+            "name": f.get("name"),
+            "category": f.get("category"),
+            "file_type": f.get("file_type"),
+            "sha256": f.get("sha256") or file_content_hash(f.get("content", "")),
+        }
+        for f in (file_data or [])
+    ]
+    payload = json.dumps(
+        {"form": canonical_form, "files": files, "user_id": user_id, "save_to_db": save_to_db},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ========== Single-Flight + TTL Cache ==========
+
+class IdempotencyCache:
+    """Shares in-flight computations and replays recent results by key."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int = PREDICTION_IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = PREDICTION_IDEMPOTENCY_MAX_ENTRIES,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()  # key → (expires, fingerprint, result)
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+    def _cached(self, key: str) -> Optional[Tuple[str, Any]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, fingerprint, result = entry
+        if time.time() >= expires_at:
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return fingerprint, result
+
+    def _store(self, key: str, fingerprint: str, result: Any) -> None:
+        self._results[key] = (time.time() + self.ttl_seconds, fingerprint, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _check(key: str, fingerprint: str, stored_fingerprint: str) -> None:
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyConflictError(
+                f"Idempotency key '{key}' was already used with a different request"
+            )
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda result: True,
+    ) -> Tuple[Any, str]:
+        """
+        Return (result, outcome) for key, computing it at most once at a time.
+
+        The computation runs as its own task, so a caller that disconnects does
+        not cancel it for the others waiting on the same key. Only results for
+        which cacheable(result) is true are kept for replay.
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            self._check(key, fingerprint, cached[0])
+            metrics.incr("idempotency.requests", cache=self.name, outcome=REPLAYED)
+            return cached[1], REPLAYED
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self._check(key, fingerprint, in_flight[0])
+            metrics.incr("idempotency.requests", cache=self.name, outcome=JOINED)
+            return await asyncio.shield(in_flight[1]), JOINED
+
+        task = asyncio.create_task(compute())
+        self._in_flight[key] = (fingerprint, task)
+        # Registered before any waiter, so the result is stored before they resume
+        task.add_done_callback(lambda done: self._finish(key, fingerprint, done, cacheable))
+        metrics.incr("idempotency.requests", cache=self.name, outcome=COMPUTED)
+        return await asyncio.shield(task), COMPUTED
+
+    def forget(self, key: str) -> None:
+        """Drop a replayable result so the next request recomputes it."""
+        self._results.pop(key, None)
+
+    def _finish(self, key: str, fingerprint: str, task: asyncio.Task, cacheable: Callable[[Any], bool]) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if cacheable(result):
+            self._store(key, fingerprint, result)
+
+
+def idempotency_key(fingerprint: str, header_key: Optional[str], user_id: Optional[str]) -> str:
+    """Cache key: the client's Idempotency-Key (scoped per user) or the content hash."""
+    if header_key:
+        return f"key:{user_id or ''}:{header_key.strip()}"
+    return f"hash:{fingerprint}"
+
+
+# ---------------------------------------------------------------------------
+# Singletons
+# ---------------------------------------------------------------------------
+
+prediction_idempotency = IdempotencyCache("prediction")
+prediction_job_idempotency = IdempotencyCache("prediction_job")
@@ -1,20 +1,25 @@
 # LangChain + Google Gemini imports
+import asyncio
+import copy
 import json
 import os
 import base64
+import hashlib
+import io
+import mmap
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, TypedDict, Union
+from typing import BinaryIO, Callable, Optional, List, TypedDict, Union
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.prompts import PromptTemplate
-from langchain_core.messages import HumanMessage
-from langchain_classic.chains.retrieval_qa.base import RetrievalQA
-from supabase import create_client, Client
+from langchain_core.messages import HumanMessage, SystemMessage
+from supabase import Client
 
 # Import configuration from settings
 from niyam_guru_backend.config import (
@@ -25,6 +30,38 @@ from niyam_guru_backend.config import (
     DATA_DIR,
     SUPABASE_URL,
     SUPABASE_KEY,
+    PROMPT_BUDGET_CPA_TOKENS,
+    PROMPT_BUDGET_SIMILAR_CASES_TOKENS,
+    PROMPT_BUDGET_CASE_TOKENS,
+    PROMPT_BUDGET_VALIDATION_TOKENS,
+    EVIDENCE_PREPROCESS_ENABLED,
+    EVIDENCE_FACTS_ENABLED,
+    EVIDENCE_FACTS_REUSE,
+)
+from niyam_guru_backend.core import StageGraph, get_supabase, metrics, run_blocking
+from niyam_guru_backend.llm import llm_clients, llm_gateway, llm_hedger
+from niyam_guru_backend.simulation.stream_parser import JsonSectionStreamer
+from niyam_guru_backend.simulation.evidence import EvidenceReport, prepare_evidence
+from niyam_guru_backend.simulation.evidence_store import (
+    aextract_evidence_facts,
+    evidence_fact_store,
+    evidence_facts_text,
+    extract_evidence_facts,
+)
+from niyam_guru_backend.simulation.semantic_cache import (
+    SemanticProbe,
+    amount_bucket,
+    normalize_party,
+    prediction_semantic_cache,
+    repersonalize,
+)
+from niyam_guru_backend.simulation.prompt_budget import (
+    BudgetReport,
+    PromptBudgeter,
+    PromptSegment,
+    DROP_ITEMS,
+    TRUNCATE_MIDDLE,
+    TRUNCATE_TAIL,
 )
 
 
@@ -99,6 +136,38 @@ class UploadedDocument:
     file_path: Optional[str] = None  # Path to the file on disk
     file_content: Optional[bytes] = None  # Raw file content
     base64_content: Optional[str] = None  # Base64 encoded content for images
+    file_handle: Optional[BinaryIO] = None  # Spooled upload (streamed multipart requests)
+    sha256: Optional[str] = None  # Content hash, when computed during upload
+    extracted_text: Optional[str] = None  # Text layer of a preprocessed PDF (sent instead of the file)
+
+    def buffer(self) -> memoryview:
+        """
+        The raw bytes without copying where possible: the spooled buffer or
+        a read-only mmap of the spool file. Release the view (use it in a
+        with block) before the handle is closed.
+        """
+        if self.file_handle is not None:
+            spooled = getattr(self.file_handle, "_file", self.file_handle)
+            if isinstance(spooled, io.BytesIO):
+                return spooled.getbuffer()
+            try:
+                return memoryview(mmap.mmap(spooled.fileno(), 0, access=mmap.ACCESS_READ))
+            except (ValueError, OSError, io.UnsupportedOperation):
+                # Empty file or no real descriptor
+                self.file_handle.seek(0)
+                return memoryview(self.file_handle.read())
+        if self.file_content is not None:
+            return memoryview(self.file_content)
+        if self.base64_content:
+            return memoryview(base64.b64decode(self.base64_content))
+        return memoryview(b"")
+
+    def to_base64(self) -> str:
+        """Base64 for the provider request — the only place raw uploads are encoded."""
+        if self.base64_content:
+            return self.base64_content
+        with self.buffer() as view:
+            return base64.b64encode(view).decode("ascii")
 
 
 @dataclass
@@ -209,6 +278,51 @@ class ValidationReport:
     total_penalty: int                  # Sum of all penalties (capped at 70)
     summary: str                        # One-paragraph text summary for prompt injection
 
+    def to_dict(self) -> dict:
+        """Serialisable form for API responses and progress events."""
+        return {
+            "completeness_score": round(self.completeness_score, 2),
+            "document_score": round(self.document_score, 2),
+            "contradiction_score": round(self.contradiction_score, 2),
+            "max_confidence_cap": self.max_confidence_cap,
+            "total_penalty_points": self.total_penalty,
+            "issues": [
+                {
+                    "category": i.category,
+                    "severity": i.severity,
+                    "field": i.field,
+                    "message": i.message,
+                    "confidence_penalty": i.confidence_penalty,
+                }
+                for i in self.issues
+            ],
+            "contradictions": [
+                {
+                    "field": i.field,
+                    "message": i.message,
+                    "severity": i.severity,
+                    "penalty": i.confidence_penalty,
+                }
+                for i in self.issues if i.category == "contradiction"
+            ],
+            "missing_documents": [
+                {
+                    "document": i.field.replace("documents.", ""),
+                    "message": i.message,
+                    "severity": i.severity,
+                }
+                for i in self.issues if i.category == "missing_document"
+            ],
+            "missing_fields": [
+                {
+                    "field": i.field,
+                    "message": i.message,
+                    "severity": i.severity,
+                }
+                for i in self.issues if i.category == "missing_field"
+            ],
+        }
+
 
 def _is_empty(val: str) -> bool:
     """Check if a string value is effectively empty."""
@@ -648,48 +762,7 @@ def apply_confidence_adjustments(json_response: dict, validation: ValidationRepo
             sm["Case_Strength"] = "Moderate"
 
     # Inject validation metadata for frontend consumption
-    json_response["_validation"] = {
-        "completeness_score": round(validation.completeness_score, 2),
-        "document_score": round(validation.document_score, 2),
-        "contradiction_score": round(validation.contradiction_score, 2),
-        "max_confidence_cap": validation.max_confidence_cap,
-        "total_penalty_points": validation.total_penalty,
-        "issues": [
-            {
-                "category": i.category,
-                "severity": i.severity,
-                "field": i.field,
-                "message": i.message,
-                "confidence_penalty": i.confidence_penalty,
-            }
-            for i in validation.issues
-        ],
-        "contradictions": [
-            {
-                "field": i.field,
-                "message": i.message,
-                "severity": i.severity,
-                "penalty": i.confidence_penalty,
-            }
-            for i in validation.issues if i.category == "contradiction"
-        ],
-        "missing_documents": [
-            {
-                "document": i.field.replace("documents.", ""),
-                "message": i.message,
-                "severity": i.severity,
-            }
-            for i in validation.issues if i.category == "missing_document"
-        ],
-        "missing_fields": [
-            {
-                "field": i.field,
-                "message": i.message,
-                "severity": i.severity,
-            }
-            for i in validation.issues if i.category == "missing_field"
-        ],
-    }
+    json_response["_validation"] = validation.to_dict()
 
     return json_response
 
@@ -708,12 +781,8 @@ def prepare_multimodal_content(documents: List[UploadedDocument]) -> List[dict]:
     content_parts = []
     
     for doc in documents:
-        # Get base64 content
-        b64_content = doc.base64_content
-        
-        # If no base64 content but we have raw bytes, encode it
-        if not b64_content and doc.file_content:
-            b64_content = base64.b64encode(doc.file_content).decode("utf-8")
+        # Get base64 content (raw bytes and spooled uploads are encoded here)
+        b64_content = doc.to_base64()
         
         if not b64_content:
             continue
@@ -883,8 +952,30 @@ def generate_case_query_from_form(complaint_data: ConsumerComplaintData) -> str:
     return "\n".join(query_parts)
 
 
+_cpa_context_cache: Optional[str] = None
+_cpa_context_lock = threading.Lock()
+
+
 def load_cpa_2019_context() -> str:
-    """Load and return the Consumer Protection Act 2019 PDF content."""
+    """
+    Load and return the Consumer Protection Act 2019 PDF content.
+
+    The PDF is parsed once per process; failures are not cached so a
+    missing file can be added without a restart.
+    """
+    global _cpa_context_cache
+    if _cpa_context_cache is not None:
+        return _cpa_context_cache
+    with _cpa_context_lock:
+        if _cpa_context_cache is None:
+            text = _read_cpa_2019_pdf()
+            if text:
+                _cpa_context_cache = text
+            return text
+        return _cpa_context_cache
+
+
+def _read_cpa_2019_pdf() -> str:
     if not CPA_2019_PDF_PATH.exists():
         print(f"⚠️ Warning: CPA 2019 PDF not found at {CPA_2019_PDF_PATH}")
         return ""
@@ -908,118 +999,61 @@ def load_cpa_2019_context() -> str:
         return ""
 
 
+@lru_cache(maxsize=1)
+def get_embeddings() -> GoogleGenerativeAIEmbeddings:
+    """Embedding client shared by the vector store and query embedding."""
+    return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=1)
 def get_vectorstore():
-    """Load and return the vector store."""
-    embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    """Load and return the vector store (opened once per process)."""
     vectorstore = Chroma(
         persist_directory=str(VECTORSTORE_DIR),
-        embedding_function=embeddings
+        embedding_function=get_embeddings()
     )
     return vectorstore
 
 
-def get_qa_chain(vectorstore, cpa_context: str = "", validation_summary: str = ""):
-    """Create and return the QA chain with JSON-formatted legal judgment prompt."""
-    
-    # Create a retriever from the loaded vector store
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-    
-    # Initialize the LLM
-    llm = ChatGoogleGenerativeAI(
-        model=LLM_MODEL,
-        temperature=0.3
-    )
-    
-    # Build the CPA 2019 reference section
-    cpa_section = ""
-    if cpa_context:
-        cpa_section = f"""
-═══════════════════════════════════════════════════════════════════════════════
-                    CONSUMER PROTECTION ACT, 2019 (REFERENCE)
-═══════════════════════════════════════════════════════════════════════════════
-
-The following is the full text of the Consumer Protection Act, 2019. Use this as your
-PRIMARY LEGAL REFERENCE for identifying applicable sections, definitions, rights,
-remedies, and procedures. Quote specific sections when relevant.
-
-{cpa_context}
-
-═══════════════════════════════════════════════════════════════════════════════
-"""
-    
-    # Build the validation section
-    validation_section = ""
-    if validation_summary:
-        validation_section = f"""
-═══════════════════════════════════════════════════════════════════════════════
-                    PRE-ANALYSIS VALIDATION REPORT
-═══════════════════════════════════════════════════════════════════════════════
-
-The following automated validation was performed on the complaint data BEFORE
-your analysis. You MUST account for these findings in your confidence scores.
+# ========== Prediction Prompt ==========
 
-{validation_summary}
+_RULE = "═" * 79
 
-═══════════════════════════════════════════════════════════════════════════════
-"""
-    
-    # Custom prompt template for legal judgment prediction with JSON output
-    legal_judgment_prompt = PromptTemplate(
-        input_variables=["context", "question"],
-        template='''You are an expert legal analyst specializing in Indian Consumer Protection law.
+PREDICTION_PREAMBLE = """You are an expert legal analyst specializing in Indian Consumer Protection law.
 Your task is to analyze the user's case, predict the likely legal outcome based on similar past cases,
 and format your response as a detailed JSON structure for a courtroom simulation.
+"""
 
-''' + cpa_section + '''
-═══════════════════════════════════════════════════════════════════════════════
-                    SIMILAR PAST CASES FROM DATABASE
-═══════════════════════════════════════════════════════════════════════════════
-
-{context}
-
-═══════════════════════════════════════════════════════════════════════════════
-                    USER'S CURRENT CASE
-═══════════════════════════════════════════════════════════════════════════════
-
-{question}
-
-''' + validation_section + '''
-═══════════════════════════════════════════════════════════════════════════════
-                    INSTRUCTIONS
-═══════════════════════════════════════════════════════════════════════════════
-
-1. Carefully analyze the user's case against the Consumer Protection Act, 2019 provisions above.
-2. Identify SPECIFIC sections from CPA 2019 that are applicable (e.g., Section 2(1), Section 35, etc.)
-3. Quote the exact text of relevant sections where appropriate.
-4. Compare with similar past cases from the database.
-5. Provide a detailed judgment prediction.
-
-═══════════════════════════════════════════════════════════════════════════════
-                    STRICT CONFIDENCE SCORING RULES
-═══════════════════════════════════════════════════════════════════════════════
+ATTACHED_DOCUMENTS_NOTE = """The user has attached supporting documents (PDFs and/or images) which are included with this message.
+Please carefully analyze these documents as evidence for the case. They may contain:
+- Purchase receipts/invoices
+- Product photos showing defects
+- Communication records
+- Medical reports
+- Any other relevant evidence"""
 
-You MUST follow these rules when assigning Liability_Confidence, Success_Probability,
+CONFIDENCE_SCORING_RULES = """You MUST follow these rules when assigning Liability_Confidence, Success_Probability,
 and all Predicted_Outcomes Confidence values:
 
-A) OBSERVE THE MAXIMUM CONFIDENCE CEILING in the validation report above.
+A) OBSERVE THE MAXIMUM CONFIDENCE CEILING in the pre-analysis validation report.
    Your confidence numbers must NEVER exceed that ceiling.
 
 B) MISSING INFORMATION PENALTIES (cumulative):
-   - Each missing critical field (name, address, grievance, claim amount): −8-15%
-   - Each missing major field (dates, category, relief sought): −4-6%
+   - Each missing critical field (name, address, grievance, claim amount): -8-15%
+   - Each missing major field (dates, category, relief sought): -4-6%
    - Missing grievance description entirely: confidence CANNOT exceed 30%
    - Very brief grievance description (<50 chars): confidence CANNOT exceed 55%
 
 C) MISSING DOCUMENT PENALTIES:
    - No documents uploaded at all: confidence CANNOT exceed 45%
-   - Missing mandatory filing docs (index, proforma, affidavit): −8% each
-   - No purchase receipt when an amount is claimed: −7%
-   - No supporting evidence (photos, communications): −10%
+   - Missing mandatory filing docs (index, proforma, affidavit): -8% each
+   - No purchase receipt when an amount is claimed: -7%
+   - No supporting evidence (photos, communications): -10%
 
 D) CONTRADICTION PENALTIES:
    - Date contradictions (deficiency before purchase): confidence CANNOT exceed 25%
-   - Claim >10× purchase amount without justification: −12%
-   - Category/deficiency type mismatch: −10%
+   - Claim >10x purchase amount without justification: -12%
+   - Category/deficiency type mismatch: -10%
    - Limitation period exceeded (>2 years): confidence CANNOT exceed 20%
 
 E) BASELINE SCORING:
@@ -1029,102 +1063,98 @@ E) BASELINE SCORING:
    - A case with contradictions or minimal info: 15-35%
 
 F) EXPLICITLY LIST every contradiction, missing field, and missing document
-   in the Evidence_Analysis.Critical_Gaps array. Do NOT gloss over them.
+   in the Evidence_Analysis.Critical_Gaps array. Do NOT gloss over them."""
 
-═══════════════════════════════════════════════════════════════════════════════
-
-Analyze the case thoroughly and respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON).
-The JSON must follow this exact structure:
-
-{{
-    "Case_Summary": {{
+# Plain string (single braces) — assembled by concatenation, never .format()-ed
+PREDICTION_JSON_SCHEMA = """{
+    "Case_Summary": {
         "Title": "<Generated case title based on parties involved>",
         "Case_Type": "<e.g., Deficiency in Service, Product Liability, Unfair Trade Practice>",
-        "Consumer_Details": {{
+        "Consumer_Details": {
             "Description": "<Brief description of the consumer/complainant>",
             "Claim_Amount": "<Amount claimed or product value>",
             "Key_Grievances": ["<List of main complaints>"]
-        }},
-        "Opposite_Party_Details": {{
+        },
+        "Opposite_Party_Details": {
             "Description": "<Brief description of the seller/service provider>",
             "Defense_Arguments": ["<List of defense arguments raised or likely to be raised>"]
-        }},
+        },
         "Facts_of_Case": ["<Chronological list of key facts>"],
-        "Evidence_Available": ["<List of evidence the consumer has>"],
+        "Evidence_Available": ["<List of evidence the consumer has@@EVIDENCE_HINT@@>"],
         "Evidence_Missing": ["<List of evidence that would strengthen the case>"]
-    }},
-    "Legal_Grounds": {{
+    },
+    "Legal_Grounds": {
         "Applicable_Sections": [
-            {{
+            {
                 "Section": "<Section number, e.g., 2(1)(g)>",
                 "Act": "<Full act name, e.g., Consumer Protection Act, 2019>",
                 "Description": "<What this section covers>",
                 "Relevance_to_Case": "<How it applies to this specific case>"
-            }}
+            }
         ],
         "Precedents_Cited": [
-            {{
+            {
                 "Case_Name": "<Full case citation>",
                 "Year": "<Year of judgment>",
                 "Court": "<Court name>",
                 "Key_Holding": "<Main principle established>",
                 "Relevance": "<How it supports the current case>"
-            }}
+            }
         ],
         "Legal_Principles": ["<Key legal principles applicable>"],
         "Contextual_Notes": "<Additional legal context for the simulation>"
-    }},
-    "Judgment_Reasoning": {{
+    },
+    "Judgment_Reasoning": {
         "Issues_Framed": [
-            {{
+            {
                 "Issue_Number": <1, 2, 3...>,
                 "Issue": "<Legal question to be decided>",
                 "Analysis": "<Detailed analysis of this issue>",
                 "Finding": "<Conclusion on this issue>"
-            }}
+            }
         ],
         "Findings": "<Overall findings summary>",
-        "Key_Evidence": ["<Evidence that influenced the decision>"],
-        "Evidence_Analysis": {{
+        "Key_Evidence": ["<Evidence that influenced the decision@@KEY_EVIDENCE_HINT@@>"],
+        "Evidence_Analysis": {
             "Consumer_Evidence_Strength": "<Strong/Moderate/Weak>",
             "Opposite_Party_Defense_Strength": "<Strong/Moderate/Weak>",
-            "Critical_Gaps": ["<Any gaps in evidence or arguments>"]
-        }},
+            "Critical_Gaps": ["<Any gaps in evidence or arguments>"]@@DOCUMENT_ANALYSIS@@
+        },
         "Inference": "<Legal inference drawn from facts and law>",
         "Liability_Status": "<Established/Not Established/Partial>",
         "Liability_Confidence": "<Percentage confidence, e.g., 85%>",
         "Reasoning_Chain": ["<Step-by-step logical reasoning>"]
-    }},
-    "Relief_Granted": {{
-        "Primary_Relief": {{
+    },
+    "Relief_Granted": {
+        "Primary_Relief": {
             "Type": "<Refund/Replacement/Compensation/Service Rectification>",
             "Amount": "<Specific amount if applicable>",
             "Description": "<Details of the relief>"
-        }},
+        },
         "Additional_Relief": [
-            {{
+            {
                 "Type": "<e.g., Mental Agony Compensation, Litigation Costs>",
                 "Amount": "<Amount if applicable>",
                 "Justification": "<Why this relief is appropriate>"
-            }}
+            }
         ],
         "Predicted_Outcomes": [
-            {{
+            {
                 "Relief": "<Type of outcome>",
                 "Confidence": "<Percentage with range, e.g., 78% [70-85]>",
                 "Probability_Assessment": "<High/Medium/Low>"
-            }}
+            }
         ],
-        "Total_Compensation_Range": {{
+        "Total_Compensation_Range": {
             "Minimum": "<Lower estimate>",
             "Maximum": "<Upper estimate>",
             "Most_Likely": "<Expected amount>"
-        }},
+        },
         "Time_Frame": "<Expected duration for case resolution>",
         "Recommended_Forum": "<District Forum/State Commission/National Commission>",
         "Recommended_Action": "<Specific next steps for the consumer>"
-    }},
-    "Simulation_Metadata": {{
+    },
+    "Simulation_Metadata": {
         "Case_Strength": "<Strong/Moderate/Weak>",
         "Success_Probability": "<Percentage>",
         "Key_Arguments_For_Consumer": ["<Main arguments consumer should make>"],
@@ -1135,37 +1165,238 @@ The JSON must follow this exact structure:
         "Estimated_Hearing_Duration": "<Time estimate>",
         "Complexity_Level": "<Simple/Moderate/Complex>",
         "Similar_Cases_Referenced": ["<List of similar case names from context>"]
-    }}
-}}
+    }
+}"""
 
-Ensure all fields are populated with detailed, realistic information suitable for a courtroom simulation.
-The response must be valid JSON that can be parsed directly.'''
-    )
-    
-    # Create the RetrievalQA chain with custom prompt
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
-        chain_type="stuff",
-        return_source_documents=True,
-        chain_type_kwargs={"prompt": legal_judgment_prompt}
+
+def _banner(title: str) -> str:
+    """Section heading used throughout the prediction prompt."""
+    return f"{_RULE}\n                    {title}\n{_RULE}"
+
+
+def _prediction_instructions(multimodal: bool) -> str:
+    steps = ["Carefully analyze the user's case against the Consumer Protection Act, 2019 provisions."]
+    if multimodal:
+        steps.append("THOROUGHLY EXAMINE all attached documents (PDFs and images) for evidence.")
+    steps += [
+        "Identify SPECIFIC sections from CPA 2019 that are applicable (e.g., Section 2(1), Section 35, etc.)",
+        "Quote the exact text of relevant sections where appropriate.",
+        "Compare with similar past cases from the database.",
+        "Provide a detailed judgment prediction.",
+    ]
+    return "\n".join(f"{i}. {step}" for i, step in enumerate(steps, start=1))
+
+
+def _prediction_json_schema(multimodal: bool) -> str:
+    replacements = {
+        "@@EVIDENCE_HINT@@": " - include details from attached documents" if multimodal else "",
+        "@@KEY_EVIDENCE_HINT@@": " - reference attached documents" if multimodal else "",
+        "@@DOCUMENT_ANALYSIS@@": (
+            ',\n            "Document_Analysis": "<Summary of what was found in the attached documents>"'
+            if multimodal else ""
+        ),
+    }
+    schema = PREDICTION_JSON_SCHEMA
+    for marker, value in replacements.items():
+        schema = schema.replace(marker, value)
+    return schema
+
+
+def build_prediction_prefix(cpa_context: str = "", multimodal: bool = False) -> str:
+    """
+    The static part of the prediction prompt: role, statute text, instructions,
+    scoring rules and output schema. Identical for every case (per mode), so it
+    is sent as a cacheable prefix.
+    """
+    parts = [PREDICTION_PREAMBLE]
+
+    if cpa_context:
+        parts.append(
+            f"{_banner('CONSUMER PROTECTION ACT, 2019 (REFERENCE)')}\n\n"
+            "The following is the full text of the Consumer Protection Act, 2019. Use this as your\n"
+            "PRIMARY LEGAL REFERENCE for identifying applicable sections, definitions, rights,\n"
+            "remedies, and procedures. Quote specific sections when relevant.\n\n"
+            f"{cpa_context}\n\n{_RULE}\n"
+        )
+
+    parts.append(f"{_banner('INSTRUCTIONS')}\n\n{_prediction_instructions(multimodal)}\n")
+    parts.append(f"{_banner('STRICT CONFIDENCE SCORING RULES')}\n\n{CONFIDENCE_SCORING_RULES}\n\n{_RULE}\n")
+    parts.append(
+        "Analyze the case thoroughly and respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON).\n"
+        "The JSON must follow this exact structure:\n\n"
+        f"{_prediction_json_schema(multimodal)}\n\n"
+        "Ensure all fields are populated with detailed, realistic information suitable for a courtroom simulation.\n"
+        "The response must be valid JSON that can be parsed directly."
     )
-    
-    return qa_chain
+    return "\n".join(parts)
+
+
+def build_prediction_case_prompt(
+    text_query: str,
+    similar_cases_context: str = "",
+    validation_summary: str = "",
+    multimodal: bool = False,
+) -> str:
+    """The per-case part of the prediction prompt, sent after the static prefix."""
+    parts = [f"{_banner('SIMILAR PAST CASES FROM DATABASE')}\n\n{similar_cases_context}\n"]
+    parts.append(_banner("USER'S CURRENT CASE") + f"\n\n{text_query}\n")
+
+    if validation_summary:
+        parts.append(
+            f"{_banner('PRE-ANALYSIS VALIDATION REPORT')}\n\n"
+            "The following automated validation was performed on the complaint data BEFORE\n"
+            "your analysis. You MUST account for these findings in your confidence scores.\n\n"
+            f"{validation_summary}\n\n{_RULE}\n"
+        )
+
+    if multimodal:
+        parts.append(f"{_banner('ATTACHED DOCUMENTS')}\n\n{ATTACHED_DOCUMENTS_NOTE}\n")
+
+    parts.append("Respond with ONLY the JSON object described in the instructions.")
+    return "\n".join(parts)
+
+
+def build_prediction_prompt(
+    text_query: str,
+    cpa_context: str = "",
+    similar_cases_context: str = "",
+    validation_summary: str = "",
+    multimodal: bool = False,
+) -> str:
+    """Assemble the full judgment prediction prompt (static prefix + case part)."""
+    return "\n".join([
+        build_prediction_prefix(cpa_context, multimodal),
+        build_prediction_case_prompt(text_query, similar_cases_context, validation_summary, multimodal),
+    ])
+
+
+@lru_cache(maxsize=1)
+def prediction_prompt_version() -> str:
+    """Short hash of the prompt templates; changes whenever the prompt wording does."""
+    template = build_prediction_prefix("", True) + build_prediction_case_prompt("", "", "", True)
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+def budget_prediction_prompt(
+    text_query: str,
+    cpa_context: str,
+    similar_cases: List[str],
+    validation_summary: str = "",
+    multimodal: bool = False,
+) -> tuple[dict, BudgetReport]:
+    """
+    Fit the dynamic prompt segments into the configured token budgets.
+
+    Trimming order when over the total budget: similar cases (least relevant
+    dropped first), then the CPA text, then the case narrative; the
+    validation report and the static instructions are trimmed last / never.
+
+    Returns (trimmed segment texts, budget report).
+    """
+    segments = [
+        PromptSegment(
+            name="instructions",
+            text=build_prediction_prompt("", multimodal=multimodal),
+            required=True,
+            priority=100,
+        ),
+        PromptSegment(
+            name="cpa",
+            text=cpa_context,
+            policy=TRUNCATE_TAIL,
+            max_tokens=PROMPT_BUDGET_CPA_TOKENS,
+            priority=2,
+        ),
+        PromptSegment(
+            name="similar_cases",
+            items=list(similar_cases),
+            policy=DROP_ITEMS,
+            max_tokens=PROMPT_BUDGET_SIMILAR_CASES_TOKENS,
+            priority=1,
+        ),
+        PromptSegment(
+            name="case",
+            text=text_query,
+            policy=TRUNCATE_MIDDLE,
+            max_tokens=PROMPT_BUDGET_CASE_TOKENS,
+            min_tokens=500,
+            priority=3,
+        ),
+        PromptSegment(
+            name="validation",
+            text=validation_summary,
+            policy=TRUNCATE_TAIL,
+            max_tokens=PROMPT_BUDGET_VALIDATION_TOKENS,
+            min_tokens=200,
+            priority=4,
+        ),
+    ]
+    report = PromptBudgeter().fit(segments)
+
+    by_name = {s.name: s for s in segments}
+    fitted = {
+        "cpa_context": by_name["cpa"].content,
+        "similar_cases": list(by_name["similar_cases"].items or []),
+        "text_query": by_name["case"].content,
+        "validation_summary": by_name["validation"].content,
+    }
+
+    metrics.observe("prediction.prompt_tokens", report.total_tokens)
+    for name, entry in report.segments.items():
+        metrics.observe("prediction.prompt_segment_tokens", entry["tokens"], segment=name)
+        if entry["trimmed"]:
+            metrics.incr("prediction.prompt_segment_trimmed", segment=name)
+    if report.total_tokens > report.total_budget:
+        metrics.incr("prediction.prompt_over_budget")
+
+    return fitted, report
 
 
 def get_supabase_client() -> Optional[Client]:
-    """Initialize and return the Supabase client."""
+    """Return the shared Supabase client."""
     if not SUPABASE_URL or not SUPABASE_KEY:
         print("⚠️ Warning: Supabase credentials not configured. Data will only be saved locally.")
         return None
+    return get_supabase()
+
+
+def prediction_record(
+    json_data: dict,
+    query: str,
+    user_id: Optional[str] = None,
+    cpa_included: bool = False
+) -> dict:
+    """Build the judgment_predictions row for a prediction."""
+    # Extract key fields from JSON for easier querying
+    case_summary = json_data.get("Case_Summary", {})
+    judgment_reasoning = json_data.get("Judgment_Reasoning", {})
+    relief_granted = json_data.get("Relief_Granted", {})
+    simulation_metadata = json_data.get("Simulation_Metadata", {})
+    compensation_range = relief_granted.get("Total_Compensation_Range", {})
+    
+    # Prepare the record
+    record = {
+        "user_query": query,
+        "case_title": case_summary.get("Title"),
+        "case_type": case_summary.get("Case_Type"),
+        "claim_amount": case_summary.get("Consumer_Details", {}).get("Claim_Amount"),
+        "consumer_description": case_summary.get("Consumer_Details", {}).get("Description"),
+        "opposite_party_description": case_summary.get("Opposite_Party_Details", {}).get("Description"),
+        "case_strength": simulation_metadata.get("Case_Strength"),
+        "success_probability": simulation_metadata.get("Success_Probability"),
+        "liability_status": judgment_reasoning.get("Liability_Status"),
+        "recommended_forum": relief_granted.get("Recommended_Forum"),
+        "compensation_minimum": compensation_range.get("Minimum"),
+        "compensation_maximum": compensation_range.get("Maximum"),
+        "compensation_most_likely": compensation_range.get("Most_Likely"),
+        "prediction_json": json_data,
+        "cpa_2019_included": cpa_included,
+    }
     
-    try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        return supabase
-    except Exception as e:
-        print(f"⚠️ Error initializing Supabase client: {e}")
-        return None
+    # Add user_id if provided
+    if user_id:
+        record["user_id"] = user_id
+    return record
 
 
 def save_to_supabase(
@@ -1189,36 +1420,8 @@ def save_to_supabase(
         The ID of the created record, or None if failed
     """
     try:
-        # Extract key fields from JSON for easier querying
-        case_summary = json_data.get("Case_Summary", {})
-        judgment_reasoning = json_data.get("Judgment_Reasoning", {})
-        relief_granted = json_data.get("Relief_Granted", {})
-        simulation_metadata = json_data.get("Simulation_Metadata", {})
-        compensation_range = relief_granted.get("Total_Compensation_Range", {})
-        
-        # Prepare the record
-        record = {
-            "user_query": query,
-            "case_title": case_summary.get("Title"),
-            "case_type": case_summary.get("Case_Type"),
-            "claim_amount": case_summary.get("Consumer_Details", {}).get("Claim_Amount"),
-            "consumer_description": case_summary.get("Consumer_Details", {}).get("Description"),
-            "opposite_party_description": case_summary.get("Opposite_Party_Details", {}).get("Description"),
-            "case_strength": simulation_metadata.get("Case_Strength"),
-            "success_probability": simulation_metadata.get("Success_Probability"),
-            "liability_status": judgment_reasoning.get("Liability_Status"),
-            "recommended_forum": relief_granted.get("Recommended_Forum"),
-            "compensation_minimum": compensation_range.get("Minimum"),
-            "compensation_maximum": compensation_range.get("Maximum"),
-            "compensation_most_likely": compensation_range.get("Most_Likely"),
-            "prediction_json": json_data,
-            "cpa_2019_included": cpa_included,
-        }
-        
-        # Add user_id if provided
-        if user_id:
-            record["user_id"] = user_id
-        
+        record = prediction_record(json_data, query, user_id, cpa_included)
+
         # Insert into Supabase
         result = supabase.table("judgment_predictions").insert(record).execute()
         
@@ -1264,6 +1467,146 @@ def parse_llm_response(response_text: str) -> dict:
         }
 
 
+def _prediction_llm() -> ChatGoogleGenerativeAI:
+    """The model used for judgment predictions."""
+    return llm_clients.get(LLM_MODEL, temperature=0.3)
+
+
+def _document_content_parts(documents: List[UploadedDocument]) -> List[dict]:
+    """Every attached image/PDF as inline data (extracted PDF text as text)."""
+    content_parts = []
+    for doc in documents:
+        if doc.extracted_text:
+            content_parts.append({
+                "type": "text",
+                "text": f"[{doc.category}: {doc.name} - text extracted from the PDF]\n{doc.extracted_text}",
+            })
+            print(f"  📝 Added extracted text: {doc.name} ({doc.category})")
+            continue
+        
+        b64_content = doc.to_base64()
+        if not b64_content:
+            continue
+        
+        mime_type = doc.file_type
+        
+        # Add image
+        if mime_type.startswith("image/"):
+            content_parts.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{mime_type};base64,{b64_content}"
+                }
+            })
+            print(f"  📷 Added image: {doc.name} ({doc.category})")
+        
+        # Add PDF - Gemini supports inline PDF data
+        elif mime_type == "application/pdf":
+            # For Gemini, we can pass PDF as inline data
+            content_parts.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{mime_type};base64,{b64_content}"
+                }
+            })
+            print(f"  📄 Added PDF: {doc.name} ({doc.category})")
+    return content_parts
+
+
+def _build_multimodal_message(case_prompt: str, documents: List[UploadedDocument]) -> HumanMessage:
+    """Per-case text followed by every attached image/PDF as inline data."""
+    # Add the per-case text first, then the documents as multimodal content
+    document_parts = _document_content_parts(documents)
+    print(f"  ✅ Total documents added for multimodal processing: {len(document_parts)}")
+    return HumanMessage(content=[{"type": "text", "text": case_prompt}, *document_parts])
+
+
+def _chunk_text(content) -> str:
+    """Text of a message (chunk) whose content may be a string or a list of parts."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content or []
+    )
+
+
+async def _acomplete(
+    static_messages: list,
+    messages: list,
+    on_text: Optional[Callable[[str], None]],
+    endpoint: str = "prediction",
+) -> str:
+    """Run the prediction model; with on_text, stream and forward each text delta."""
+    llm = _prediction_llm()
+    if on_text is None:
+        response = await llm_hedger.ainvoke(
+            endpoint, lambda: llm_gateway.ainvoke(llm, static_messages, messages)
+        )
+        return response.content
+
+    parts = []
+    async for chunk in llm_hedger.astream(
+        endpoint, lambda: llm_gateway.astream(llm, static_messages, messages)
+    ):
+        text = _chunk_text(chunk.content)
+        if text:
+            parts.append(text)
+            on_text(text)
+    return "".join(parts)
+
+
+def run_text_prediction(
+    text_query: str,
+    cpa_context: str,
+    similar_cases_context: str,
+    validation_summary: str = "",
+) -> str:
+    """
+    Run a text-only prediction (no uploaded documents).
+    
+    Args:
+        text_query: The case details narrative
+        cpa_context: Consumer Protection Act 2019 context
+        similar_cases_context: Similar cases retrieved from vector store
+        validation_summary: Pre-LLM validation report summary
+        
+    Returns:
+        The LLM response as a string
+    """
+    # Static prefix (statute + instructions + schema) is cached across cases
+    prefix = build_prediction_prefix(cpa_context)
+    case_prompt = build_prediction_case_prompt(
+        text_query=text_query,
+        similar_cases_context=similar_cases_context,
+        validation_summary=validation_summary,
+    )
+    llm = _prediction_llm()
+    response = llm_hedger.invoke(
+        "prediction",
+        lambda: llm_gateway.invoke(llm, [SystemMessage(content=prefix)], [HumanMessage(content=case_prompt)]),
+    )
+    
+    return response.content
+
+
+async def arun_text_prediction(
+    text_query: str,
+    cpa_context: str,
+    similar_cases_context: str,
+    validation_summary: str = "",
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Async variant of run_text_prediction(); streams text to on_text when given."""
+    prefix = build_prediction_prefix(cpa_context)
+    case_prompt = build_prediction_case_prompt(
+        text_query=text_query,
+        similar_cases_context=similar_cases_context,
+        validation_summary=validation_summary,
+    )
+    return await _acomplete([SystemMessage(content=prefix)], [HumanMessage(content=case_prompt)], on_text)
+
+
 def run_multimodal_prediction(
     text_query: str,
     documents: List[UploadedDocument],
@@ -1284,283 +1627,505 @@ def run_multimodal_prediction(
     Returns:
         The LLM response as a string
     """
-    # Initialize multimodal LLM
-    llm = ChatGoogleGenerativeAI(
-        model=LLM_MODEL,
-        temperature=0.3
+    # Static prefix (statute + instructions + schema) is cached across cases
+    prefix = build_prediction_prefix(cpa_context, multimodal=True)
+    case_prompt = build_prediction_case_prompt(
+        text_query=text_query,
+        similar_cases_context=similar_cases_context,
+        validation_summary=validation_summary,
+        multimodal=True,
+    )
+    message = _build_multimodal_message(case_prompt, documents)
+    llm = _prediction_llm()
+    response = llm_hedger.invoke(
+        "prediction_multimodal", lambda: llm_gateway.invoke(llm, [SystemMessage(content=prefix)], [message])
     )
     
-    # Build the full prompt with context
-    cpa_section = ""
-    if cpa_context:
-        cpa_section = f"""
-═══════════════════════════════════════════════════════════════════════════════
-                    CONSUMER PROTECTION ACT, 2019 (REFERENCE)
-═══════════════════════════════════════════════════════════════════════════════
+    return response.content
 
-The following is the full text of the Consumer Protection Act, 2019. Use this as your
-PRIMARY LEGAL REFERENCE for identifying applicable sections, definitions, rights,
-remedies, and procedures. Quote specific sections when relevant.
 
-{cpa_context}
+async def arun_multimodal_prediction(
+    text_query: str,
+    documents: List[UploadedDocument],
+    cpa_context: str,
+    similar_cases_context: str,
+    validation_summary: str = "",
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Async variant of run_multimodal_prediction(); streams text to on_text when given."""
+    prefix = build_prediction_prefix(cpa_context, multimodal=True)
+    case_prompt = build_prediction_case_prompt(
+        text_query=text_query,
+        similar_cases_context=similar_cases_context,
+        validation_summary=validation_summary,
+        multimodal=True,
+    )
+    message = _build_multimodal_message(case_prompt, documents)
+    return await _acomplete([SystemMessage(content=prefix)], [message], on_text, "prediction_multimodal")
 
-═══════════════════════════════════════════════════════════════════════════════
-"""
-    
-    # Build validation section for prompt
-    validation_section = ""
-    if validation_summary:
-        validation_section = f"""
-═══════════════════════════════════════════════════════════════════════════════
-                    PRE-ANALYSIS VALIDATION REPORT
-═══════════════════════════════════════════════════════════════════════════════
 
-The following automated validation was performed on the complaint data BEFORE
-your analysis. You MUST account for these findings in your confidence scores.
+def _document_bytes(doc: UploadedDocument) -> bytes:
+    with doc.buffer() as view:
+        return bytes(view)
 
-{validation_summary}
 
-═══════════════════════════════════════════════════════════════════════════════
-"""
+def _prepared_documents(doc: UploadedDocument, parts: list) -> List[UploadedDocument]:
+    """Replace one upload by its preprocessed parts (images and/or extracted text)."""
+    return [
+        UploadedDocument(
+            name=part.label or doc.name,
+            category=doc.category,
+            file_type=part.mime_type,
+            file_content=part.data or None,
+            extracted_text=part.text or None,
+            sha256=doc.sha256,
+        )
+        for part in parts
+    ]
 
-    # Build the complete prompt
-    full_prompt = f'''You are an expert legal analyst specializing in Indian Consumer Protection law.
-Your task is to analyze the user's case, predict the likely legal outcome based on similar past cases,
-and format your response as a detailed JSON structure for a courtroom simulation.
 
-{cpa_section}
-═══════════════════════════════════════════════════════════════════════════════
-                    SIMILAR PAST CASES FROM DATABASE
-═══════════════════════════════════════════════════════════════════════════════
+def _record_evidence_report(report: EvidenceReport) -> None:
+    summary = report.to_dict()
+    for stats in report.files:
+        metrics.incr("evidence.files", action=stats.action)
+    metrics.observe("evidence.bytes_saved", summary["bytes_saved"])
+    metrics.observe("evidence.tokens_saved", summary["estimated_tokens_before"] - summary["estimated_tokens_after"])
+    print(
+        f"  🗜️ Evidence: {summary['original_bytes']} → {summary['prepared_bytes']} bytes, "
+        f"~{summary['estimated_tokens_before']} → ~{summary['estimated_tokens_after']} tokens"
+    )
 
-{similar_cases_context}
 
-═══════════════════════════════════════════════════════════════════════════════
-                    USER'S CURRENT CASE
-═══════════════════════════════════════════════════════════════════════════════
+def preprocess_documents(documents: List[UploadedDocument]) -> tuple[List[UploadedDocument], EvidenceReport]:
+    """Shrink uploads in-process (see evidence.py); used by the sync pipeline."""
+    prepared, report = [], EvidenceReport()
+    for doc in documents:
+        parts, stats = prepare_evidence(doc.name, doc.file_type, _document_bytes(doc))
+        prepared.extend(_prepared_documents(doc, parts))
+        report.files.append(stats)
+    _record_evidence_report(report)
+    return prepared, report
+
+
+async def _aprepare_document(doc: UploadedDocument):
+    # Spooled uploads may be on disk: read them on the io pool, not the event loop
+    data = await run_blocking(_document_bytes, doc)
+    return await run_blocking(prepare_evidence, doc.name, doc.file_type, data, pool="cpu")
+
+
+async def apreprocess_documents(documents: List[UploadedDocument]) -> tuple[List[UploadedDocument], EvidenceReport]:
+    """Shrink uploads concurrently on the "cpu" process pool."""
+    results = await asyncio.gather(*[_aprepare_document(doc) for doc in documents])
+    prepared, report = [], EvidenceReport()
+    for doc, (parts, stats) in zip(documents, results):
+        prepared.extend(_prepared_documents(doc, parts))
+        report.files.append(stats)
+    _record_evidence_report(report)
+    return prepared, report
+
+
+async def _aprepare_evidence(documents: List[UploadedDocument]) -> tuple[List[UploadedDocument], Optional[EvidenceReport]]:
+    """Preprocess when enabled; any failure falls back to sending the uploads as-is."""
+    if not documents or not EVIDENCE_PREPROCESS_ENABLED:
+        return documents, None
+    try:
+        return await apreprocess_documents(documents)
+    except Exception as e:
+        print(f"⚠️ Evidence preprocessing failed, sending original files: {e}")
+        return documents, None
 
-{text_query}
 
-{validation_section}
-═══════════════════════════════════════════════════════════════════════════════
-                    ATTACHED DOCUMENTS
-═══════════════════════════════════════════════════════════════════════════════
+def _hash_documents(documents: List[UploadedDocument]) -> List[str]:
+    """SHA-256 of every upload; streamed uploads were hashed while spooling."""
+    for doc in documents:
+        if not doc.sha256:
+            with doc.buffer() as view:
+                doc.sha256 = hashlib.sha256(view).hexdigest()
+    return [doc.sha256 for doc in documents]
 
-The user has attached supporting documents (PDFs and/or images) which are included with this message.
-Please carefully analyze these documents as evidence for the case. They may contain:
-- Purchase receipts/invoices
-- Product photos showing defects
-- Communication records
-- Medical reports
-- Any other relevant evidence
 
-═══════════════════════════════════════════════════════════════════════════════
-                    INSTRUCTIONS
-═══════════════════════════════════════════════════════════════════════════════
+def _evidence_refs(documents: List[UploadedDocument]) -> List[dict]:
+    """The "_evidence" entries later stages use to look up cached facts."""
+    return [
+        {"sha256": doc.sha256, "name": doc.name, "category": doc.category, "file_type": doc.file_type}
+        for doc in documents
+    ]
 
-1. Carefully analyze the user's case against the Consumer Protection Act, 2019 provisions above.
-2. THOROUGHLY EXAMINE all attached documents (PDFs and images) for evidence.
-3. Identify SPECIFIC sections from CPA 2019 that are applicable (e.g., Section 2(1), Section 35, etc.)
-4. Quote the exact text of relevant sections where appropriate.
-5. Compare with similar past cases from the database.
-6. Provide a detailed judgment prediction.
 
-═══════════════════════════════════════════════════════════════════════════════
-                    STRICT CONFIDENCE SCORING RULES
-═══════════════════════════════════════════════════════════════════════════════
+def _plan_evidence_facts(final_query: str, documents: List[UploadedDocument]) -> tuple[str, set, bool]:
+    """
+    Look up cached facts for the uploads (blocking).
 
-You MUST follow these rules when assigning Liability_Confidence, Success_Probability,
-and all Predicted_Outcomes Confidence values:
+    Returns (query for the LLM, hashes still lacking facts, reused). When
+    every file already has facts and EVIDENCE_FACTS_REUSE is on, the facts
+    are appended to the query and the files need not be sent (reused=True).
+    """
+    if not documents or not EVIDENCE_FACTS_ENABLED:
+        return final_query, set(), False
+    hashes = _hash_documents(documents)
+    cached = evidence_fact_store.get_many(hashes)
+    missing = set(hashes) - set(cached)
+    if missing or not EVIDENCE_FACTS_REUSE:
+        return final_query, missing, False
+    print(f"♻️ Facts for all {len(documents)} documents are cached; sending facts instead of files")
+    facts = evidence_facts_text(cached[sha] for sha in dict.fromkeys(hashes))
+    return f"{final_query}\n\n{facts}", set(), True
+
+
+def _fact_extraction_inputs(
+    originals: List[UploadedDocument], prepared: List[UploadedDocument], missing: set
+) -> List[tuple]:
+    """(original upload, content parts) for each distinct file lacking facts."""
+    inputs = []
+    for doc in originals:
+        if doc.sha256 in missing and doc.sha256 not in {d.sha256 for d, _ in inputs}:
+            parts = _document_content_parts([p for p in prepared if p.sha256 == doc.sha256])
+            inputs.append((doc, parts))
+    return inputs
+
+
+def _extract_missing_facts(originals: List[UploadedDocument], prepared: List[UploadedDocument], missing: set) -> None:
+    for doc, parts in _fact_extraction_inputs(originals, prepared, missing):
+        facts = extract_evidence_facts(doc.sha256, doc.name, doc.category, doc.file_type, parts)
+        if facts:
+            evidence_fact_store.put(facts)
+
+
+async def _aextract_missing_facts(
+    originals: List[UploadedDocument], prepared: List[UploadedDocument], missing: set
+) -> None:
+    """Extract and store facts for new files; runs alongside the prediction call."""
+    inputs = _fact_extraction_inputs(originals, prepared, missing)
+    results = await asyncio.gather(*[
+        aextract_evidence_facts(doc.sha256, doc.name, doc.category, doc.file_type, parts)
+        for doc, parts in inputs
+    ])
+    for facts in results:
+        if facts:
+            await run_blocking(evidence_fact_store.put, facts)
+    print(f"  🧾 Stored evidence facts for {sum(1 for f in results if f)}/{len(inputs)} new documents")
+
+
+# ========== Prediction Pipeline ==========
+
+# Stages reported to progress callbacks, in pipeline order
+PREDICTION_STAGES = ("validation", "retrieval", "llm", "persistence")
+
+# progress(stage, status, data) — status is "started", "completed" or "skipped";
+# with stream_tokens the llm stage also reports "token" and "section" events
+ProgressCallback = Callable[[str, str, dict], None]
+
+
+def _report(progress: Optional[ProgressCallback], stage: str, status: str, **data) -> None:
+    """Forward a stage event to the caller; a failing callback never breaks the pipeline."""
+    if progress is None:
+        return
+    try:
+        progress(stage, status, data)
+    except Exception as e:
+        print(f"⚠️ Progress callback failed for {stage}/{status}: {e}")
 
-A) OBSERVE THE MAXIMUM CONFIDENCE CEILING in the validation report above.
-   Your confidence numbers must NEVER exceed that ceiling.
 
-B) MISSING INFORMATION PENALTIES (cumulative):
-   - Each missing critical field (name, address, grievance, claim amount): -8-15%
-   - Each missing major field (dates, category, relief sought): -4-6%
-   - Missing grievance description entirely: confidence CANNOT exceed 30%
-   - Very brief grievance description (<50 chars): confidence CANNOT exceed 55%
+def _resolve_prediction_input(
+    query: Optional[str],
+    complaint_data: Optional[ConsumerComplaintData],
+    form_dict: Optional[dict],
+    documents: Optional[List[UploadedDocument]],
+) -> tuple[str, Optional[ConsumerComplaintData], str, bool]:
+    """Normalise the accepted input formats to (query, complaint data, input type, has documents)."""
+    if complaint_data is not None:
+        # Use structured data directly
+        print("📋 Using structured ConsumerComplaintData input")
+        return (
+            generate_case_query_from_form(complaint_data),
+            complaint_data,
+            "structured_form",
+            len(complaint_data.documents) > 0,
+        )
+    if form_dict is not None:
+        # Convert dictionary to ConsumerComplaintData
+        complaint_data = ConsumerComplaintData.from_dict(form_dict)
+        if documents:
+            complaint_data.documents = documents
+        print("📋 Using form dictionary input")
+        return (
+            generate_case_query_from_form(complaint_data),
+            complaint_data,
+            "form_dict",
+            len(complaint_data.documents) > 0,
+        )
+    if query is not None:
+        # Use plain text query (legacy)
+        print("📝 Using plain text query input")
+        return query, None, "text", False
+    raise ValueError("Must provide either 'query', 'complaint_data', or 'form_dict'")
 
-C) MISSING DOCUMENT PENALTIES:
-   - No documents uploaded at all: confidence CANNOT exceed 45%
-   - Missing mandatory filing docs (index, proforma, affidavit): -8% each
-   - No purchase receipt when an amount is claimed: -7%
-   - No supporting evidence (photos, communications): -10%
 
-D) CONTRADICTION PENALTIES:
-   - Date contradictions (deficiency before purchase): confidence CANNOT exceed 25%
-   - Claim >10x purchase amount without justification: -12%
-   - Category/deficiency type mismatch: -10%
-   - Limitation period exceeded (>2 years): confidence CANNOT exceed 20%
+def _run_validation(complaint_data: Optional[ConsumerComplaintData]) -> tuple[Optional[ValidationReport], str]:
+    """Run pre-LLM validation when structured data is available."""
+    if complaint_data is None:
+        return None, ""
+    print("--- Step 0: Validating Complaint Data ---")
+    validation = validate_complaint_data(complaint_data)
+    print(f"  Completeness: {validation.completeness_score:.0%}")
+    print(f"  Document score: {validation.document_score:.0%}")
+    print(f"  Contradictions: {len([i for i in validation.issues if i.category == 'contradiction'])}")
+    print(f"  Max confidence cap: {validation.max_confidence_cap}%")
+    print(f"  Total penalty points: {validation.total_penalty}")
+    return validation, validation.summary
 
-E) BASELINE SCORING:
-   - A fully complete case with all documents and no contradictions: 75-90%
-   - A complete case but missing some supporting docs: 55-75%
-   - A partially complete case with key gaps: 30-55%
-   - A case with contradictions or minimal info: 15-35%
 
-F) EXPLICITLY LIST every contradiction, missing field, and missing document
-   in the Evidence_Analysis.Critical_Gaps array. Do NOT gloss over them.
+def embed_query(query: str) -> List[float]:
+    """Embed a retrieval query (an HTTP call, independent of opening Chroma)."""
+    return get_embeddings().embed_query(query)
 
-═══════════════════════════════════════════════════════════════════════════════
 
-Analyze the case thoroughly and respond with ONLY a valid JSON object (no markdown, no code blocks, just raw JSON).
-The JSON must follow this exact structure:
+def search_similar_cases(vectorstore, query_embedding: List[float], k: int = 5) -> list:
+    """The k past cases nearest to an already-embedded query."""
+    similar_docs = vectorstore.similarity_search_by_vector(query_embedding, k=k)
+    print(f"✅ Retrieved {len(similar_docs)} similar cases")
+    return similar_docs
 
-{{
-    "Case_Summary": {{
-        "Title": "<Generated case title based on parties involved>",
-        "Case_Type": "<e.g., Deficiency in Service, Product Liability, Unfair Trade Practice>",
-        "Consumer_Details": {{
-            "Description": "<Brief description of the consumer/complainant>",
-            "Claim_Amount": "<Amount claimed or product value>",
-            "Key_Grievances": ["<List of main complaints>"]
-        }},
-        "Opposite_Party_Details": {{
-            "Description": "<Brief description of the seller/service provider>",
-            "Defense_Arguments": ["<List of defense arguments raised or likely to be raised>"]
-        }},
-        "Facts_of_Case": ["<Chronological list of key facts>"],
-        "Evidence_Available": ["<List of evidence the consumer has - include details from attached documents>"],
-        "Evidence_Missing": ["<List of evidence that would strengthen the case>"]
-    }},
-    "Legal_Grounds": {{
-        "Applicable_Sections": [
-            {{
-                "Section": "<Section number, e.g., 2(1)(g)>",
-                "Act": "<Full act name, e.g., Consumer Protection Act, 2019>",
-                "Description": "<What this section covers>",
-                "Relevance_to_Case": "<How it applies to this specific case>"
-            }}
-        ],
-        "Precedents_Cited": [
-            {{
-                "Case_Name": "<Full case citation>",
-                "Year": "<Year of judgment>",
-                "Court": "<Court name>",
-                "Key_Holding": "<Main principle established>",
-                "Relevance": "<How it supports the current case>"
-            }}
-        ],
-        "Legal_Principles": ["<Key legal principles applicable>"],
-        "Contextual_Notes": "<Additional legal context for the simulation>"
-    }},
-    "Judgment_Reasoning": {{
-        "Issues_Framed": [
-            {{
-                "Issue_Number": <1, 2, 3...>,
-                "Issue": "<Legal question to be decided>",
-                "Analysis": "<Detailed analysis of this issue>",
-                "Finding": "<Conclusion on this issue>"
-            }}
-        ],
-        "Findings": "<Overall findings summary>",
-        "Key_Evidence": ["<Evidence that influenced the decision - reference attached documents>"],
-        "Evidence_Analysis": {{
-            "Consumer_Evidence_Strength": "<Strong/Moderate/Weak>",
-            "Opposite_Party_Defense_Strength": "<Strong/Moderate/Weak>",
-            "Critical_Gaps": ["<Any gaps in evidence or arguments>"],
-            "Document_Analysis": "<Summary of what was found in the attached documents>"
-        }},
-        "Inference": "<Legal inference drawn from facts and law>",
-        "Liability_Status": "<Established/Not Established/Partial>",
-        "Liability_Confidence": "<Percentage confidence, e.g., 85%>",
-        "Reasoning_Chain": ["<Step-by-step logical reasoning>"]
-    }},
-    "Relief_Granted": {{
-        "Primary_Relief": {{
-            "Type": "<Refund/Replacement/Compensation/Service Rectification>",
-            "Amount": "<Specific amount if applicable>",
-            "Description": "<Details of the relief>"
-        }},
-        "Additional_Relief": [
-            {{
-                "Type": "<e.g., Mental Agony Compensation, Litigation Costs>",
-                "Amount": "<Amount if applicable>",
-                "Justification": "<Why this relief is appropriate>"
-            }}
-        ],
-        "Predicted_Outcomes": [
-            {{
-                "Relief": "<Type of outcome>",
-                "Confidence": "<Percentage with range, e.g., 78% [70-85]>",
-                "Probability_Assessment": "<High/Medium/Low>"
-            }}
-        ],
-        "Total_Compensation_Range": {{
-            "Minimum": "<Lower estimate>",
-            "Maximum": "<Upper estimate>",
-            "Most_Likely": "<Expected amount>"
-        }},
-        "Time_Frame": "<Expected duration for case resolution>",
-        "Recommended_Forum": "<District Forum/State Commission/National Commission>",
-        "Recommended_Action": "<Specific next steps for the consumer>"
-    }},
-    "Simulation_Metadata": {{
-        "Case_Strength": "<Strong/Moderate/Weak>",
-        "Success_Probability": "<Percentage>",
-        "Key_Arguments_For_Consumer": ["<Main arguments consumer should make>"],
-        "Key_Arguments_For_Opposite_Party": ["<Main counter-arguments>"],
-        "Critical_Moments": ["<Key points where the case could turn>"],
-        "Suggested_Witnesses": ["<Types of witnesses that could help>"],
-        "Documentary_Evidence_Required": ["<Documents needed for trial>"],
-        "Estimated_Hearing_Duration": "<Time estimate>",
-        "Complexity_Level": "<Simple/Moderate/Complex>",
-        "Similar_Cases_Referenced": ["<List of similar case names from context>"]
-    }}
-}}
 
-Ensure all fields are populated with detailed, realistic information suitable for a courtroom simulation.
-The response must be valid JSON that can be parsed directly.'''
+def retrieve_similar_cases(query: str, k: int = 5) -> list:
+    """Retrieve the k most similar past cases from the vector store."""
+    return search_similar_cases(get_vectorstore(), embed_query(query), k)
 
-    # Build multimodal content
-    content_parts = []
-    
-    # Add text prompt first
-    content_parts.append({"type": "text", "text": full_prompt})
-    
-    # Add documents as multimodal content
-    doc_count = 0
-    for doc in documents:
-        b64_content = doc.base64_content
-        if not b64_content and doc.file_content:
-            b64_content = base64.b64encode(doc.file_content).decode("utf-8")
-        
-        if not b64_content:
-            continue
-        
-        mime_type = doc.file_type
-        
-        # Add image
-        if mime_type.startswith("image/"):
-            content_parts.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:{mime_type};base64,{b64_content}"
-                }
-            })
-            doc_count += 1
-            print(f"  📷 Added image: {doc.name} ({doc.category})")
-        
-        # Add PDF - Gemini supports inline PDF data
-        elif mime_type == "application/pdf":
-            # For Gemini, we can pass PDF as inline data
-            content_parts.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:{mime_type};base64,{b64_content}"
-                }
-            })
-            doc_count += 1
-            print(f"  📄 Added PDF: {doc.name} ({doc.category})")
+
+def _prepare_planned_evidence(
+    documents: List[UploadedDocument], evidence_plan: tuple
+) -> tuple[List[UploadedDocument], Optional[EvidenceReport]]:
+    """Preprocess the uploads unless their cached facts are sent instead."""
+    if not documents or evidence_plan[2] or not EVIDENCE_PREPROCESS_ENABLED:
+        return documents, None
+    return preprocess_documents(documents)
+
+
+async def _aprepare_planned_evidence(
+    documents: List[UploadedDocument], evidence_plan: tuple
+) -> tuple[List[UploadedDocument], Optional[EvidenceReport]]:
+    if evidence_plan[2]:
+        return documents, None
+    return await _aprepare_evidence(documents)
+
+
+def _prediction_stage_graph(
+    final_query: str,
+    documents: List[UploadedDocument],
+    validate: Callable[[], tuple],
+    asynchronous: bool,
+    probe: Optional[SemanticProbe] = None,
+) -> StageGraph:
+    """
+    Everything the prediction needs before the LLM call, as a dependency graph.
+
+        cpa ─────────────────────────────┐
+        vectorstore ─────┬─ retrieval ───┤
+        query_embedding ─┘               ├─→ prompt fitting → llm
+        evidence_plan ───── evidence ────┤
+        semantic_cache (async only) ─────┤
+        validation ──────────────────────┘
+
+    With a semantic probe, retrieval runs speculatively alongside the cache
+    lookup; on a hit its result is simply unused.
+    """
+    graph = StageGraph("prediction")
+    graph.add("cpa", load_cpa_2019_context)
+    graph.add("vectorstore", get_vectorstore)
+    graph.add("query_embedding", embed_query, args=(final_query,))
+    graph.add("retrieval", search_similar_cases, deps=("vectorstore", "query_embedding"))
+    graph.add("evidence_plan", _plan_evidence_facts, args=(final_query, documents))
+    graph.add(
+        "evidence",
+        _aprepare_planned_evidence if asynchronous else _prepare_planned_evidence,
+        args=(documents,),
+        deps=("evidence_plan",),
+    )
+    if probe is not None:
+        graph.add("semantic_cache", prediction_semantic_cache.lookup, args=(probe, prediction_cache_version()))
+    # Inline and added last, so it runs while the pooled stages are in flight
+    graph.add("validation", validate, pool=None)
+    return graph
+
+
+def _fit_prediction_prompt(
+    final_query: str,
+    cpa_context: str,
+    similar_docs: list,
+    validation_summary: str,
+    multimodal: bool,
+) -> tuple[dict, BudgetReport, list, str]:
+    """Budget the prompt; returns (fitted segments, report, docs shown to the LLM, similar cases text)."""
+    print("\n--- Step 3a: Fitting Prompt to Token Budget ---")
+    fitted, budget_report = budget_prediction_prompt(
+        text_query=final_query,
+        cpa_context=cpa_context,
+        similar_cases=[doc.page_content for doc in similar_docs],
+        validation_summary=validation_summary,
+        multimodal=multimodal,
+    )
+    # Only the cases that survived trimming were shown to the LLM
+    source_docs_list = similar_docs[:len(fitted["similar_cases"])]
+    similar_cases_context = "\n\n".join(fitted["similar_cases"])
+    print(f"  Estimated prompt tokens: {budget_report.total_tokens} / {budget_report.total_budget}")
+    for name, entry in budget_report.segments.items():
+        if entry["trimmed"]:
+            print(f"  ✂️ Trimmed {name}: {entry['original_tokens']} → {entry['tokens']} tokens")
+
+    print("\n--- Step 4: Running Query ---")
+    print(f"Query length: {len(final_query)} characters")
+    print(f"Query preview: {final_query[:200]}..." if len(final_query) > 200 else f"Query: {final_query}")
+    return fitted, budget_report, source_docs_list, similar_cases_context
+
+
+def _finalize_prediction(
+    response_text: str,
+    validation: Optional[ValidationReport],
+    source_docs_list: list,
+    final_query: str,
+    input_type: str,
+    cpa_context: str,
+    has_documents: bool,
+    budget_report: BudgetReport,
+    complaint_data: Optional[ConsumerComplaintData],
+) -> dict:
+    """Parse the LLM output, apply confidence caps and attach response metadata."""
+    # Parse the JSON response
+    print("\n--- Step 5: Parsing Response ---")
+    json_response = parse_llm_response(response_text)
     
-    print(f"  ✅ Total documents added for multimodal processing: {doc_count}")
+    # ── Apply post-LLM confidence hard caps if validation ran ─────────────
+    if validation is not None:
+        print("\n--- Step 5a: Applying Confidence Adjustments ---")
+        json_response = apply_confidence_adjustments(json_response, validation)
+        print(f"  Applied max cap: {validation.max_confidence_cap}%")
     
-    # Create the message and invoke
-    message = HumanMessage(content=content_parts)
-    response = llm.invoke([message])
+    # Add source documents metadata to the response
+    source_docs = []
+    for doc in source_docs_list:
+        source_docs.append({
+            "metadata": doc.metadata if hasattr(doc, 'metadata') else {},
+            "content_preview": doc.page_content[:500] if hasattr(doc, 'page_content') and doc.page_content else ""
+        })
+    json_response["_source_documents"] = source_docs
+    json_response["_query"] = final_query
+    json_response["_input_type"] = input_type
+    json_response["_timestamp"] = datetime.now().isoformat()
+    json_response["_cpa_2019_included"] = bool(cpa_context)
+    json_response["_multimodal_processing"] = has_documents
+    json_response["_prompt_budget"] = budget_report.to_dict()
     
-    return response.content
+    # Add form data reference if available
+    if complaint_data:
+        json_response["_form_data"] = {
+            "complainant_name": complaint_data.complainant.name,
+            "opposite_party_name": complaint_data.opposite_party.name,
+            "case_category": complaint_data.case_details.case_category,
+            "claim_amount": complaint_data.case_details.claim_consideration,
+            "documents_count": len(complaint_data.documents),
+            "document_types": [doc.file_type for doc in complaint_data.documents],
+        }
+    return json_response
+
+
+def _provisional_section(name: str, value, validation: Optional[ValidationReport]):
+    """Apply the validation confidence caps to one streamed top-level section."""
+    if validation is None or not isinstance(value, dict):
+        return value
+    adjusted = apply_confidence_adjustments({name: copy.deepcopy(value)}, validation)
+    return adjusted[name]
+
+
+def _semantic_probe(complaint_data: Optional[ConsumerComplaintData], has_documents: bool) -> Optional[SemanticProbe]:
+    """
+    Describe a structured complaint for the semantic cache, or None if it is ineligible.
+
+    The narrative is generated from a copy with the personal values blanked,
+    so two complaints that differ only in who filed them embed identically.
+    Dates and the product stay in the narrative (they bear on limitation and
+    the merits) but are substituted like the rest of `personal` on a hit.
+    Requests with attached documents are never served from the cache.
+    """
+    if complaint_data is None or has_documents:
+        return None
+    c = complaint_data.complainant
+    cd = complaint_data.case_details
+    tx = complaint_data.transaction
+    op = complaint_data.opposite_party
+    personal = {
+        "complainant_name": c.name,
+        "father_husband_name": c.father_husband_name,
+        "complainant_address": c.address,
+        "complainant_phone": c.phone,
+        "complainant_email": c.email,
+        "opposite_party_name": op.name,
+        "opposite_party_address": op.address,
+        "opposite_party_phone": op.phone,
+        "opposite_party_email": op.email,
+        "district": cd.district_of_cause_of_action,
+        "product": tx.product_service_description,
+        "claim_amount": cd.claim_consideration,
+        "paid_amount": cd.paid_as_consideration,
+        "purchase_amount": tx.purchase_amount,
+        "invoice_number": tx.invoice_number,
+        "purchase_date": tx.purchase_date,
+        "date_of_cause_of_action": cd.date_of_cause_of_action,
+        "date_of_deficiency": complaint_data.grievance.date_of_deficiency,
+        "prior_complaint_date": complaint_data.prior_communication.prior_complaint_date,
+    }
+
+    anonymous = copy.deepcopy(complaint_data)
+    anonymous.complainant = ComplainantDetails(age=c.age, occupation=c.occupation)
+    anonymous.opposite_party = OppositePartyDetails()
+    anonymous.case_details.claim_consideration = ""
+    anonymous.case_details.district_of_cause_of_action = ""
+    anonymous.case_details.paid_as_consideration = ""
+    anonymous.transaction.purchase_amount = ""
+    anonymous.transaction.invoice_number = ""
+    anonymous.documents = []
+
+    amount = _parse_amount(cd.claim_consideration) or _parse_amount(cd.paid_as_consideration) or _parse_amount(tx.purchase_amount)
+    return SemanticProbe(
+        narrative=generate_case_query_from_form(anonymous),
+        scope=(
+            cd.case_category.strip().upper(),
+            normalize_party(op.name),
+            amount_bucket(amount),
+        ),
+        personal=personal,
+    )
+
+
+def prediction_cache_version() -> str:
+    """Semantic cache entries are only valid for the model and prompt that produced them."""
+    return f"{LLM_MODEL}:{prediction_prompt_version()}"
+
+
+def _persist_prediction(
+    json_response: dict,
+    final_query: str,
+    user_id: Optional[str],
+    cpa_context: str,
+) -> Optional[str]:
+    """Save the prediction to Supabase (no local file saving)."""
+    print("\n--- Step 6: Saving to Supabase Database ---")
+    supabase = get_supabase_client()
+    if not supabase:
+        print("⚠️ Supabase client not available, prediction not saved to database")
+        return None
+    # Inline, not write-behind: the frontend reads this row by id as soon as
+    # the response arrives, and a failed insert must surface here
+    supabase_record_id = save_to_supabase(
+        supabase=supabase,
+        json_data=json_response,
+        query=final_query,
+        user_id=user_id,
+        cpa_included=bool(cpa_context)
+    )
+    if supabase_record_id:
+        json_response["_supabase_id"] = supabase_record_id
+        print(f"✅ Prediction saved to Supabase with ID: {supabase_record_id}")
+    return supabase_record_id
 
 
 def run_judgment_prediction(
@@ -1593,152 +2158,254 @@ def run_judgment_prediction(
     Returns:
         Tuple of (parsed JSON response, Supabase record ID or None)
     """
-    # Determine the query to use and prepare complaint data
-    final_query = ""
-    input_type = "text"
-    has_documents = False
-    
-    if complaint_data is not None:
-        # Use structured data directly
-        final_query = generate_case_query_from_form(complaint_data)
-        has_documents = len(complaint_data.documents) > 0
-        input_type = "structured_form"
-        print("📋 Using structured ConsumerComplaintData input")
-    elif form_dict is not None:
-        # Convert dictionary to ConsumerComplaintData
-        complaint_data = ConsumerComplaintData.from_dict(form_dict)
-        if documents:
-            complaint_data.documents = documents
-        final_query = generate_case_query_from_form(complaint_data)
-        has_documents = len(complaint_data.documents) > 0
-        input_type = "form_dict"
-        print("📋 Using form dictionary input")
-    elif query is not None:
-        # Use plain text query (legacy)
-        final_query = query
-        input_type = "text"
-        print("📝 Using plain text query input")
-    else:
-        raise ValueError("Must provide either 'query', 'complaint_data', or 'form_dict'")
-    
-    # ── Run pre-LLM validation if we have structured data ─────────────────
-    validation: Optional[ValidationReport] = None
-    validation_summary = ""
-    if complaint_data is not None:
-        print("--- Step 0: Validating Complaint Data ---")
-        validation = validate_complaint_data(complaint_data)
-        validation_summary = validation.summary
-        print(f"  Completeness: {validation.completeness_score:.0%}")
-        print(f"  Document score: {validation.document_score:.0%}")
-        print(f"  Contradictions: {len([i for i in validation.issues if i.category == 'contradiction'])}")
-        print(f"  Max confidence cap: {validation.max_confidence_cap}%")
-        print(f"  Total penalty points: {validation.total_penalty}")
-
-    print("--- Step 1: Loading Consumer Protection Act 2019 ---")
-    cpa_context = load_cpa_2019_context()
+    final_query, complaint_data, input_type, has_documents = _resolve_prediction_input(
+        query, complaint_data, form_dict, documents
+    )
+    multimodal = bool(has_documents and complaint_data)
+
+    print("--- Step 0-3: Validating, Loading CPA 2019, Retrieving Similar Cases and Preparing Evidence ---")
+    stage_run = _prediction_stage_graph(
+        final_query,
+        complaint_data.documents if multimodal else [],
+        validate=lambda: _run_validation(complaint_data),
+        asynchronous=False,
+    ).run_sync()
+    validation, validation_summary = stage_run.results["validation"]
+    cpa_context = stage_run.results["cpa"]
+    similar_docs = stage_run.results["retrieval"]
+    llm_query, missing_facts, facts_reused = stage_run.results["evidence_plan"]
+    documents, evidence_report = stage_run.results["evidence"]
+    multimodal = multimodal and not facts_reused
+    fitted, budget_report, source_docs_list, similar_cases_context = _fit_prediction_prompt(
+        llm_query, cpa_context, similar_docs, validation_summary, multimodal
+    )
     
-    print("\n--- Step 2: Loading Existing Vector Database ---")
-    vectorstore = get_vectorstore()
-    print(f"✅ Database loaded successfully from: '{VECTORSTORE_DIR}'")
+    # Choose between multimodal and regular processing
+    with stage_run.timed("llm", *stage_run.results):
+        if multimodal:
+            print(f"\n--- Step 4a: Processing {len(complaint_data.documents)} documents with multimodal LLM ---")
+            response_text = run_multimodal_prediction(
+                text_query=fitted["text_query"],
+                documents=documents,
+                cpa_context=fitted["cpa_context"],
+                similar_cases_context=similar_cases_context,
+                validation_summary=fitted["validation_summary"],
+            )
+            if missing_facts:
+                _extract_missing_facts(complaint_data.documents, documents, missing_facts)
+        else:
+            print("\n--- Step 4a: Running text-only prediction (no documents) ---")
+            response_text = run_text_prediction(
+                text_query=fitted["text_query"],
+                cpa_context=fitted["cpa_context"],
+                similar_cases_context=similar_cases_context,
+                validation_summary=fitted["validation_summary"],
+            )
     
-    print("\n--- Step 3: Retrieving Similar Cases ---")
-    # Get similar cases from vector store
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-    similar_docs = retriever.invoke(final_query)
-    similar_cases_context = "\n\n".join([doc.page_content for doc in similar_docs])
-    print(f"✅ Retrieved {len(similar_docs)} similar cases")
+    json_response = _finalize_prediction(
+        response_text, validation, source_docs_list, final_query, input_type,
+        cpa_context, multimodal, budget_report, complaint_data,
+    )
+    if evidence_report is not None:
+        json_response["_evidence_preprocessing"] = evidence_report.to_dict()
+    if has_documents and complaint_data and EVIDENCE_FACTS_ENABLED:
+        json_response["_evidence"] = _evidence_refs(complaint_data.documents)
+        json_response["_evidence_facts_reused"] = facts_reused
+    json_response["_stage_timings"] = stage_run.to_dict()
     
-    print("\n--- Step 4: Running Query ---")
-    print(f"Query length: {len(final_query)} characters")
-    print(f"Query preview: {final_query[:200]}..." if len(final_query) > 200 else f"Query: {final_query}")
+    supabase_record_id = None
+    if save_to_db:
+        with stage_run.timed("persistence", "llm"):
+            supabase_record_id = _persist_prediction(json_response, final_query, user_id, cpa_context)
+        json_response["_stage_timings"] = stage_run.to_dict()
     
-    # Choose between multimodal and regular processing
-    if has_documents and complaint_data:
-        print(f"\n--- Step 4a: Processing {len(complaint_data.documents)} documents with multimodal LLM ---")
-        response_text = run_multimodal_prediction(
-            text_query=final_query,
-            documents=complaint_data.documents,
-            cpa_context=cpa_context,
-            similar_cases_context=similar_cases_context,
-            validation_summary=validation_summary,
+    return json_response, supabase_record_id
+
+
+async def arun_judgment_prediction(
+    query: Optional[str] = None,
+    complaint_data: Optional[ConsumerComplaintData] = None,
+    form_dict: Optional[dict] = None,
+    documents: Optional[List[UploadedDocument]] = None,
+    user_id: Optional[str] = None,
+    save_to_db: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    stream_tokens: bool = False,
+) -> tuple[dict, Optional[str]]:
+    """
+    Async variant of run_judgment_prediction() for use inside the event loop.
+
+    The LLM call uses ainvoke; the CPA load, Chroma retrieval (which embeds
+    the query over HTTP) and the Supabase insert run on the bounded "io"
+    executor, so one prediction never blocks other requests. The stages
+    before the LLM call form a dependency graph (_prediction_stage_graph)
+    and run concurrently; per-stage timings are returned in "_stage_timings".
+
+    progress, if given, is called as each of PREDICTION_STAGES starts and
+    completes (see ProgressCallback). With stream_tokens the LLM output is
+    streamed: every text delta is reported as an llm "token" event and each
+    top-level JSON section as an llm "section" event once it has fully
+    arrived. Section values already have the confidence caps applied but
+    are provisional; the returned prediction is authoritative.
+
+    When the semantic cache is enabled, a structured complaint that nearly
+    duplicates an earlier one (see semantic_cache.py) reuses that
+    prediction: retrieval and llm are reported as skipped and the response
+    carries "_semantic_cache" metadata.
+    """
+    final_query, complaint_data, input_type, has_documents = _resolve_prediction_input(
+        query, complaint_data, form_dict, documents
+    )
+    multimodal = bool(has_documents and complaint_data)
+    probe = _semantic_probe(complaint_data, has_documents)
+
+    def validate() -> tuple:
+        _report(progress, "validation", "started")
+        result = _run_validation(complaint_data)
+        _report(progress, "validation", "completed", report=result[0].to_dict() if result[0] else None)
+        return result
+
+    print("--- Step 0-3: Validating, Loading CPA 2019, Retrieving Similar Cases and Preparing Evidence ---")
+    _report(progress, "retrieval", "started")
+    stage_run = await _prediction_stage_graph(
+        final_query,
+        complaint_data.documents if multimodal else [],
+        validate=validate,
+        asynchronous=True,
+        probe=probe,
+    ).run()
+    validation, validation_summary = stage_run.results["validation"]
+    cpa_context = stage_run.results["cpa"]
+    hit = stage_run.results.get("semantic_cache")
+    reused = None
+    if hit is not None:
+        reused = repersonalize(hit[0].response_text, hit[0].personal, probe.personal)
+        if reused is None:
+            # The cached output still states the old case's amounts
+            metrics.incr("prediction.semantic_cache", outcome="rejected")
+            print("⚠️ Semantic cache hit rejected: previous case's amounts could not be replaced")
+
+    if reused is not None:
+        entry, similarity = hit
+        print(f"♻️ Semantic cache hit (similarity {similarity:.3f}), skipping retrieval and LLM")
+        _report(progress, "retrieval", "skipped", semantic_cache=True)
+        _report(progress, "llm", "skipped", semantic_cache=True)
+        json_response = _finalize_prediction(
+            reused,
+            validation, entry.extras["source_docs"], final_query, input_type,
+            cpa_context, has_documents, entry.extras["budget_report"], complaint_data,
         )
-        source_docs_list = similar_docs
+        json_response["_semantic_cache"] = {
+            "hit": True,
+            "similarity": round(similarity, 4),
+            "source_prediction_id": entry.extras.get("prediction_id"),
+        }
+        if stream_tokens:
+            for name, value in json_response.items():
+                if not name.startswith("_"):
+                    _report(progress, "llm", "section", name=name, value=value)
     else:
-        print("\n--- Step 4a: Using standard RAG chain (no documents) ---")
-        qa_chain = get_qa_chain(vectorstore, cpa_context, validation_summary=validation_summary)
-        print("✅ LLM and retriever are ready.")
-        response = qa_chain.invoke({"query": final_query})
-        response_text = response["result"]
-        source_docs_list = response.get("source_documents", [])
-    
-    # Parse the JSON response
-    print("\n--- Step 5: Parsing Response ---")
-    json_response = parse_llm_response(response_text)
-    
-    # ── Apply post-LLM confidence hard caps if validation ran ─────────────
-    if validation is not None:
-        print("\n--- Step 5a: Applying Confidence Adjustments ---")
-        json_response = apply_confidence_adjustments(json_response, validation)
-        print(f"  Applied max cap: {validation.max_confidence_cap}%")
-    
-    # Add source documents metadata to the response
-    source_docs = []
-    for doc in source_docs_list:
-        source_docs.append({
-            "metadata": doc.metadata if hasattr(doc, 'metadata') else {},
-            "content_preview": doc.page_content[:500] if hasattr(doc, 'page_content') and doc.page_content else ""
-        })
-    json_response["_source_documents"] = source_docs
-    json_response["_query"] = final_query
-    json_response["_input_type"] = input_type
-    json_response["_timestamp"] = datetime.now().isoformat()
-    json_response["_cpa_2019_included"] = bool(cpa_context)
-    json_response["_multimodal_processing"] = has_documents
+        similar_docs = stage_run.results["retrieval"]
+        llm_query, missing_facts, facts_reused = stage_run.results["evidence_plan"]
+        documents, evidence_report = stage_run.results["evidence"]
+        multimodal = multimodal and not facts_reused
+        fitted, budget_report, source_docs_list, similar_cases_context = _fit_prediction_prompt(
+            llm_query, cpa_context, similar_docs, validation_summary, multimodal
+        )
+        _report(
+            progress, "retrieval", "completed",
+            cases=[
+                {"metadata": doc.metadata, "content_preview": doc.page_content[:500]}
+                for doc in source_docs_list
+            ],
+            timings=stage_run.to_dict(),
+        )
     
-    # Add form data reference if available
-    if complaint_data:
-        json_response["_form_data"] = {
-            "complainant_name": complaint_data.complainant.name,
-            "opposite_party_name": complaint_data.opposite_party.name,
-            "case_category": complaint_data.case_details.case_category,
-            "claim_amount": complaint_data.case_details.claim_consideration,
-            "documents_count": len(complaint_data.documents),
-            "document_types": [doc.file_type for doc in complaint_data.documents],
-        }
+        on_text = None
+        if stream_tokens:
+            sections = JsonSectionStreamer()
+
+            def on_text(text: str) -> None:
+                _report(progress, "llm", "token", text=text)
+                for name, value in sections.feed(text):
+                    _report(progress, "llm", "section", name=name, value=_provisional_section(name, value, validation))
+
+        _report(
+            progress, "llm", "started", multimodal=multimodal,
+            evidence=evidence_report.to_dict() if evidence_report else None,
+        )
+        with stage_run.timed("llm", *stage_run.results):
+            if multimodal:
+                print(f"\n--- Step 4a: Processing {len(complaint_data.documents)} documents with multimodal LLM ---")
+                prediction = arun_multimodal_prediction(
+                    text_query=fitted["text_query"],
+                    documents=documents,
+                    cpa_context=fitted["cpa_context"],
+                    similar_cases_context=similar_cases_context,
+                    validation_summary=fitted["validation_summary"],
+                    on_text=on_text,
+                )
+                if missing_facts:
+                    response_text, _ = await asyncio.gather(
+                        prediction, _aextract_missing_facts(complaint_data.documents, documents, missing_facts)
+                    )
+                else:
+                    response_text = await prediction
+            else:
+                print("\n--- Step 4a: Running text-only prediction (no documents) ---")
+                response_text = await arun_text_prediction(
+                    text_query=fitted["text_query"],
+                    cpa_context=fitted["cpa_context"],
+                    similar_cases_context=similar_cases_context,
+                    validation_summary=fitted["validation_summary"],
+                    on_text=on_text,
+                )
+    
+        json_response = _finalize_prediction(
+            response_text, validation, source_docs_list, final_query, input_type,
+            cpa_context, multimodal, budget_report, complaint_data,
+        )
+        if evidence_report is not None:
+            json_response["_evidence_preprocessing"] = evidence_report.to_dict()
+        if has_documents and complaint_data and EVIDENCE_FACTS_ENABLED:
+            json_response["_evidence"] = _evidence_refs(complaint_data.documents)
+            json_response["_evidence_facts_reused"] = facts_reused
+        _report(progress, "llm", "completed", parse_error="error" in json_response)
+    json_response["_stage_timings"] = stage_run.to_dict()
     
-    # Save to Supabase database (no local file saving)
     supabase_record_id = None
     if save_to_db:
-        print("\n--- Step 6: Saving to Supabase Database ---")
-        supabase = get_supabase_client()
-        if supabase:
-            supabase_record_id = save_to_supabase(
-                supabase=supabase,
-                json_data=json_response,
-                query=final_query,
-                user_id=user_id,
-                cpa_included=bool(cpa_context)
-            )
-            if supabase_record_id:
-                json_response["_supabase_id"] = supabase_record_id
-                print(f"✅ Prediction saved to Supabase with ID: {supabase_record_id}")
-        else:
-            print("⚠️ Supabase client not available, prediction not saved to database")
+        _report(progress, "persistence", "started")
+        with stage_run.timed("persistence", "llm" if reused is None else "cpa"):
+            supabase_record_id = await run_blocking(_persist_prediction, json_response, final_query, user_id, cpa_context)
+        json_response["_stage_timings"] = stage_run.to_dict()
+        _report(progress, "persistence", "completed", prediction_id=supabase_record_id)
+    else:
+        _report(progress, "persistence", "skipped")
+
+    if probe is not None and reused is None and "error" not in json_response:
+        prediction_semantic_cache.store(
+            probe,
+            prediction_cache_version(),
+            response_text,
+            extras={
+                "source_docs": source_docs_list,
+                "budget_report": budget_report,
+                "prediction_id": supabase_record_id,
+            },
+        )
     
     return json_response, supabase_record_id
 
 
-def run_judgment_prediction_from_api(
+def build_complaint_from_api(
     form_data: dict,
     file_data: Optional[List[dict]] = None,
-    user_id: Optional[str] = None,
-    save_to_db: bool = True
-) -> tuple[dict, Optional[str]]:
+) -> ConsumerComplaintData:
     """
-    Convenience function for API endpoints.
+    Convert an API payload to ConsumerComplaintData.
     
-    Files are passed directly to Google Gemini as base64 - NO local storage required.
-    Results are stored only in Supabase.
+    Files are kept as base64 for direct multimodal processing - NO local storage.
     
     Args:
         form_data: Dictionary containing all form fields from ConsumerComplaintTemplate
@@ -1747,11 +2414,8 @@ def run_judgment_prediction_from_api(
                    - category: document category  
                    - file_type: MIME type (e.g., 'image/jpeg', 'application/pdf')
                    - content: base64 encoded file content (with or without data URI prefix)
-        user_id: Optional user ID
-        save_to_db: Whether to save to Supabase database
-        
-    Returns:
-        Tuple of (prediction result, Supabase record ID)
+                   or, for streamed multipart uploads (see api/uploads.py):
+                   - handle: spooled file object, plus size and sha256
     """
     # Convert form data to ConsumerComplaintData
     complaint_data = ConsumerComplaintData.from_dict(form_data)
@@ -1760,6 +2424,19 @@ def run_judgment_prediction_from_api(
     if file_data:
         print(f"📎 Processing {len(file_data)} uploaded files for multimodal analysis...")
         for file_info in file_data:
+            if file_info.get("handle") is not None:
+                # Streamed multipart upload - keep the spooled file, encode at the provider
+                doc = UploadedDocument(
+                    name=file_info.get("name", "unknown"),
+                    category=file_info.get("category", "Other"),
+                    file_type=file_info.get("file_type", "application/octet-stream"),
+                    file_handle=file_info["handle"],
+                    sha256=file_info.get("sha256"),
+                )
+                complaint_data.documents.append(doc)
+                print(f"  ✓ Added: {doc.name} ({doc.file_type}, {file_info.get('size', 0)} bytes, spooled)")
+                continue
+
             # Get base64 content
             content_b64 = file_info.get("content", "")
             
@@ -1778,13 +2455,55 @@ def run_judgment_prediction_from_api(
             complaint_data.documents.append(doc)
             print(f"  ✓ Added: {doc.name} ({doc.file_type})")
     
+    return complaint_data
+
+
+def run_judgment_prediction_from_api(
+    form_data: dict,
+    file_data: Optional[List[dict]] = None,
+    user_id: Optional[str] = None,
+    save_to_db: bool = True
+) -> tuple[dict, Optional[str]]:
+    """
+    Convenience function for API endpoints.
+    
+    Files are passed directly to Google Gemini as base64 - NO local storage required.
+    Results are stored only in Supabase.
+    
+    Args:
+        form_data: Dictionary containing all form fields from ConsumerComplaintTemplate
+        file_data: List of file information dictionaries (see build_complaint_from_api)
+        user_id: Optional user ID
+        save_to_db: Whether to save to Supabase database
+        
+    Returns:
+        Tuple of (prediction result, Supabase record ID)
+    """
     return run_judgment_prediction(
-        complaint_data=complaint_data,
+        complaint_data=build_complaint_from_api(form_data, file_data),
         user_id=user_id,
         save_to_db=save_to_db
     )
 
 
+async def arun_judgment_prediction_from_api(
+    form_data: dict,
+    file_data: Optional[List[dict]] = None,
+    user_id: Optional[str] = None,
+    save_to_db: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    stream_tokens: bool = False,
+) -> tuple[dict, Optional[str]]:
+    """Async variant of run_judgment_prediction_from_api() for async endpoints."""
+    return await arun_judgment_prediction(
+        complaint_data=build_complaint_from_api(form_data, file_data),
+        user_id=user_id,
+        save_to_db=save_to_db,
+        progress=progress,
+        stream_tokens=stream_tokens,
+    )
+
+
 # ========== Main Execution ==========
 if __name__ == "__main__":
     print("\n" + "=" * 70)
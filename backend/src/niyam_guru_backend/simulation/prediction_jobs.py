@@ -0,0 +1,423 @@
+"""
+Background prediction jobs.
+
+POST /api/prediction/jobs enqueues a prediction and returns a job id at once;
+a fixed pool of asyncio workers runs arun_judgment_prediction_from_api and
+records per-stage progress (validation, retrieval, llm, persistence), which
+clients poll via GET /api/prediction/jobs/{id}.
+
+Job state lives in a JobStore:
+- InMemoryJobStore   process-local (default)
+- SQLiteJobStore     durable; jobs still queued or running when the process
+                     stopped are re-queued on the next start
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from niyam_guru_backend.config import (
+    PREDICTION_JOB_BACKEND,
+    PREDICTION_JOB_WORKERS,
+    PREDICTION_JOB_MAX_PENDING,
+    PREDICTION_JOB_RETENTION,
+    PREDICTION_JOB_DB_PATH,
+)
+from niyam_guru_backend.core import metrics, run_blocking
+from niyam_guru_backend.simulation.judgement_prediction import (
+    PREDICTION_STAGES,
+    arun_judgment_prediction_from_api,
+)
+
+
+# ========== Job Model ==========
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Progress-callback status → stored stage status
+_STAGE_STATUS = {"started": "running", "completed": "completed", "skipped": "skipped"}
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class JobQueueFullError(Exception):
+    """Raised when the number of pending jobs reaches PREDICTION_JOB_MAX_PENDING."""
+
+
+@dataclass
+class PredictionJob:
+    """One queued prediction and its progress."""
+    id: str
+    request: dict                                   # form_data, file_data, user_id, save_to_db
+    status: str = JOB_QUEUED
+    stages: Dict[str, dict] = field(
+        default_factory=lambda: {stage: {"status": "pending"} for stage in PREDICTION_STAGES}
+    )
+    result: Optional[dict] = None
+    prediction_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def update_stage(self, stage: str, status: str) -> bool:
+        """Record a stage transition; False for events that don't change the stage's status."""
+        if status not in _STAGE_STATUS:
+            return False
+        entry = self.stages.setdefault(stage, {"status": "pending"})
+        if entry["status"] == _STAGE_STATUS[status]:
+            return False
+        entry["status"] = _STAGE_STATUS[status]
+        if status == "started":
+            entry["started_at"] = _now()
+        else:
+            entry["finished_at"] = _now()
+        return True
+
+    def to_dict(self) -> dict:
+        """Public view of the job (the request payload is never exposed)."""
+        current = next(
+            (stage for stage, entry in self.stages.items() if entry["status"] == "running"),
+            None,
+        )
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "currentStage": current,
+            "stages": self.stages,
+            "prediction": self.result,
+            "predictionId": self.prediction_id,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+    def to_record(self) -> str:
+        return json.dumps({
+            "id": self.id,
+            "request": self.request,
+            "status": self.status,
+            "stages": self.stages,
+            "result": self.result,
+            "prediction_id": self.prediction_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }, default=str)
+
+    @classmethod
+    def from_record(cls, record: str) -> "PredictionJob":
+        return cls(**json.loads(record))
+
+
+# ========== Job Stores ==========
+
+class JobStore:
+    """Interface for job persistence backends."""
+
+    # True when saves touch disk/network and should run off the event loop
+    blocking = False
+    durable = False
+
+    def save(self, job: PredictionJob) -> None:
+        raise NotImplementedError
+
+    def save_progress(self, job: PredictionJob) -> None:
+        """Persist only the job's status and stages (the job has been saved before)."""
+        self.save(job)
+
+    def get(self, job_id: str) -> Optional[PredictionJob]:
+        raise NotImplementedError
+
+    def unfinished(self) -> List[PredictionJob]:
+        """Jobs that were queued or running, oldest first."""
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store; keeps at most `retention` finished jobs."""
+
+    def __init__(self, retention: int = PREDICTION_JOB_RETENTION):
+        self.retention = retention
+        self._jobs: "OrderedDict[str, PredictionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: PredictionJob) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [j.id for j in self._jobs.values() if j.finished]
+            for job_id in finished[:max(0, len(finished) - self.retention)]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[PredictionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def unfinished(self) -> List[PredictionJob]:
+        with self._lock:
+            return [j for j in self._jobs.values() if not j.finished]
+
+
+class SQLiteJobStore(JobStore):
+    """Durable single-file store; survives restarts of a single-node deployment."""
+
+    blocking = True
+    durable = True
+
+    def __init__(self, path: str = PREDICTION_JOB_DB_PATH, retention: int = PREDICTION_JOB_RETENTION):
+        self.path = str(path)
+        self.retention = retention
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prediction_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " created_at TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " job TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_prediction_jobs_status ON prediction_jobs (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, job: PredictionJob) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO prediction_jobs (id, status, created_at, updated_at, job) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET status = excluded.status,"
+                " updated_at = excluded.updated_at, job = excluded.job",
+                (job.id, job.status, job.created_at, time.time(), job.to_record()),
+            )
+            if job.finished:
+                conn.execute(
+                    "DELETE FROM prediction_jobs WHERE id IN ("
+                    " SELECT id FROM prediction_jobs WHERE status IN (?, ?)"
+                    " ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (*FINISHED_STATUSES, self.retention),
+                )
+
+    def save_progress(self, job: PredictionJob) -> None:
+        # Patch the stored record in place: the request payload (base64
+        # evidence included) is not re-serialised on every stage transition
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE prediction_jobs SET status = ?, updated_at = ?,"
+                " job = json_set(job, '$.status', ?, '$.stages', json(?)) WHERE id = ?",
+                (job.status, time.time(), job.status, json.dumps(job.stages), job.id),
+            )
+
+    def get(self, job_id: str) -> Optional[PredictionJob]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT job FROM prediction_jobs WHERE id = ?", (job_id,)).fetchone()
+        return PredictionJob.from_record(row[0]) if row else None
+
+    def unfinished(self) -> List[PredictionJob]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job FROM prediction_jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+        return [PredictionJob.from_record(row[0]) for row in rows]
+
+
+def create_job_store(backend: str = PREDICTION_JOB_BACKEND) -> JobStore:
+    """Build the configured job store, falling back to memory if SQLite is unusable."""
+    if backend == "sqlite":
+        try:
+            return SQLiteJobStore()
+        except Exception as e:
+            print(f"⚠️ Could not open prediction job database, using in-memory jobs: {e}")
+    return InMemoryJobStore()
+
+
+# ========== Worker Pool ==========
+
+class PredictionJobQueue:
+    """Bounded asyncio worker pool running queued predictions."""
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        workers: int = PREDICTION_JOB_WORKERS,
+        max_pending: int = PREDICTION_JOB_MAX_PENDING,
+    ):
+        self.store = store or create_job_store()
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active: Dict[str, PredictionJob] = {}   # queued/running jobs, read without a store round-trip
+        self._save_lock: Optional[asyncio.Lock] = None
+        self._progress_saves: Set[asyncio.Task] = set()   # referenced until done
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the workers and re-queue unfinished jobs from a durable store."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._save_lock = asyncio.Lock()
+
+        if self.store.durable:
+            for job in await self._call_store(self.store.unfinished):
+                job.status = JOB_QUEUED
+                job.stages = {stage: {"status": "pending"} for stage in PREDICTION_STAGES}
+                self._active[job.id] = job
+                self._queue.put_nowait(job)
+            if self._active:
+                print(f"🔁 Re-queued {len(self._active)} unfinished prediction jobs")
+
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"✅ Prediction job queue started ({self.workers} workers, {type(self.store).__name__})")
+
+    async def stop(self) -> None:
+        """Cancel the workers. Unfinished jobs stay queued in a durable store."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        form_data: dict,
+        file_data: Optional[List[dict]] = None,
+        user_id: Optional[str] = None,
+        save_to_db: bool = True,
+    ) -> PredictionJob:
+        """Queue a prediction and return its job without waiting for it."""
+        if not self.running:
+            await self.start()
+        if len(self._active) >= self.max_pending:
+            metrics.incr("prediction.jobs.rejected")
+            raise JobQueueFullError(f"Too many pending prediction jobs ({len(self._active)})")
+
+        job = PredictionJob(
+            id=str(uuid.uuid4()),
+            request={
+                "form_data": form_data,
+                "file_data": file_data,
+                "user_id": user_id,
+                "save_to_db": save_to_db,
+            },
+        )
+        self._active[job.id] = job
+        await self._save(job)
+        self._queue.put_nowait(job)
+        metrics.incr("prediction.jobs.submitted")
+        metrics.set_gauge("prediction.jobs.pending", len(self._active))
+        return job
+
+    async def get(self, job_id: str) -> Optional[PredictionJob]:
+        """Look up a job by id (live state for active jobs)."""
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        return await self._call_store(self.store.get, job_id)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _call_store(self, func, *args):
+        if self.store.blocking:
+            return await run_blocking(func, *args)
+        return func(*args)
+
+    async def _save(self, job: PredictionJob, progress_only: bool = False) -> None:
+        # Serialised so a slower earlier write can never overwrite a later state
+        save = self.store.save_progress if progress_only else self.store.save
+        async with self._save_lock:
+            try:
+                await self._call_store(save, job)
+            except Exception as e:
+                print(f"⚠️ Could not persist prediction job {job.id}: {e}")
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Prediction job worker {number} crashed on {job.id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: PredictionJob) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = _now()
+        await self._save(job)
+        started = time.perf_counter()
+
+        def on_progress(stage: str, status: str, data: dict) -> None:
+            if not job.update_stage(stage, status):
+                return  # tokens, sections and repeats: nothing new to persist
+            task = asyncio.create_task(self._save(job, progress_only=True))
+            self._progress_saves.add(task)
+            task.add_done_callback(self._progress_saves.discard)
+
+        request = job.request
+        try:
+            result, prediction_id = await arun_judgment_prediction_from_api(
+                form_data=request["form_data"],
+                file_data=request.get("file_data"),
+                user_id=request.get("user_id"),
+                save_to_db=request.get("save_to_db", True),
+                progress=on_progress,
+            )
+            job.result = result
+            job.prediction_id = prediction_id
+            job.error = result.get("error")
+            job.status = JOB_FAILED if job.error else JOB_SUCCEEDED
+        except Exception as e:
+            print(f"❌ Prediction job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = JOB_FAILED
+            for entry in job.stages.values():
+                if entry["status"] == "running":
+                    entry["status"] = "failed"
+                    entry["finished_at"] = _now()
+
+        job.finished_at = _now()
+        job.request = {}  # drop the (possibly large) payload once it has been processed
+        await self._save(job)
+        self._active.pop(job.id, None)
+
+        metrics.observe("prediction.jobs.run_seconds", time.perf_counter() - started)
+        metrics.incr("prediction.jobs.finished", status=job.status)
+        metrics.set_gauge("prediction.jobs.pending", len(self._active))
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+prediction_jobs = PredictionJobQueue()
@@ -0,0 +1,171 @@
+"""
+Prompt token budgeting for the judgment prediction prompt.
+
+The prediction prompt is assembled from independent segments (static
+instructions, CPA 2019 text, retrieved cases, the case narrative, the
+validation report). Each segment gets a local token estimate, an optional
+per-segment cap and a trimming policy; when the assembled prompt exceeds
+the total budget, segments are trimmed in priority order (lowest first)
+until it fits.
+
+Token counts are estimated locally — no tokenizer round-trip to Gemini.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from niyam_guru_backend.config import (
+    PROMPT_CHARS_PER_TOKEN,
+    PROMPT_TOTAL_TOKEN_BUDGET,
+)
+from niyam_guru_backend.llm.tokens import estimate_tokens
+
+
+# ========== Trimming Policies ==========
+
+TRUNCATE_TAIL = "truncate_tail"      # keep the beginning, cut the end
+TRUNCATE_MIDDLE = "truncate_middle"  # keep head and tail, cut the middle
+DROP_ITEMS = "drop_items"            # drop whole items from the end of a list
+
+TRUNCATION_MARKER = "\n[... truncated to fit the prompt budget ...]\n"
+
+
+def _cut_to_tokens(text: str, max_tokens: int, policy: str = TRUNCATE_TAIL) -> str:
+    """
+    Shrink text until it fits max_tokens, marking where content was removed:
+    TRUNCATE_MIDDLE keeps the head and tail, anything else keeps the head.
+    """
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - estimate_tokens(TRUNCATION_MARKER))
+    # Start from a proportional guess, then walk down until the estimate fits
+    keep = int(len(text) * budget / max(1, estimate_tokens(text)))
+    while keep > 0:
+        if policy == TRUNCATE_MIDDLE:
+            head = text[: keep // 2]
+            tail = text[len(text) - (keep - keep // 2):]
+            candidate = head + TRUNCATION_MARKER + tail
+        else:
+            candidate = text[:keep] + TRUNCATION_MARKER
+        if estimate_tokens(candidate) <= max_tokens:
+            return candidate
+        keep = int(keep * 0.95)
+    return ""
+
+
+@dataclass
+class PromptSegment:
+    """One independently budgeted part of a prompt."""
+    name: str
+    text: str = ""
+    items: Optional[List[str]] = None    # Used by DROP_ITEMS; joined with separator
+    separator: str = "\n\n"
+    policy: str = TRUNCATE_TAIL
+    max_tokens: Optional[int] = None      # Per-segment cap (None = uncapped)
+    min_tokens: int = 0                   # Never trim below this
+    priority: int = 0                     # Lower priority is trimmed first
+    required: bool = False                # Required segments are never trimmed
+
+    def __post_init__(self):
+        if self.items is not None:
+            self.items = [item for item in self.items if item]
+        self.original_tokens = self.tokens
+
+    @property
+    def content(self) -> str:
+        if self.items is not None:
+            return self.separator.join(self.items)
+        return self.text
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.content)
+
+    def trim_to(self, max_tokens: int) -> None:
+        """Apply this segment's policy so it fits within max_tokens."""
+        max_tokens = max(self.min_tokens, max_tokens)
+        if self.required or self.tokens <= max_tokens:
+            return
+
+        if self.policy == DROP_ITEMS and self.items is not None:
+            # Items are ordered by relevance — drop from the end, keep at least one
+            while len(self.items) > 1 and self.tokens > max_tokens:
+                self.items.pop()
+            if self.tokens > max_tokens and self.items:
+                self.items[0] = _cut_to_tokens(self.items[0], max_tokens, TRUNCATE_TAIL)
+        else:
+            self.text = _cut_to_tokens(self.content, max_tokens, self.policy)
+            self.items = None
+
+
+@dataclass
+class BudgetReport:
+    """Final per-segment and total token accounting for one prompt."""
+    total_budget: int
+    total_tokens: int
+    original_total_tokens: int
+    segments: Dict[str, dict] = field(default_factory=dict)
+
+    @property
+    def trimmed(self) -> bool:
+        return any(s["trimmed"] for s in self.segments.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "estimator": f"chars/{PROMPT_CHARS_PER_TOKEN:g}",
+            "total_budget": self.total_budget,
+            "total_tokens": self.total_tokens,
+            "original_total_tokens": self.original_total_tokens,
+            "over_budget": self.total_tokens > self.total_budget,
+            "trimmed": self.trimmed,
+            "segments": self.segments,
+        }
+
+
+class PromptBudgeter:
+    """Fits a list of PromptSegments within per-segment and total token budgets."""
+
+    def __init__(self, total_budget: int = PROMPT_TOTAL_TOKEN_BUDGET):
+        self.total_budget = total_budget
+
+    def fit(self, segments: List[PromptSegment]) -> BudgetReport:
+        """Trim segments in place and return the resulting budget report."""
+        original_total = sum(s.original_tokens for s in segments)
+
+        # 1. Per-segment caps
+        for segment in segments:
+            if segment.max_tokens is not None:
+                segment.trim_to(segment.max_tokens)
+
+        # 2. Total budget — trim lowest-priority segments first
+        overflow = sum(s.tokens for s in segments) - self.total_budget
+        for segment in sorted(segments, key=lambda s: s.priority):
+            if overflow <= 0:
+                break
+            if segment.required:
+                continue
+            before = segment.tokens
+            segment.trim_to(before - overflow)
+            overflow -= before - segment.tokens
+
+        report = BudgetReport(
+            total_budget=self.total_budget,
+            total_tokens=sum(s.tokens for s in segments),
+            original_total_tokens=original_total,
+        )
+        for segment in segments:
+            entry = {
+                "tokens": segment.tokens,
+                "original_tokens": segment.original_tokens,
+                "max_tokens": segment.max_tokens,
+                "policy": segment.policy,
+                "priority": segment.priority,
+                "trimmed": segment.tokens < segment.original_tokens,
+            }
+            if segment.items is not None:
+                entry["items"] = len(segment.items)
+            report.segments[segment.name] = entry
+        return report
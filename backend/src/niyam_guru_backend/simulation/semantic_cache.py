@@ -0,0 +1,339 @@
+"""
+Semantic near-duplicate cache for judgment predictions (opt-in).
+
+Many complaints differ only in who filed them: same seller, same defect,
+same amount band. The prediction pipeline embeds an anonymised case
+narrative and, when a previous prediction in the same scope is similar
+enough, reuses that prediction's raw LLM output with the new party names
+and amounts substituted, skipping retrieval and the LLM call.
+
+- scope      (case category, normalised opposite party, claim amount bucket)
+             must match exactly
+- threshold  cosine similarity of the narratives, SEMANTIC_CACHE_THRESHOLD
+- version    LLM model + prediction prompt version; entries from another
+             version are discarded on sight
+- personal   names, addresses, district, product, dates and amounts are
+             substituted on a hit; amounts and dates are matched by value
+             in any common format. A hit whose output still states any old
+             value (e.g. "25k", "5 March 2024", a name in capitals) is
+             rejected
+
+Entries live in process memory, bounded by count and age.
+"""
+
+import math
+import re
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from niyam_guru_backend.config import (
+    EMBEDDING_MODEL,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
+from niyam_guru_backend.core import metrics, run_blocking
+
+
+# ========== Scope Normalisation ==========
+
+_LEGAL_SUFFIXES = re.compile(
+    r"\b(private|pvt|limited|ltd|llp|inc|incorporated|co|company|corp|corporation|india)\b\.?",
+    re.IGNORECASE,
+)
+
+
+def normalize_party(name: str) -> str:
+    """'ABC Electronics Pvt. Ltd.' → 'abc electronics'."""
+    name = _LEGAL_SUFFIXES.sub(" ", (name or "").lower())
+    return " ".join(re.findall(r"[a-z0-9]+", name))
+
+
+def amount_bucket(amount: Optional[float]) -> str:
+    """Half-decade bucket of an amount: 20,000 and 30,000 share one, 40,000 does not."""
+    if amount is None or amount <= 0:
+        return "none"
+    return f"b{math.floor(math.log10(amount) * 2)}"
+
+
+# Keys of SemanticProbe.personal that hold rupee amounts
+AMOUNT_KEYS = ("claim_amount", "paid_amount", "purchase_amount")
+
+# Keys of SemanticProbe.personal that hold dates
+DATE_KEYS = ("purchase_date", "date_of_cause_of_action", "date_of_deficiency", "prior_complaint_date")
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%d %B %Y", "%d %b %Y", "%B %d, %Y", "%b %d, %Y")
+
+# (format, zero-padded day) pairs covering the ways a date is commonly written
+_DATE_RENDERINGS = [(fmt, padded) for fmt in _DATE_FORMATS for padded in (True, False)]
+
+# A figure as written in text: 25000, 25,000, 1,25,000.50 (not part of a word or invoice number)
+_FIGURE = re.compile(r"(?<![A-Za-z0-9_])\d+(?:,\d+)*(?:\.\d+)?(?![A-Za-z0-9_])")
+_WORD_FIGURE = re.compile(
+    r"(?<![A-Za-z0-9_.])(\d+(?:\.\d+)?)\s*(k|thousand|lakhs?|lacs?|crores?|cr)\b", re.IGNORECASE
+)
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "lakh": 1e5, "lac": 1e5, "crore": 1e7, "cr": 1e7}
+
+
+def _to_number(value: str) -> Optional[float]:
+    """'Rs. 25,000/-' → 25000.0; None if the value is not an amount."""
+    cleaned = re.sub(r"(rs\.?|inr|₹|/-|,|\s)", "", (value or "").lower())
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _group(number: float, decimals: int) -> str:
+    """Indian digit grouping: 125000 → '1,25,000'."""
+    whole, _, fraction = f"{number:.{decimals}f}".partition(".")
+    head, tail = whole[:-3], whole[-3:]
+    groups = []
+    while head:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return ",".join(groups + [tail]) + (f".{fraction}" if fraction else "")
+
+
+def _format_like(written: str, number: float) -> str:
+    """number written the way `written` was (grouping, decimals)."""
+    decimals = len(written.partition(".")[2])
+    if "," in written:
+        return _group(number, decimals)
+    return f"{number:.{decimals}f}"
+
+
+def _to_date(value: str) -> Optional[datetime]:
+    """'2024-03-05' / '05/03/2024' / '5 March 2024' → datetime; None otherwise."""
+    value = " ".join((value or "").split())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _render_date(date: datetime, fmt: str, padded: bool) -> str:
+    return date.strftime(fmt if padded else fmt.replace("%d", str(date.day)))
+
+
+def _date_pattern(written: str) -> "re.Pattern":
+    return re.compile(rf"(?<![A-Za-z0-9]){re.escape(written)}(?![A-Za-z0-9])", re.IGNORECASE)
+
+
+def mentions_date(text: str, date: datetime) -> bool:
+    """Whether text states the date in any of the common formats."""
+    return any(
+        _date_pattern(_render_date(date, fmt, padded)).search(text)
+        for fmt, padded in _DATE_RENDERINGS
+    )
+
+
+def mentions_amount(text: str, amount: float) -> bool:
+    """Whether text states the amount in any common form (25,000 / 25k / 0.25 lakh)."""
+    for match in _FIGURE.finditer(text):
+        if float(match.group().replace(",", "")) == amount:
+            return True
+    for match in _WORD_FIGURE.finditer(text):
+        unit = match.group(2).lower().rstrip("s")
+        if math.isclose(float(match.group(1)) * _MULTIPLIERS[unit], amount):
+            return True
+    return False
+
+
+def repersonalize(text: str, old: Dict[str, str], new: Dict[str, str]) -> Optional[str]:
+    """
+    Substitute the new request's personal values for the cached ones.
+
+    Names and other text values are replaced literally in the raw JSON text
+    (JSON-escaped, longest first so a name is never clobbered by a shorter
+    value contained in it; values under three characters are skipped).
+    Amounts and dates are matched by value, so "Rs. 25,000/-", "₹25000" and
+    "refund of 25,000.00" all become the new amount in the same format, and
+    "2024-03-05" / "5 March 2024" the new date as written.
+
+    Returns None when any old value is still stated afterwards (an amount
+    as "25k", a date in another format, a name in different case, or a
+    value the new request leaves blank): the cached prediction can't be
+    safely reused.
+    """
+    old_amounts = {k: _to_number(old.get(k, "")) for k in AMOUNT_KEYS}
+    new_amounts = {k: _to_number(new.get(k, "")) for k in AMOUNT_KEYS}
+    old_dates = {k: _to_date(old.get(k, "")) for k in DATE_KEYS}
+    new_dates = {k: _to_date(new.get(k, "")) for k in DATE_KEYS}
+    # Text values, including dates written in a form we don't parse
+    text_keys = [key for key in old if key not in AMOUNT_KEYS and not old_dates.get(key)]
+    pairs = [
+        (old[key], new.get(key, ""))
+        for key in text_keys
+        if old[key] and new.get(key) and old[key] != new.get(key) and len(old[key]) >= 3
+    ]
+    for old_value, new_value in sorted(pairs, key=lambda pair: len(pair[0]), reverse=True):
+        text = text.replace(json.dumps(old_value)[1:-1], json.dumps(new_value)[1:-1])
+
+    for key in DATE_KEYS:
+        old_date, new_date = old_dates[key], new_dates[key]
+        if old_date and new_date and old_date != new_date:
+            for fmt, padded in _DATE_RENDERINGS:
+                text = _date_pattern(_render_date(old_date, fmt, padded)).sub(
+                    _render_date(new_date, fmt, padded), text
+                )
+
+    replacements = {
+        old_amounts[k]: new_amounts[k] for k in AMOUNT_KEYS
+        if old_amounts[k] and new_amounts[k] and old_amounts[k] != new_amounts[k]
+    }
+    if replacements:
+        def _swap(match: "re.Match") -> str:
+            number = float(match.group().replace(",", ""))
+            if number not in replacements:
+                return match.group()
+            return _format_like(match.group(), replacements[number])
+
+        text = _FIGURE.sub(_swap, text)
+
+    # Anything the swaps could not reach means the old case's details remain
+    kept = {a for a in new_amounts.values() if a}
+    for amount in old_amounts.values():
+        if amount and amount not in kept and mentions_amount(text, amount):
+            return None
+    kept_dates = {d for d in new_dates.values() if d}
+    for date in old_dates.values():
+        if date and date not in kept_dates and mentions_date(text, date):
+            return None
+    kept_text = {v.lower() for v in new.values() if v}
+    lowered = text.lower()
+    for key in text_keys:
+        value = (old[key] or "").lower()
+        if len(value) >= 3 and value not in kept_text and json.dumps(value)[1:-1] in lowered:
+            return None
+    return text
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@lru_cache(maxsize=1)
+def _embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+def _embed(text: str) -> List[float]:
+    return _embeddings().embed_query(text)
+
+
+# ========== Cache ==========
+
+@dataclass
+class SemanticProbe:
+    """What the pipeline knows about a request before deciding to call the LLM."""
+    narrative: str                      # Anonymised case narrative to embed
+    scope: Tuple[str, str, str]         # (category, opposite party, amount bucket)
+    personal: Dict[str, str]            # Values substituted on a hit
+    embedding: Optional[List[float]] = None
+
+
+@dataclass
+class SemanticCacheEntry:
+    """A stored prediction and the request it was made for."""
+    embedding: List[float]
+    scope: Tuple[str, str, str]
+    personal: Dict[str, str]
+    version: str                        # "<model>:<prompt version>"
+    response_text: str                  # Raw LLM output, before confidence caps
+    extras: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+
+class SemanticPredictionCache:
+    """Bounded in-memory store of predictions, looked up by narrative similarity."""
+
+    def __init__(
+        self,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS,
+        embed: Callable[[str], List[float]] = _embed,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self._entries: "OrderedDict[int, SemanticCacheEntry]" = OrderedDict()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def lookup(self, probe: SemanticProbe, version: str) -> Optional[Tuple[SemanticCacheEntry, float]]:
+        """Best entry above the threshold in the probe's scope, or None. Fills probe.embedding."""
+        if not self.enabled:
+            return None
+        try:
+            probe.embedding = await run_blocking(self.embed, probe.narrative)
+        except Exception as e:
+            print(f"⚠️ Semantic cache embedding failed: {e}")
+            metrics.incr("prediction.semantic_cache", outcome="error")
+            return None
+
+        now = time.time()
+        best: Optional[Tuple[int, float]] = None
+        for entry_id, entry in list(self._entries.items()):
+            if entry.version != version or now - entry.created_at > self.ttl_seconds:
+                del self._entries[entry_id]
+                continue
+            if entry.scope != probe.scope:
+                continue
+            similarity = _cosine(probe.embedding, entry.embedding)
+            if best is None or similarity > best[1]:
+                best = (entry_id, similarity)
+
+        if best is not None:
+            metrics.observe("prediction.semantic_cache_similarity", best[1])
+        if best is None or best[1] < self.threshold:
+            metrics.incr("prediction.semantic_cache", outcome="miss")
+            return None
+
+        self._entries.move_to_end(best[0])
+        metrics.incr("prediction.semantic_cache", outcome="hit")
+        return self._entries[best[0]], best[1]
+
+    def store(self, probe: SemanticProbe, version: str, response_text: str, extras: Optional[dict] = None) -> None:
+        """Remember a fresh prediction for future near-duplicates."""
+        if not self.enabled or probe.embedding is None:
+            return
+        self._entries[self._next_id] = SemanticCacheEntry(
+            embedding=probe.embedding,
+            scope=probe.scope,
+            personal=dict(probe.personal),
+            version=version,
+            response_text=response_text,
+            extras=extras or {},
+        )
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+prediction_semantic_cache = SemanticPredictionCache()
@@ -0,0 +1,80 @@
+"""
+Incremental parsing of the streamed prediction JSON.
+
+The prediction is one JSON object whose top-level members (Case_Summary,
+Legal_Grounds, Judgment_Reasoning, ...) arrive in order. JsonSectionStreamer
+consumes the text as it streams and returns each member as soon as its
+value is complete, without waiting for the closing brace of the whole
+object. Markdown code fences around the object are ignored.
+"""
+
+import json
+from typing import List, Tuple
+
+
+class JsonSectionStreamer:
+    """Emits (key, value) for each completed top-level member of a streamed JSON object."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0               # Next character of _buffer to scan
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = -1     # Start of the current top-level member, -1 before the object
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, object]]:
+        """Add streamed text; return the members completed by it."""
+        if self.done or not text:
+            return []
+        self._buffer += text
+        completed = []
+
+        while self._pos < len(self._buffer):
+            ch = self._buffer[self._pos]
+            position = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._member_start < 0:
+                # Skip anything (fences, whitespace) before the opening brace
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = position + 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_member(position))
+                    self.done = True
+                    break
+            elif ch == "," and self._depth == 1:
+                completed.extend(self._close_member(position))
+                self._member_start = position + 1
+
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, object]]:
+        member = self._buffer[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            # Malformed member — the final full parse reports the error
+            return []
+        return list(parsed.items())